@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Geçmiş barlar üzerinde strateji backtest'i.
+
+Sinyaller strategies.series() ile tek geçişte (tüm seri için) hesaplanır,
+sonra check_pair'deki pozisyon / alert durum makinesi (pozisyon koşulu,
+tanımlı alert, cooldown) sinyal olan barlar üzerinde çalıştırılır.
+Dolum fiyatı: sinyal barının kapanışı. İndikatörler serinin başından
+itibaren hesaplanır (EVAL_MODE=incremental ile aynı görünüm).
+
+Kullanım:
+    python backtest.py configs/SOLUSDT.15m.json --days 365
+    python backtest.py configs/SOLUSDT.15m.json --csv sol_15m.csv --fee 0.04 --trades trades.csv
+"""
+
+import sys, json, csv, logging
+from time import time, perf_counter
+
+import numpy as np
+import pandas as pd
+
+import strategies
+from strategies import SIGNALS
+from resample import NATIVE_MS, tf_ms
+
+logger = logging.getLogger("wunderbot")
+
+def step_ms(tf, native=False):
+    """Timeframe -> ms; bilinmeyen (native=True ise Binance'in sunmadığı) timeframe'de ValueError."""
+    step = tf_ms(tf)
+    if not step:
+        raise ValueError(f"bilinmeyen timeframe: {tf!r}")
+    if native and tf not in NATIVE_MS:
+        raise ValueError(f"Binance {tf} interval'ini sunmuyor ({', '.join(NATIVE_MS)})")
+    return step
+
+# Sinyal -> (alert anahtarı, izinli mi(pos), yeni pozisyon)
+_RULES = {
+    "ENTER-LONG":  ("enter_long",  lambda p: p != "LONG",  "LONG"),
+    "ENTER-SHORT": ("enter_short", lambda p: p != "SHORT", "SHORT"),
+    "EXIT-LONG":   ("exit_long",   lambda p: p == "LONG",  "NONE"),
+    "EXIT-SHORT":  ("exit_short",  lambda p: p == "SHORT", "NONE"),
+}
+_SIDE = {"LONG": 1, "SHORT": -1, "NONE": 0}
+
+# ============== DATA ==============
+def load_csv(path):
+    """timestamp,open,high,low,close,volume (timestamp: ms veya tarih)."""
+    df = pd.read_csv(path)
+    ts = df["timestamp"]
+    df["timestamp"] = pd.to_datetime(ts, unit="ms") if np.issubdtype(ts.dtype, np.number) else pd.to_datetime(ts)
+    return df.set_index("timestamp")[["open","high","low","close","volume"]].astype(float)
+
+def download(symbol, interval, start_ms, end_ms=None):
+    """Binance REST'ten sayfa sayfa (1000'er bar) geçmiş çek."""
+    from binance.client import Client
+    client = Client()
+    end_ms = end_ms or int(time() * 1000)
+    step = step_ms(interval, native=True)
+    rows, cur = [], start_ms
+    while cur < end_ms:
+        ks = client.get_klines(symbol=symbol, interval=interval, limit=1000, startTime=cur, endTime=end_ms)
+        if not ks:
+            break
+        rows.extend(ks)
+        cur = int(ks[-1][0]) + step
+        if len(ks) < 1000:
+            break
+    # Son satır oluşan mum olabilir: sadece kapanmış barlar
+    rows = [k for k in rows if int(k[0]) + step <= end_ms]
+    df = pd.DataFrame([k[:6] for k in rows], columns=["timestamp","open","high","low","close","volume"])
+    df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
+    return df.set_index("timestamp").astype(float)
+
+def load_history(pair, days=365, csv_path=None, store=None):
+    """CSV > yerel kline deposu > Binance REST sırasıyla geçmiş barlar."""
+    if csv_path:
+        return load_csv(csv_path)
+    now = int(time() * 1000)
+    start = now - int(days * 86_400_000)
+    if store:
+        from kline_store import KlineStore
+        step = step_ms(pair["timeframe"])
+        return KlineStore(None if store is True else store).series(pair["symbol"], pair["timeframe"]).frame(start, now - step + 1)
+    return download(pair["symbol"], pair["timeframe"], start, now)
+
+# ============== SIMULATION ==============
+def simulate(codes, close, ts_ms, alerts=None, initial_position="NONE", cooldown_sec=90, fee=0.0):
+    """
+    check_pair durum makinesi. Sadece sinyal olan barlar gezilir.
+    Döner: (pos dizisi [-1/0/1, bar kapanışından sonra], trades listesi)
+    fee: işlem başına oran (0.0004 = %0.04), pozisyon değişim miktarıyla çarpılır.
+    initial_position devralınmış pozisyondur: ilk barda açılmış sayılmaz,
+    giriş ücreti alınmaz (işlemde inherited=True, sadece çıkış ücreti).
+    """
+    pos = initial_position
+    last_sig, last_ts = None, -1e18
+    n = len(close)
+    change_idx, change_side = [], []
+    trades, open_tr = [], None
+    if pos != "NONE":
+        open_tr = {"side": pos, "entry_i": 0, "inherited": True}
+    for i in np.flatnonzero(codes).tolist():
+        sig = SIGNALS[codes[i]]
+        key, allowed, new_pos = _RULES[sig]
+        if alerts is not None and not alerts.get(key):
+            continue
+        if not allowed(pos):
+            continue
+        t = ts_ms[i] / 1000.0
+        if last_sig == sig and (t - last_ts) < cooldown_sec:
+            continue
+        last_sig, last_ts = sig, t
+        if new_pos == pos:
+            continue
+        if open_tr is not None:
+            open_tr["exit_i"] = i
+            trades.append(open_tr)
+            open_tr = None
+        if new_pos != "NONE":
+            open_tr = {"side": new_pos, "entry_i": i}
+        pos = new_pos
+        change_idx.append(i)
+        change_side.append(_SIDE[pos])
+    if open_tr is not None:
+        trades.append(open_tr)         # açık kalan işlem (son kapanışla değerlenir)
+
+    # Pozisyon dizisi: değişim noktalarından ileri taşı
+    pos_arr = np.zeros(n, dtype=np.int8)
+    marks = np.full(n, -1)
+    marks[change_idx] = np.arange(len(change_idx))
+    np.maximum.accumulate(marks, out=marks)
+    sides = np.array([_SIDE[initial_position]] + change_side, dtype=np.int8)
+    pos_arr[:] = sides[marks + 1]
+
+    for tr in trades:
+        side = _SIDE[tr["side"]]
+        e, x = tr["entry_i"], tr.get("exit_i")
+        exit_price = close[x] if x is not None else close[-1]
+        tr["entry_price"] = float(close[e])
+        tr["exit_price"] = float(exit_price)
+        tr["bars"] = (x if x is not None else n - 1) - e
+        fees = (1 if tr.get("inherited") else 2) * fee
+        tr["pnl_pct"] = float((side * (exit_price / close[e] - 1) - fees) * 100)
+        tr["open"] = x is None
+    return pos_arr, trades
+
+def equity_curve(pos_arr, close, fee=0.0, initial_side=0):
+    """
+    Bar kapanışında doldurulan pozisyonların mark-to-market özsermaye eğrisi
+    (başlangıç 1.0). initial_side: devralınan pozisyon (-1/0/1); ilk barda
+    ona göre değişim yoksa ücret alınmaz.
+    """
+    ret = np.zeros(len(close))
+    prev = pos_arr[:-1].astype(np.float64)
+    ret[1:] = prev * (close[1:] / close[:-1] - 1)
+    turnover = np.abs(np.diff(pos_arr.astype(np.float64), prepend=float(initial_side)))
+    ret -= turnover * fee
+    return np.cumprod(1 + ret)
+
+def summarize(eq, trades):
+    """Özsermaye eğrisi + işlem listesinden özet metrikler."""
+    closed = [t for t in trades if not t["open"]]
+    wins = [t["pnl_pct"] for t in closed if t["pnl_pct"] > 0]
+    losses = [t["pnl_pct"] for t in closed if t["pnl_pct"] <= 0]
+    dd = 1 - eq / np.maximum.accumulate(eq) if len(eq) else np.zeros(1)
+    return {
+        "trades": len(closed),
+        "win_rate": round(len(wins) / len(closed) * 100, 2) if closed else 0.0,
+        "profit_factor": round(sum(wins) / -sum(losses), 3) if losses and sum(losses) < 0 else None,
+        "total_return_pct": round((eq[-1] - 1) * 100, 3) if len(eq) else 0.0,
+        "max_drawdown_pct": round(float(dd.max()) * 100, 3),
+    }
+
+def run_backtest(pair, df, fee=0.0, cooldown_sec=90):
+    """pair: configs/*.json formatı; df: kapanmış barlar (DatetimeIndex)."""
+    config = pair.get("strategy", {}) or {}
+    stype = (config.get("type") or "tmh").lower()
+    h, l, c = (df[k].to_numpy(dtype=np.float64) for k in ("high", "low", "close"))
+    ts_ms = df.index.as_unit("ms").asi8
+    step = step_ms(pair.get("timeframe"))
+
+    t0 = perf_counter()
+    codes = strategies.series(stype, h, l, c, config)
+    t1 = perf_counter()
+    pos_arr, trades = simulate(codes, c, ts_ms + step, pair.get("alerts"),
+                               pair.get("initial_position", "NONE"), cooldown_sec, fee)
+    eq = equity_curve(pos_arr, c, fee, _SIDE[pair.get("initial_position", "NONE")])
+    t2 = perf_counter()
+
+    counts = np.bincount(codes, minlength=len(SIGNALS))
+
+    for t in trades:
+        t["entry_time"] = str(df.index[t.pop("entry_i")])
+        x = t.pop("exit_i", None)
+        t["exit_time"] = str(df.index[x]) if x is not None else None
+
+    n = len(c)
+    return {
+        "symbol": pair.get("symbol"),
+        "timeframe": pair.get("timeframe"),
+        "strategy": stype,
+        "bars": n,
+        "start": str(df.index[0]) if n else None,
+        "end": str(df.index[-1]) if n else None,
+        "signals": {SIGNALS[i]: int(counts[i]) for i in range(1, len(SIGNALS))},
+        **summarize(eq, trades),
+        "open_trade": trades[-1] if trades and trades[-1]["open"] else None,
+        "signal_ms": round((t1 - t0) * 1000, 2),
+        "sim_ms": round((t2 - t1) * 1000, 2),
+        "bars_per_sec": int(n / max(t2 - t0, 1e-9)),
+        "trade_list": trades,
+    }
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    ap = argparse.ArgumentParser(description="Config backtest'i")
+    ap.add_argument("config", help="configs/*.json dosyası")
+    ap.add_argument("--csv", help="timestamp,open,high,low,close,volume dosyası (yoksa Binance'ten indirilir)")
+    ap.add_argument("--store", nargs="?", const=True,
+                    help="yerel kline deposundan oku; dizin verilmezse KLINE_STORE (bkz. kline_store.py)")
+    ap.add_argument("--days", type=float, default=365)
+    ap.add_argument("--fee", type=float, default=0.0, help="işlem başına komisyon, yüzde (0.04 = %%0.04)")
+    ap.add_argument("--cooldown", type=float, default=90)
+    ap.add_argument("--trades", help="işlem listesinin yazılacağı CSV")
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        pair = json.load(f)
+    df = load_history(pair, args.days, args.csv, args.store)
+    logger.info(f"📈 {pair['symbol']} {pair['timeframe']}: {len(df)} bar")
+
+    res = run_backtest(pair, df, fee=args.fee / 100, cooldown_sec=args.cooldown)
+    trade_list = res.pop("trade_list")
+    if args.trades:
+        with open(args.trades, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=["side","entry_time","entry_price","exit_time","exit_price","bars","pnl_pct","open",
+                                               "inherited"])
+            w.writeheader()
+            w.writerows(trade_list)
+    json.dump(res, sys.stdout, indent=2, ensure_ascii=False)
+    print()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Performans ölçümleri: strateji mikro benchmark'ları + uçtan uca check_all_pairs.
+
+Uçtan uca ölçümde bot.py sahte bir Binance client'ı (FakeBinanceClient) ve
+sahte WT endpoint'i (wt_dispatch.FakeWTServer) ile çalışır; ağ yoktur.
+Sonuçlar JSON'dur; --compare ile önceki bir çıktıya göre değişim yüzdeleri
+yazılır (commit'ler arası gerileme kontrolü).
+
+Kullanım:
+    python bench.py                                  # sentetik fixture, hepsi
+    python bench.py --only micro --windows 200,500
+    python bench.py --only e2e --pairs 10,100,1000 --cycles 3
+    python bench.py --only backends --pairs 300 --procs 1,2,4,8   # thread vs process havuzu
+    python bench.py --fixture sol_15m.csv            # kayıtlı OHLCV (CSV)
+    python bench.py --store SOLUSDT@15m              # kayıtlı OHLCV (kline_store)
+    python bench.py --out bench_HEAD.json --compare bench_main.json
+"""
+
+import os, sys, json, zlib, shutil, logging, platform, subprocess, statistics, tempfile
+from datetime import datetime, timezone
+from threading import Lock
+from time import time, perf_counter, monotonic
+
+import numpy as np
+import pandas as pd
+
+from resample import NATIVE_MS
+
+logger = logging.getLogger("wunderbot")
+
+VECTOR_ROWS = 100   # bench_micro'daki toplu değerlendirme satır sayısı
+BENCH_CONFIGS = {
+    "tmh":         {"type": "tmh", "ema_fast": 12, "ema_slow": 26, "supertrend_period": 10, "supertrend_multiplier": 2.0},
+    "wt_cross":    {"type": "wt_cross", "n1": 10, "n2": 21, "mode": "basic"},
+    "ssl_channel": {"type": "ssl_channel", "ssl_period": 10},
+}
+# e2e: her FIRE_EVERY'inci parite sadece Supertrend'e bakar; pozisyon NONE iken
+# ilk turda kesin ENTER-LONG/SHORT verir (alert yolu fixture'dan bağımsız ölçülür)
+FIRE_EVERY = 4
+FIRING_CONFIG = dict(BENCH_CONFIGS["tmh"], confirmation_mode="supertrend_only")
+
+# ============== FIXTURES ==============
+def synthetic(n=5000, seed=7, tick=0.01):
+    """Tick'e yuvarlanmış rastgele yürüyüş + trend dalgası (DataFrame, 1m index)."""
+    rng = np.random.default_rng(seed)
+    ret = rng.normal(0, 0.002, n) + 0.0015 * np.sin(np.arange(n) / 80.0)
+    c = np.round(100 * np.exp(np.cumsum(ret)) / tick) * tick
+    o = np.concatenate([[c[0]], c[:-1]])
+    h = np.round(np.maximum(o, c) * (1 + np.abs(rng.normal(0, 0.001, n))) / tick) * tick
+    l = np.round(np.minimum(o, c) * (1 - np.abs(rng.normal(0, 0.001, n))) / tick) * tick
+    v = rng.uniform(10, 100, n)
+    idx = pd.date_range("2024-01-01", periods=n, freq="1min")
+    return pd.DataFrame({"open": o, "high": h, "low": l, "close": c, "volume": v},
+                        index=idx.rename("timestamp"))
+
+def recorded(spec):
+    """CSV dosyası ya da kline_store anahtarı (SYMBOL@tf)."""
+    if os.path.exists(spec):
+        from backtest import load_csv
+        return load_csv(spec)
+    from kline_store import KlineStore
+    sym, iv = spec.split("@", 1)
+    return KlineStore().series(sym.upper(), iv).frame()
+
+# ============== FAKE EXCHANGE ==============
+class FakeBinanceClient:
+    """
+    binance.client.Client yerine geçer: get_klines fixture barlarını gerçek
+    saate hizalı, sembol başına ölçeklenmiş olarak döner.
+    """
+
+    def __init__(self, *a, **k):
+        self.fixture = None
+        self.response = None
+        self.calls = 0
+        self._rows = {}
+        self._lock = Lock()
+
+    def _row(self, symbol, step, i):
+        f = self.fixture
+        j = i % len(f["close"])
+        k = 1.0 + (zlib.crc32(symbol.encode()) % 1000) / 1000.0   # PYTHONHASHSEED'den bağımsız
+        o = i * step
+        return [o, str(f["open"][j] * k), str(f["high"][j] * k), str(f["low"][j] * k),
+                str(f["close"][j] * k), str(f["volume"][j]), o + step - 1, "0", 1, "0", "0", "0"]
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        with self._lock:
+            self.calls += 1
+        step = NATIVE_MS.get(interval)
+        if step is None:
+            raise ValueError(f"geçersiz interval: {interval}")
+        last = int(time() * 1000) // step
+        first = startTime // step if startTime is not None else last - limit + 1
+        last = min(last, first + limit - 1)
+        cache = self._rows.setdefault((symbol, interval), {})
+        out = []
+        for i in range(first, last + 1):
+            r = cache.get(i)
+            if r is None:
+                r = cache[i] = self._row(symbol, step, i)
+            out.append(r)
+        return out
+
+# ============== MICRO ==============
+def _timeit(fn, repeat, min_time=0.2):
+    fn()                                  # ısınma
+    samples, t_end = [], perf_counter() + min_time
+    while len(samples) < repeat or perf_counter() < t_end:
+        t0 = perf_counter()
+        fn()
+        samples.append(perf_counter() - t0)
+        if len(samples) >= repeat * 20:
+            break
+    samples.sort()
+    return {
+        "n": len(samples),
+        "median_us": round(statistics.median(samples) * 1e6, 1),
+        "p95_us": round(samples[int(len(samples) * 0.95) - 1] * 1e6, 1),
+        "min_us": round(samples[0] * 1e6, 1),
+    }
+
+def bench_micro(df, windows=(100, 200, 500, 1000), repeat=50):
+    import strategies
+    from strategies import REGISTRY
+    from strategies.streaming import make_state, warmup
+
+    out = {}
+    for name in REGISTRY:
+        cfg = BENCH_CONFIGS.get(name, {"type": name})
+        for w in windows:
+            win = df.iloc[-w:]
+            out[f"analyze/{name}/{w}"] = _timeit(lambda: strategies.run(name, win, cfg), repeat)
+        # Backtest yolu: tüm seri tek geçiş
+        h, l, c = (df[k].to_numpy() for k in ("high", "low", "close"))
+        r = _timeit(lambda: strategies.series(name, h, l, c, cfg), max(3, repeat // 10))
+        r["bars"] = len(c)
+        out[f"series/{name}/{len(c)}"] = r
+        # Incremental mod: kapanan bar başına güncelleme
+        st = warmup(make_state(name, cfg), h[:-1], l[:-1], c[:-1])
+        hl = (float(h[-1]), float(l[-1]), float(c[-1]))
+        out[f"incremental/{name}"] = _timeit(lambda: st.update(*hl), repeat)
+        # Vector mod: aynı pencerenin VECTOR_ROWS paritelik yığını tek geçişte
+        nb = strategies.min_bars(name, cfg)
+        stack = [np.tile(a[-nb:], (VECTOR_ROWS, 1)) for a in (h, l, c)]
+        r = _timeit(lambda: strategies.run_batch(name, *stack, cfg), max(3, repeat // 10))
+        r["rows"] = VECTOR_ROWS
+        out[f"vector/{name}/{VECTOR_ROWS}"] = r
+    return out
+
+# ============== END-TO-END ==============
+def _bench_pairs(n):
+    tfs = ("5m", "15m", "1h")
+    types = list(BENCH_CONFIGS)
+    pairs = []
+    for i in range(n):
+        sym = f"BENCH{i:04d}USDT"
+        tf = tfs[i % len(tfs)]
+        code = f"{sym}_{tf}"
+        pairs.append({
+            "symbol": sym,
+            "timeframe": tf,
+            "enabled": True,
+            "initial_position": "NONE",
+            "strategy": dict(FIRING_CONFIG if i % FIRE_EVERY == 0 else BENCH_CONFIGS[types[i % len(types)]],
+                             signal_on_close=True),
+            "alerts": {k: f"{k.upper()}_{code}" for k in ("enter_long", "exit_long", "enter_short", "exit_short")},
+        })
+    return pairs
+
+def _bot_env(df):
+    """bot modülünü sahte client ve sahte WT ile bir kez yükle -> (bot, wt, client, tmp)."""
+    import binance.client
+    from wt_dispatch import FakeWTServer
+
+    wt = FakeWTServer().start()
+    tmp = tempfile.mkdtemp(prefix="wunderbench-")
+    os.environ.update({
+        "WT_URL": wt.url, "WT_ASYNC": "true", "STATE_DB": "", "KLINE_STORE": "",
+        "OUTBOX_PATH": os.path.join(tmp, "outbox.jsonl"), "BINANCE_WEIGHT_LIMIT": "100000000",
+        "CYCLE_DEADLINE": "600", "DATA_SOURCE": "rest",
+    })
+    binance.client.Client = FakeBinanceClient
+    import bot
+
+    client = bot.binance_client.client
+    client.fixture = {k: df[k].to_numpy() for k in ("open", "high", "low", "close", "volume")}
+    bot.get_dispatcher()
+    return bot, wt, client, tmp
+
+def _run_cycles(bot, wt, client, n, cycles):
+    pairs = _bench_pairs(n)
+    # Config kaynağı: sabit liste (sheet / dosya okuması ölçüme girmesin)
+    svc = bot.config_service
+    svc.pairs, svc.source, svc.checked, svc.ttl = pairs, "bench", monotonic(), float("inf")
+    bot._kline_cache.clear()
+    bot._inc_states.clear()
+    with bot._pos_lock:
+        bot.pos_state.clear()
+    sent0, calls0 = len(wt.received), client.calls
+
+    runs = []
+    for i in range(cycles + 1):
+        t0 = perf_counter()
+        bot.check_all_pairs()
+        dt = perf_counter() - t0
+        runs.append({"wall_s": round(dt, 4), **(bot.bot_state.get("last_cycle") or {})})
+    bot.get_dispatcher().drain(timeout=30)
+    sent = len(wt.received) - sent0
+    firing = len(range(0, n, FIRE_EVERY))
+    if sent < firing:
+        raise RuntimeError(f"e2e/{n}: {sent} alert gönderildi, en az {firing} bekleniyordu (alert yolu ölçülmedi)")
+    warm = [r["wall_s"] for r in runs[1:]] or [runs[0]["wall_s"]]
+    return {
+        "pairs": n,
+        "cold_s": runs[0]["wall_s"],
+        "warm_median_s": round(statistics.median(warm), 4),
+        "warm_pairs_per_sec": round(n / max(statistics.median(warm), 1e-9), 1),
+        "api_calls": client.calls - calls0,
+        "alerts_sent": sent,
+        "alerts_min": firing,
+        "timed_out": sum(r.get("timed_out", 0) for r in runs),
+        "queue_wait_max_s": max(r.get("queue_wait_max", 0) for r in runs),
+        "cycles": runs,
+    }
+
+def bench_e2e(df, sizes=(10, 100, 1000), cycles=3):
+    """
+    Her boyut için: soğuk tur (tam geçmiş çekimi) + `cycles` sıcak tur.
+    bot modülü bir kez, sahte client ve sahte WT ile yüklenir.
+    """
+    bot, wt, client, tmp = _bot_env(df)
+    results = {f"check_all_pairs/{n}": _run_cycles(bot, wt, client, n, cycles) for n in sizes}
+    wt.stop()
+    shutil.rmtree(tmp, ignore_errors=True)
+    return results
+
+def bench_backends(df, n=300, cycles=3, procs=None):
+    """
+    Aynı tur EVAL_BACKEND=thread ve process (1, 2, 4 … CPU sayısı worker)
+    ile; sıcak turlar da strateji hesaplasın diye sonuç memo'su kapalı.
+    Çekirdek sayısıyla ölçeklenme: process/k satırlarının warm_median_s'i.
+    """
+    from eval_pool import ProcessEvaluator
+
+    bot, wt, client, tmp = _bot_env(df)
+    memo = bot.RESULT_MEMO
+    bot.RESULT_MEMO = 0
+    cpus = os.cpu_count() or 1
+    procs = procs or sorted({1, cpus} | {2 ** i for i in range(1, 8) if 2 ** i < cpus})
+    results = {}
+    try:
+        bot.EVAL_BACKEND = "thread"
+        results["thread"] = _run_cycles(bot, wt, client, n, cycles)
+        bot.EVAL_BACKEND = "process"
+        for k in procs:
+            bot._evaluator = ProcessEvaluator(workers=k).start()
+            try:
+                r = _run_cycles(bot, wt, client, n, cycles)
+            finally:
+                bot._evaluator.close()
+                bot._evaluator = None
+            r["speedup_vs_thread"] = round(results["thread"]["warm_median_s"] / max(r["warm_median_s"], 1e-9), 2)
+            results[f"process/{k}"] = r
+    finally:
+        bot.EVAL_BACKEND, bot.RESULT_MEMO = "thread", memo
+        wt.stop()
+        shutil.rmtree(tmp, ignore_errors=True)
+    return {f"backend/{k}/{n}": v for k, v in results.items()}
+
+# ============== REPORT ==============
+def _meta():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        rev = None
+    return {
+        "commit": rev,
+        "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "cpus": os.cpu_count(),
+        "machine": platform.machine(),
+    }
+
+# Karşılaştırmada kullanılan ana metrik (düşük = iyi)
+_PRIMARY = ("median_us", "warm_median_s")
+
+def compare(new, old):
+    """{ad: {"old", "new", "change_pct"}} — pozitif yüzde = yavaşlama."""
+    out = {}
+    for section in ("micro", "e2e"):
+        for name, r in (new.get(section) or {}).items():
+            o = (old.get(section) or {}).get(name)
+            if not o:
+                continue
+            for k in _PRIMARY:
+                if k in r and k in o and o[k]:
+                    out[name] = {"metric": k, "old": o[k], "new": r[k],
+                                 "change_pct": round((r[k] - o[k]) / o[k] * 100, 1)}
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="WunderBot benchmark'ları")
+    ap.add_argument("--only", choices=["micro", "e2e", "backends"])
+    ap.add_argument("--fixture", help="CSV dosyası (timestamp,open,high,low,close,volume)")
+    ap.add_argument("--store", help="kline_store anahtarı, örn. SOLUSDT@15m")
+    ap.add_argument("--bars", type=int, default=5000, help="sentetik fixture uzunluğu")
+    ap.add_argument("--windows", default="100,200,500,1000")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--pairs", default="10,100,1000")
+    ap.add_argument("--cycles", type=int, default=3, help="soğuk turdan sonraki sıcak tur sayısı")
+    ap.add_argument("--procs", help="backends: denenecek worker sayıları, örn. 1,2,4,8 (varsayılan: 1..CPU)")
+    ap.add_argument("--out", help="JSON çıktı dosyası (varsayılan: stdout)")
+    ap.add_argument("--compare", help="önceki JSON çıktısı")
+    ap.add_argument("--threshold", type=float, default=10.0, help="gerileme sayılacak yavaşlama yüzdesi")
+    ap.add_argument("--log", action="store_true", help="bot loglarını kapatma (varsayılan: sadece WARNING+)")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s | %(levelname)s | %(message)s")
+    if not args.log:
+        logging.disable(logging.INFO)
+
+    spec = args.fixture or args.store
+    df = recorded(spec) if spec else synthetic(args.bars)
+    res = {"meta": {**_meta(), "fixture": spec or f"synthetic:{len(df)}"}}
+    if args.only in (None, "micro"):
+        windows = [int(w) for w in args.windows.split(",") if w]
+        res["micro"] = bench_micro(df, [w for w in windows if w <= len(df)], args.repeat)
+    if args.only in (None, "e2e"):
+        res["e2e"] = bench_e2e(df, [int(n) for n in args.pairs.split(",") if n], args.cycles)
+    if args.only == "backends":
+        # e2e ile aynı bot modülünü paylaşmasın diye ayrı çalıştırılır
+        n = max(int(x) for x in args.pairs.split(",") if x)
+        procs = [int(x) for x in args.procs.split(",") if x] if args.procs else None
+        res["e2e"] = bench_backends(df, n, args.cycles, procs)
+
+    failed = False
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            res["compare"] = compare(res, json.load(f))
+        slow = {k: v for k, v in res["compare"].items() if v["change_pct"] > args.threshold}
+        for k, v in sorted(slow.items()):
+            print(f"🐢 {k}: {v['old']} → {v['new']} ({v['change_pct']:+.1f}%)", file=sys.stderr)
+        failed = bool(slow)
+
+    text = json.dumps(res, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    sys.exit(1 if failed else 0)
@@ -1,21 +1,40 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import os, json, logging, glob, pathlib, csv
-from datetime import datetime
-from threading import Thread
-from time import time
+import os, json, logging, glob, pathlib, csv, hashlib
+from collections import OrderedDict
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from threading import Thread, Lock, RLock, local
+from time import time, sleep, monotonic, perf_counter
+from concurrent.futures import ThreadPoolExecutor, wait
+_T_IMPORT = perf_counter()
 
-import pandas as pd
+# pandas, python-binance ve APScheduler ilk kullanıldıkları yerde import
+# edilir (soğuk başlangıç / /health hızı için; bkz. STARTUP_BUDGET)
+import numpy as np
 import requests
-from flask import Flask, jsonify
-from apscheduler.schedulers.background import BackgroundScheduler
+from flask import Flask, Response, jsonify, request
 from dotenv import load_dotenv
-from binance.client import Client
+
+import metrics
+from sse import SignalHub
+from ohlcv import OHLCV
+from resample import (NATIVE_MS, Resampler, tf_ms, label as resample_label, floor as tf_floor,
+                      plan as resample_plan, resample, source_interval)
 
 # ============== ENV & LOG ==============
 load_dotenv()
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "60"))
+DATA_SOURCE = os.getenv("DATA_SOURCE", "rest").strip().lower()   # rest | ws
+EVAL_MODE = os.getenv("EVAL_MODE", "batch").strip().lower()      # batch | incremental | vector
+EVAL_BACKEND = os.getenv("EVAL_BACKEND", "thread").strip().lower()  # thread | process (bkz. eval_pool.py)
+SCHEDULE_MODE = os.getenv("SCHEDULE_MODE", "bar_close").strip().lower()  # bar_close | interval
+BAR_CLOSE_GRACE = float(os.getenv("BAR_CLOSE_GRACE", "2"))     # bar kapanışından sonra bekleme (sn)
+MAX_WORKERS = int(os.getenv("MAX_WORKERS", "16"))               # eşzamanlı parite kontrolü
+WEIGHT_LIMIT = int(os.getenv("BINANCE_WEIGHT_LIMIT", "6000"))   # dakikalık request weight limiti
+WEIGHT_BUDGET = float(os.getenv("WEIGHT_BUDGET", "0.8"))        # limitin kullanılacak oranı
+CYCLE_DEADLINE = float(os.getenv("CYCLE_DEADLINE", str(CHECK_INTERVAL * 0.9)))  # sn
 
 logging.basicConfig(
     level=logging.INFO,
@@ -25,7 +44,7 @@ logging.basicConfig(
 logger = logging.getLogger("wunderbot")
 
 # ============== WT CLIENT ==============
-WT_URL = "https://wtalerts.com/bot/custom"
+WT_URL = os.getenv("WT_URL") or "https://wtalerts.com/bot/custom"
 
 def send_wt(code: str, extra=None):
     """Sadece code gönder. Miktar/lev WT tarafında ayarlı."""
@@ -35,7 +54,8 @@ def send_wt(code: str, extra=None):
         payload.update(extra)
     try:
         logger.info(f"📤 WT'ye gönderiliyor: {code}")
-        r = requests.post(WT_URL, json=payload, timeout=10)
+        with STAGE_SECONDS.time(stage="send"):
+            r = requests.post(WT_URL, json=payload, timeout=10)
         body = r.text if hasattr(r, "text") else "<no text>"
         logger.info(f"✅ WT yanıtı [HTTP {r.status_code}]: {body}")
         r.raise_for_status()
@@ -67,186 +87,447 @@ def _as_float(v, default=0.0):
     except Exception:
         return default
 
+# ============== METRICS ==============
+# Prometheus text formatı /metrics'ten okunur (bkz. metrics.py). Kayıt bir
+# kilit + birkaç toplama, her zaman açık. Parite başına histogramlar çok
+# parite varsa METRICS_PER_PAIR=false ile kapatılabilir.
+METRICS_PER_PAIR = _as_bool(os.getenv("METRICS_PER_PAIR"), True)
+
+STAGE_SECONDS = metrics.Histogram(
+    "wunderbot_stage_seconds", "Aşama süresi (config, binance, klines, eval, alert, send)", ["stage"])
+PAIR_SECONDS = metrics.Histogram(
+    "wunderbot_pair_stage_seconds", "Parite başına aşama süresi (klines, eval, total)", ["pair", "stage"])
+STRATEGY_SECONDS = metrics.Histogram(
+    "wunderbot_strategy_eval_seconds", "Strateji değerlendirme süresi", ["strategy"])
+CYCLE_SECONDS = metrics.Histogram(
+    "wunderbot_cycle_seconds", "Kontrol turu süresi", ["job"], buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300))
+QUEUE_WAIT_SECONDS = metrics.Histogram(
+    "wunderbot_queue_wait_seconds", "Paritenin worker kuyruğunda bekleme süresi")
+API_REQUESTS = metrics.Counter(
+    "wunderbot_binance_requests_total", "Binance klines istekleri", ["status"])
+API_WEIGHT = metrics.Counter(
+    "wunderbot_binance_weight_total", "Harcanan request weight (tahmini)")
+ALERTS_SENT = metrics.Counter(
+    "wunderbot_alerts_total", "Gönderilen (kuyruğa alınan) alert'ler", ["signal"])
+FAILURES = metrics.Counter(
+    "wunderbot_failures_total", "Aşama bazında hatalar", ["stage"])
+SKIPPED = metrics.Counter(
+    "wunderbot_skipped_total", "Atlanan iş / tur (weight, late, cancelled, max_instances, missed)", ["reason"])
+OVERRUNS = metrics.Counter(
+    "wunderbot_cycle_overruns_total", "Tur süresini (deadline) aşan turlar", ["job"])
+CYCLE_CACHE = metrics.Counter(
+    "wunderbot_cycle_cache_total", "Tur cache'i: veri çekim/tekrar, indikatör ve sonuç hesap/tekrar", ["kind"])
+
+def _observe_pair(pair_key, stage, seconds):
+    if METRICS_PER_PAIR:
+        PAIR_SECONDS.observe(seconds, pair=pair_key, stage=stage)
+
+def _runtime_metrics():
+    """Scrape anında okunan anlık değerler."""
+    out = [
+        ("wunderbot_binance_weight_used_1m", "gauge", "Borsanın bildirdiği son 1 dk weight kullanımı",
+         [({}, weight_limiter.used_1m)]),
+        ("wunderbot_binance_weight_tokens", "gauge", "Rate limiter kovasında kalan weight",
+         [({}, round(weight_limiter.tokens, 3))]),
+        ("wunderbot_positions", "gauge", "Takip edilen pozisyon sayısı", [({}, len(pos_state))]),
+        ("wunderbot_pairs", "gauge", "Aktif parite sayısı", [({}, len(config_service.pairs))]),
+        ("wunderbot_result_memo", "gauge", "Strateji sonuç memo'su: kayıt sayısı", [({}, len(result_memo))]),
+        ("wunderbot_result_memo_total", "counter", "Strateji sonuç memo'su: isabet / ıska",
+         [({"result": "hit"}, result_memo.hits), ({"result": "miss"}, result_memo.misses)]),
+    ]
+    last = bot_state.get("last_cycle")
+    if last:
+        out.append(("wunderbot_last_cycle_seconds", "gauge", "Son turun süresi", [({}, last["duration"])]))
+    if any(resampler.stats.values()):
+        out.append(("wunderbot_resample_total", "counter", "Resample: geçmiş yükleme, taban besleme, borsa kontrolü, uyuşmayan bar",
+                    [({"kind": k}, v) for k, v in resampler.stats.items()]))
+    if _evaluator is not None:
+        out.append(("wunderbot_eval_pool_total", "counter", "Process havuzuna giden değerlendirmeler / yeniden kurulum",
+                    [({"kind": k}, v) for k, v in _evaluator.stats.items()]))
+    if signal_hub.stats["published"] or signal_hub.clients:
+        out.append(("wunderbot_sse_clients", "gauge", "Bağlı /signals izleyicisi", [({}, signal_hub.clients)]))
+        out.append(("wunderbot_sse_events_total", "counter", "SSE: yayınlanan / yavaş izleyicide düşen olay, reddedilen bağlantı",
+                    [({"kind": k}, v) for k, v in signal_hub.stats.items()]))
+    if shard is not None:
+        snap = shard.snapshot()
+        out.append(("wunderbot_shard_pairs", "gauge", "Bu instance'taki / lease bekleyen pariteler",
+                    [({"state": "owned"}, snap["owned"]), ({"state": "pending"}, snap["pending"])]))
+        out.append(("wunderbot_shard_members", "gauge", "Canlı worker sayısı", [({}, len(snap["members"]))]))
+        out.append(("wunderbot_shard_total", "counter", "Shard: alınan / bırakılan / kaybedilen lease, engellenen alert",
+                    [({"kind": k}, snap[k]) for k in ("acquired", "released", "lost", "fenced", "errors")]))
+    if _dispatcher is not None:
+        snap = _dispatcher.snapshot()
+        out.append(("wunderbot_wt_pending", "gauge", "WT kuyruğunda bekleyen alert", [({}, snap.pop("pending"))]))
+        out.append(("wunderbot_wt_dispatch_total", "counter", "WT dispatcher sayaçları",
+                    [({"kind": k}, v) for k, v in snap.items()]))
+    return out
+
+metrics.register_collector(_runtime_metrics)
+
+# ============== WT DISPATCH ==============
+WT_ASYNC = _as_bool(os.getenv("WT_ASYNC"), True)          # kuyruk + arka plan gönderim
+WT_SENDERS = _as_int(os.getenv("WT_SENDERS"), 4)
+WT_MAX_RETRIES = _as_int(os.getenv("WT_MAX_RETRIES"), 6)
+OUTBOX_PATH = os.getenv("OUTBOX_PATH") or str(pathlib.Path(__file__).parent / "outbox.jsonl")
+OUTBOX_MAX_AGE = _as_float(os.getenv("OUTBOX_MAX_AGE"), 300.0)   # sn; yeniden başlamada daha eski alert gönderilmez, 0: sınırsız
+
+_dispatcher = None
+_dispatcher_lock = Lock()
+
+def get_dispatcher():
+    """Alert dispatcher'ı ilk kullanımda kur ve outbox'taki bekleyenlerle başlat."""
+    global _dispatcher
+    with _dispatcher_lock:
+        if _dispatcher is None:
+            from wt_dispatch import AlertDispatcher
+            _dispatcher = AlertDispatcher(
+                WT_URL, outbox_path=OUTBOX_PATH, senders=WT_SENDERS, max_retries=WT_MAX_RETRIES,
+                max_age=OUTBOX_MAX_AGE or None,
+            )
+            _dispatcher.on_post = lambda sec, status: STAGE_SECONDS.observe(sec, stage="send")
+            _dispatcher.on_dead = _on_dead_alert
+            _dispatcher.can_send = _alert_owned
+            _dispatcher.start()
+        return _dispatcher
+
+def _alert_owned(alert):
+    """Kuyruktaki / retry bekleyen alert her denemeden önce: lease hâlâ bizde mi."""
+    meta = alert.get("meta") or {}
+    pair_key = meta.get("pair")
+    if not pair_key or owns(pair_key):
+        return True
+    if shard is not None:
+        shard.stats["fenced"] += 1
+    logger.warning(f"⚠️  {pair_key} artık bu instance'ta değil, kuyruktaki {meta.get('signal')} yollanmadı")
+    return False
+
+def _on_dead_alert(alert):
+    """
+    Teslim edilemeyen (dead) alert: WT pozisyonu açmadı / kapatmadı, durumu
+    alert öncesine döndür. Bu arada aynı pariteye yeni bir alert yazıldıysa
+    (durum artık bu alert'in değil) ya da parite başka instance'a geçtiyse
+    (durum artık onda) dokunulmaz.
+    """
+    meta = alert.get("meta") or {}
+    pair_key, prev = meta.get("pair"), meta.get("prev")
+    if not pair_key or prev is None or not owns(pair_key):
+        return
+    with _pos_lock:
+        st = pos_state.get(pair_key)
+        if st is None or st.get("last_sig") != meta.get("signal") or st.get("ts") != meta.get("ts"):
+            return
+        pos_state[pair_key] = dict(prev)
+        _persist(pair_key)
+    logger.warning(f"↩️  {pair_key}: {meta.get('signal')} teslim edilemedi, durum {prev.get('pos')} olarak geri alındı")
+
+def emit_alert(pair_key, signal, code, allowed=None):
+    """
+    Pozisyon koşulu (allowed) + cooldown kontrolü ve durum güncellemesi tek
+    kilit altında yapılır, iki thread aynı sinyali iki kez yollayamaz.
+    WT_ASYNC açıkken alert outbox'a yazılıp kuyruğa alınır (teslimat
+    retry'larla garanti), analiz thread'i webhook'u beklemez; alert dead
+    olursa durum _on_dead_alert ile geri alınır. Senkron gönderim hata
+    verirse durum hemen geri alınır.
+    """
+    if not owns(pair_key):
+        # Lease tur sırasında başka instance'a geçti
+        if shard is not None:
+            shard.stats["fenced"] += 1
+        logger.warning(f"⚠️  {pair_key} artık bu instance'ta değil, {signal} yollanmadı")
+        return False
+    with _pos_lock:
+        st = pos_state.setdefault(pair_key, {"pos":"NONE","last_sig":None,"ts":0})
+        if (allowed and not allowed(st["pos"])) or not can_send(pair_key, signal):
+            return False
+        prev = dict(st)
+        update_after_send(pair_key, signal)
+        ts = pos_state[pair_key]["ts"]
+    try:
+        with STAGE_SECONDS.time(stage="alert"):
+            if WT_ASYNC:
+                # prev / ts: teslim edilemezse (dead) durum geri alınır
+                get_dispatcher().submit(code, meta={"pair": pair_key, "signal": signal, "prev": prev, "ts": ts})
+            else:
+                send_wt(code)
+    except Exception:
+        FAILURES.inc(stage="alert")
+        with _pos_lock:
+            pos_state[pair_key] = prev
+            _persist(pair_key)
+        raise
+    ALERTS_SENT.inc(signal=signal)
+    signal_hub.publish("alert", {"pair": pair_key, "signal": signal, "code": code})
+    return True
+
 # ============== CONFIG LOADER ==============
 BASE = pathlib.Path(__file__).parent
+CONFIG_TTL = float(os.getenv("CONFIG_TTL", "30"))   # sn; bu süre içinde kaynağa hiç bakılmaz
+
+def _pair_from_row(row):
+    """Sheet satırı → pair dict (enabled değilse None)."""
+    symbol = (row.get("symbol") or "").strip().upper()
+    if not symbol:
+        return None
+    if not _as_bool(row.get("enabled"), False):
+        return None
+
+    timeframe = (row.get("timeframe") or "15m").strip()
+    
+    # Başlangıç pozisyonu (yeni sütun)
+    initial_pos = (row.get("initial_position") or "NONE").strip().upper()
+    if initial_pos not in ["LONG", "SHORT", "NONE"]:
+        initial_pos = "NONE"
+
+    strategy = {
+        "type": (row.get("strategy.type") or "tmh").strip().lower(),
+        # TMH / hibrit alanları
+        "ema_fast":              _as_int(row.get("ema_fast"), 12),
+        "ema_slow":              _as_int(row.get("ema_slow"), 26),
+        "supertrend_period":     _as_int(row.get("supertrend_period"), 10),
+        "supertrend_multiplier": _as_float(row.get("supertrend_multiplier"), 2.0),
+        "wt_channel":            _as_int(row.get("wt_channel"), 9),
+        "wt_average":            _as_int(row.get("wt_average"), 12),
+        "wt_overbought":         _as_float(row.get("wt_overbought"), 60.0),
+        "wt_oversold":           _as_float(row.get("wt_oversold"), -60.0),
+        # SSL
+        "ssl_period":            _as_int(row.get("ssl_period"), 10),
+        # WT_CROSS
+        "n1":                    _as_int(row.get("n1"), 10),
+        "n2":                    _as_int(row.get("n2"), 21),
+        "obLevel2":              _as_float(row.get("obLevel2"), 53.0),
+        "osLevel2":              _as_float(row.get("osLevel2"), -53.0),
+        "mode":                 (row.get("mode") or "").strip() or None,
+        "enter_exit":            _as_bool(row.get("enter_exit"), False),
+        # Genel
+        "confirmation_mode":    (row.get("confirmation_mode") or None),
+        "signal_on_close":       _as_bool(row.get("signal_on_close"), True),
+    }
+
+    alerts = {
+        "enter_long":  (row.get("alerts.enter_long")  or "").strip() or None,
+        "exit_long":   (row.get("alerts.exit_long")   or "").strip() or None,
+        "enter_short": (row.get("alerts.enter_short") or "").strip() or None,
+        "exit_short":  (row.get("alerts.exit_short")  or "").strip() or None,
+        "exit_all":    (row.get("alerts.exit_all")    or "").strip() or None,
+    }
+
+    return {
+        "symbol":           symbol,
+        "timeframe":        timeframe,
+        "enabled":          True,
+        "initial_position": initial_pos,  # ← YENİ ALAN
+        "strategy":         strategy,
+        "alerts":           alerts,
+    }
+
+def _parse_sheet(text):
+    pairs = []
+    row_count = 0
+    for row in csv.DictReader(text.splitlines()):
+        row_count += 1
+        p = _pair_from_row(row)
+        if p:
+            pairs.append(p)
+    logger.info(f"✅ Google Sheets: {row_count} satır okundu, {len(pairs)} parite aktif")
+    return pairs
+
+def _read_json_configs(json_files):
+    pairs = []
+    if json_files:
+        logger.info(f"📂 configs/ dizininden {len(json_files)} JSON dosyası okunuyor...")
+    for pth in json_files:
+        try:
+            with open(pth, "r", encoding="utf-8") as f:
+                obj = json.load(f)
+            if obj.get("enabled", True):
+                # JSON'da initial_position yoksa NONE varsayılan
+                if "initial_position" not in obj:
+                    obj["initial_position"] = "NONE"
+                pairs.append(obj)
+        except Exception as e:
+            logger.error(f"[config] {pth} okunamadı: {e}")
+    return pairs
+
+def _read_legacy(legacy):
+    pairs = []
+    try:
+        logger.info("📄 Legacy pairs.json dosyası okunuyor...")
+        with open(legacy, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for p in data.get("pairs", []):
+            if p.get("enabled", True):
+                if "initial_position" not in p:
+                    p["initial_position"] = "NONE"
+                pairs.append(p)
+    except Exception as e:
+        logger.error(f"[pairs.json] okunamadı: {e}")
+    return pairs
+
+def diff_pairs(old, new):
+    """key_of(pair) bazında {added, removed, changed} anahtar kümeleri."""
+    def group(pairs):
+        g = {}
+        for p in pairs:
+            g.setdefault(key_of(p), []).append(json.dumps(p, sort_keys=True, default=str))
+        return g
+    a, b = group(old), group(new)
+    return {
+        "added":   sorted(b.keys() - a.keys()),
+        "removed": sorted(a.keys() - b.keys()),
+        "changed": sorted(k for k in a.keys() & b.keys() if a[k] != b[k]),
+    }
 
-def load_pairs():
+class ConfigService:
     """
+    Parite listesini cache'ler. CONFIG_TTL dolmadan kaynağa gidilmez; dolunca
+    Sheets için ETag / If-Modified-Since (ve içerik hash'i), dosyalar için
+    mtime ile değişiklik kontrol edilir. Değişiklik olursa abonelere diff
+    yayınlanır: {"added": [...], "removed": [...], "changed": [...]}.
+
     Öncelik: Google Sheets (SHEET_URL)
     Sonra  : configs/*.json
     En son : legacy pairs.json
     """
-    pairs = []
 
-    # 1) Google Sheets (CSV) — yeni arayüz
-    sheet_url = os.getenv("SHEET_URL")
-    if sheet_url:
-        try:
-            logger.info(f"📥 Google Sheets'den config çekiliyor: {sheet_url[:60]}...")
-            resp = requests.get(sheet_url, timeout=10)
-            resp.raise_for_status()
-            reader = csv.DictReader(resp.text.splitlines())
+    def __init__(self, ttl=CONFIG_TTL):
+        self.ttl = ttl
+        self.pairs = []
+        self.source = None
+        self.version = 0
+        self.checked = None
+        self._sheet = {"etag": None, "modified": None, "hash": None}
+        self._files_sig = None
+        self._listeners = []
+        self._lock = Lock()
 
-            row_count = 0
-            enabled_count = 0
-            
-            for row in reader:
-                row_count += 1
-                symbol = (row.get("symbol") or "").strip().upper()
-                if not symbol:
-                    continue
-                if not _as_bool(row.get("enabled"), False):
-                    continue
+    def subscribe(self, fn):
+        self._listeners.append(fn)
 
-                enabled_count += 1
-                timeframe = (row.get("timeframe") or "15m").strip()
-                
-                # Başlangıç pozisyonu (yeni sütun)
-                initial_pos = (row.get("initial_position") or "NONE").strip().upper()
-                if initial_pos not in ["LONG", "SHORT", "NONE"]:
-                    initial_pos = "NONE"
-
-                strategy = {
-                    "type": (row.get("strategy.type") or "tmh").strip().lower(),
-                    # TMH / hibrit alanları
-                    "ema_fast":              _as_int(row.get("ema_fast"), 12),
-                    "ema_slow":              _as_int(row.get("ema_slow"), 26),
-                    "supertrend_period":     _as_int(row.get("supertrend_period"), 10),
-                    "supertrend_multiplier": _as_float(row.get("supertrend_multiplier"), 2.0),
-                    "wt_channel":            _as_int(row.get("wt_channel"), 9),
-                    "wt_average":            _as_int(row.get("wt_average"), 12),
-                    "wt_overbought":         _as_float(row.get("wt_overbought"), 60.0),
-                    "wt_oversold":           _as_float(row.get("wt_oversold"), -60.0),
-                    # SSL
-                    "ssl_period":            _as_int(row.get("ssl_period"), 10),
-                    # WT_CROSS
-                    "n1":                    _as_int(row.get("n1"), 10),
-                    "n2":                    _as_int(row.get("n2"), 21),
-                    "obLevel2":              _as_float(row.get("obLevel2"), 53.0),
-                    "osLevel2":              _as_float(row.get("osLevel2"), -53.0),
-                    "mode":                 (row.get("mode") or "").strip() or None,
-                    "enter_exit":            _as_bool(row.get("enter_exit"), False),
-                    # Genel
-                    "confirmation_mode":    (row.get("confirmation_mode") or None),
-                    "signal_on_close":       _as_bool(row.get("signal_on_close"), True),
-                }
+    def get(self, force=False):
+        with self._lock:
+            if not force and self.checked is not None and monotonic() - self.checked < self.ttl:
+                return self.pairs
+            with STAGE_SECONDS.time(stage="config"):
+                new, source = self._load()
+            self.checked = monotonic()
+            if new is None:
+                return self.pairs       # değişiklik yok
+            old, first = self.pairs, self.source is None
+            diff = diff_pairs(old, new)
+            self.pairs, self.source = new, source
+            self.version += 1
 
-                alerts = {
-                    "enter_long":  (row.get("alerts.enter_long")  or "").strip() or None,
-                    "exit_long":   (row.get("alerts.exit_long")   or "").strip() or None,
-                    "enter_short": (row.get("alerts.enter_short") or "").strip() or None,
-                    "exit_short":  (row.get("alerts.exit_short")  or "").strip() or None,
-                    "exit_all":    (row.get("alerts.exit_all")    or "").strip() or None,
-                }
+        if not first and any(diff.values()):
+            logger.info(
+                f"🔁 Config değişti ({source}): +{len(diff['added'])} "
+                f"-{len(diff['removed'])} ~{len(diff['changed'])}"
+            )
+            for fn in self._listeners:
+                try:
+                    fn(diff, new)
+                except Exception as e:
+                    logger.error(f"❌ Config dinleyici hatası: {e}")
+        return new
 
-                pairs.append({
-                    "symbol":           symbol,
-                    "timeframe":        timeframe,
-                    "enabled":          True,
-                    "initial_position": initial_pos,  # ← YENİ ALAN
-                    "strategy":         strategy,
-                    "alerts":           alerts,
-                })
+    def _load(self):
+        """(pairs, kaynak) ya da değişiklik yoksa (None, None)."""
+        # 1) Google Sheets (CSV) — yeni arayüz
+        sheet_url = os.getenv("SHEET_URL")
+        if sheet_url:
+            try:
+                headers = {}
+                if self.source == "sheet":
+                    if self._sheet["etag"]:
+                        headers["If-None-Match"] = self._sheet["etag"]
+                    if self._sheet["modified"]:
+                        headers["If-Modified-Since"] = self._sheet["modified"]
+                resp = requests.get(sheet_url, headers=headers, timeout=10)
+                if resp.status_code == 304 and self.source == "sheet":
+                    return None, None
+                resp.raise_for_status()
+                digest = hashlib.sha1(resp.content).hexdigest()
+                self._sheet["etag"] = resp.headers.get("ETag")
+                self._sheet["modified"] = resp.headers.get("Last-Modified")
+                if digest == self._sheet["hash"] and self.source == "sheet":
+                    return None, None
 
-            logger.info(f"✅ Google Sheets: {row_count} satır okundu, {enabled_count} parite aktif")
-            
-            if pairs:
-                return pairs
-            else:
+                logger.info(f"📥 Google Sheets'den config çekiliyor: {sheet_url[:60]}...")
+                pairs = _parse_sheet(resp.text)
+                if pairs:
+                    self._sheet["hash"] = digest
+                    return pairs, "sheet"
                 logger.warning("⚠️  Google Sheets boş veya hiç 'enabled=TRUE' satır yok. configs/ → pairs.json'a düşüyorum.")
 
-        except Exception as e:
-            logger.error(f"❌ Google Sheets okuma hatası: {e}")
-            logger.warning("⚠️  configs/ dizinine düşülüyor...")
-
-    # 2) configs/*.json — mevcut sistem
-    cfg_dir = BASE / "configs"
-    if cfg_dir.exists():
-        json_files = sorted(glob.glob(str(cfg_dir / "*.json")))
-        if json_files:
-            logger.info(f"📂 configs/ dizininden {len(json_files)} JSON dosyası okunuyor...")
-        for pth in json_files:
-            try:
-                with open(pth, "r", encoding="utf-8") as f:
-                    obj = json.load(f)
-                if obj.get("enabled", True):
-                    # JSON'da initial_position yoksa NONE varsayılan
-                    if "initial_position" not in obj:
-                        obj["initial_position"] = "NONE"
-                    pairs.append(obj)
             except Exception as e:
-                logger.error(f"[config] {pth} okunamadı: {e}")
-    if pairs:
-        return pairs
+                FAILURES.inc(stage="config")
+                logger.error(f"❌ Google Sheets okuma hatası: {e}")
+                if self.source == "sheet":
+                    logger.warning("⚠️  Son başarılı Sheets config'i ile devam ediliyor")
+                    return None, None
+                logger.warning("⚠️  configs/ dizinine düşülüyor...")
 
-    # 3) legacy pairs.json — en son fallback
-    legacy = BASE / "pairs.json"
-    if legacy.exists():
-        try:
-            logger.info("📄 Legacy pairs.json dosyası okunuyor...")
-            with open(legacy, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            for p in data.get("pairs", []):
-                if p.get("enabled", True):
-                    if "initial_position" not in p:
-                        p["initial_position"] = "NONE"
-                    pairs.append(p)
-            return pairs
-        except Exception as e:
-            logger.error(f"[pairs.json] okunamadı: {e}")
+        # 2) configs/*.json — mevcut sistem, 3) legacy pairs.json
+        cfg_dir = BASE / "configs"
+        json_files = sorted(glob.glob(str(cfg_dir / "*.json"))) if cfg_dir.exists() else []
+        legacy = BASE / "pairs.json"
+        sig = tuple((f, os.path.getmtime(f)) for f in json_files)
+        sig += (("pairs.json", os.path.getmtime(legacy)),) if legacy.exists() else ()
+        if sig == self._files_sig and self.source in ("configs", "legacy", "none"):
+            return None, None
+        self._files_sig = sig
 
-    return pairs
+        pairs = _read_json_configs(json_files)
+        if pairs:
+            return pairs, "configs"
+        if legacy.exists():
+            return _read_legacy(legacy), "legacy"
+        return [], "none"
+
+config_service = ConfigService()
+
+def load_pairs(force=False):
+    """Cache'li parite listesi (bkz. ConfigService)."""
+    return config_service.get(force)
 
 # ============== STRATEGY DISPATCHER ==============
 try:
-    from strategies import run as run_strategy
+    from strategies import run as run_strategy, run_batch, min_bars as strategy_min_bars
+except Exception:
+    run_strategy = run_batch = strategy_min_bars = None
+
+try:
+    from strategies import indicators as ind
 except Exception:
-    run_strategy = None
+    ind = None
 
-def analyze_dispatch(df: pd.DataFrame, config: dict):
+def analyze_dispatch(df, config: dict):
     """config['type']'a göre ilgili stratejiyi çağırır."""
     stype = (config.get("type") or "tmh").lower()
 
     if run_strategy:
         return run_strategy(stype, df, config)
 
-    # ---- FALLBACK (strategies klasörü yoksa) ----
-    def ema(s, n): return s.ewm(span=n, adjust=False).mean()
-
-    def atr(df_, n=14):
-        h, l, c = df_["high"], df_["low"], df_["close"]
-        tr = pd.concat([(h-l), (h-c.shift()).abs(), (l-c.shift()).abs()], axis=1).max(axis=1)
-        return tr.rolling(window=n).mean()
-
-    def supertrend(df_, period=10, mult=2.0):
-        hl2 = (df_["high"] + df_["low"]) / 2
-        atrv = atr(df_, period)
-        up = hl2 + mult*atrv
-        dn = hl2 - mult*atrv
-        st = pd.Series(index=df_.index, dtype=float)
-        dirn = pd.Series(index=df_.index, dtype=int)
-        st.iloc[0] = up.iloc[0]; dirn.iloc[0] = 1
-        for i in range(1, len(df_)):
-            if pd.isna(atrv.iloc[i]):
-                st.iloc[i] = st.iloc[i-1]; dirn.iloc[i] = dirn.iloc[i-1]; continue
-            if df_["close"].iloc[i] <= up.iloc[i]:
-                st.iloc[i] = up.iloc[i]; dirn.iloc[i] = -1
-            else:
-                st.iloc[i] = dn.iloc[i]; dirn.iloc[i] = 1
-        return st, dirn
+    # ---- FALLBACK (strategies.run yüklenemezse) ----
+    if ind is None:
+        logger.warning("⚠️  strategies paketi yok, HOLD dönülüyor")
+        return {"signal":"HOLD", "price": float(df["close"][-1]) if len(df) else 0}
 
     if len(df) < 50:
-        return {"signal":"HOLD", "price": float(df["close"].iloc[-1]) if len(df) else 0}
+        return {"signal":"HOLD", "price": float(df["close"][-1]) if len(df) else 0}
 
-    ema_f = ema(df["close"], int(config.get("ema_fast", 12)))
-    ema_s = ema(df["close"], int(config.get("ema_slow", 26)))
-    _, st_dir = supertrend(df, int(config.get("supertrend_period", 10)), float(config.get("supertrend_multiplier", 2.0)))
+    h, l, c = ind.as_f64(df["high"]), ind.as_f64(df["low"]), ind.as_f64(df["close"])
+    n_f, n_s = int(config.get("ema_fast", 12)), int(config.get("ema_slow", 26))
+    st_per, st_mult = int(config.get("supertrend_period", 10)), float(config.get("supertrend_multiplier", 2.0))
+    ema_f = ind.cached("ema", ("close", n_f), lambda: ind.ema(c, n_f))
+    ema_s = ind.cached("ema", ("close", n_s), lambda: ind.ema(c, n_s))
+    atrv  = ind.cached("atr", (st_per,), lambda: ind.atr(h, l, c, st_per))
+    _, st_dir = ind.cached("supertrend", (st_per, st_mult), lambda: ind.supertrend(h, l, c, st_per, st_mult, atrv=atrv))
 
-    close = float(df["close"].iloc[-1])
-    emaBull = (ema_f.iloc[-1] > ema_s.iloc[-1]) and (close > ema_f.iloc[-1])
-    emaBear = (ema_f.iloc[-1] < ema_s.iloc[-1]) and (close < ema_f.iloc[-1])
-    stBull  = st_dir.iloc[-1] == 1
-    stBear  = st_dir.iloc[-1] == -1
+    close = float(c[-1])
+    emaBull = bool((ema_f[-1] > ema_s[-1]) and (close > ema_f[-1]))
+    emaBear = bool((ema_f[-1] < ema_s[-1]) and (close < ema_f[-1]))
+    stBull  = bool(st_dir[-1] == 1)
+    stBear  = bool(st_dir[-1] == -1)
 
     bull = sum([emaBull, stBull])
     bear = sum([emaBear, stBear])
@@ -257,52 +538,709 @@ def analyze_dispatch(df: pd.DataFrame, config: dict):
     if bull >= 1: return {"signal":"EXIT-SHORT","price": close}
     return {"signal":"HOLD", "price": close}
 
+# Strateji hesabını process havuzunda yap (EVAL_BACKEND=process): veri çekimi
+# thread'lerde kalır, indikatörler GIL'e takılmadan çekirdeklere dağılır.
+EVAL_PROCS = _as_int(os.getenv("EVAL_PROCS"), 0)      # 0: CPU sayısı
+_evaluator = None
+_evaluator_lock = Lock()
+
+def get_evaluator():
+    """Process havuzunu ilk kullanımda kur (warm_start bunu ilk turdan önce çağırır)."""
+    global _evaluator
+    with _evaluator_lock:
+        if _evaluator is None:
+            from eval_pool import ProcessEvaluator
+            _evaluator = ProcessEvaluator(workers=EVAL_PROCS or None).start()
+        return _evaluator
+
+def evaluate(df, config):
+    """analyze_dispatch; EVAL_BACKEND=process ise worker process'te."""
+    if EVAL_BACKEND == "process" and run_strategy:
+        return get_evaluator().analyze((config.get("type") or "tmh").lower(), df, config)
+    return analyze_dispatch(df, config)
+
+def bars_needed(pair):
+    """
+    Parite için çekilecek bar: stratejinin bildirdiği warm-up (lookback) +
+    signal_on_close ise oluşan mum. strategies yüklenemezse eski sabit 200.
+    """
+    config = pair.get("strategy", {}) or {}
+    if strategy_min_bars is None:
+        return 200
+    need = strategy_min_bars((config.get("type") or "tmh").lower(), config)
+    if config.get("signal_on_close", True):
+        need += 1
+    return min(need, KLINE_FETCH_MAX)
+
+# ============== RATE LIMIT ==============
+class WeightLimiter:
+    """
+    Binance request weight için token bucket. Kapasite dakikalık bütçe,
+    saniyede bütçe/60 dolar. Yanıttaki X-MBX-USED-WEIGHT-1M başlığı
+    tahminimizden yüksekse kova o kadar boşaltılır (başka süreçler de aynı
+    IP'den çekiyor olabilir). 429/418 gelirse Retry-After süresince durur.
+    """
+
+    def __init__(self, limit=WEIGHT_LIMIT, budget=WEIGHT_BUDGET):
+        self.capacity = max(1.0, limit * budget)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = monotonic()
+        self.paused_until = 0.0
+        self.used_1m = 0
+        self._lock = Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, weight=1, deadline=None):
+        """Weight kadar token al; deadline'a (monotonic) kadar yetişmezse False."""
+        while True:
+            with self._lock:
+                now = monotonic()
+                self._refill(now)
+                if now >= self.paused_until and self.tokens >= weight:
+                    self.tokens -= weight
+                    return True
+                wait_s = max(self.paused_until - now, (weight - self.tokens) / self.rate, 0.01)
+            if deadline is not None and monotonic() + wait_s > deadline:
+                return False
+            sleep(min(wait_s, 1.0))
+
+    def observe(self, used_1m):
+        """Borsanın bildirdiği son 1 dakikalık kullanım."""
+        with self._lock:
+            self.used_1m = used_1m
+            self._refill(monotonic())
+            self.tokens = min(self.tokens, self.capacity - used_1m)
+
+    def pause(self, seconds):
+        with self._lock:
+            self.paused_until = max(self.paused_until, monotonic() + seconds)
+        logger.warning(f"🚦 Binance rate limit: {seconds:.0f}s bekleniyor")
+
+weight_limiter = WeightLimiter()
+# /api/v3/klines weight'i limit'e bağlı: (limit üst sınırı (hariç), weight)
+KLINE_WEIGHTS = ((100, 1), (500, 2), (1001, 5))
+
+def kline_weight(limit):
+    for top, w in KLINE_WEIGHTS:
+        if limit < top:
+            return w
+    return 10
+_worker = local()     # worker thread'in tur deadline'ı (monotonic)
+
 # ============== DATA ==============
-binance_client = Client()
+class BinanceSource:
+    """
+    Binance REST kaynağı. python-binance Client'ı ilk istekte kurulur:
+    import (~0.6s) ve ping modül yüklenirken yapılmaz, ağ olmadan import
+    edilebilir. Sonrasında aynı client'ın Session'ı (keep-alive) kullanılır.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._lock = Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from binance.client import Client
+                    try:
+                        self._client = Client(ping=False)
+                    except TypeError:   # ping parametresi olmayan eski python-binance
+                        self._client = Client()
+        return self._client
+
+    @property
+    def ready(self):
+        return self._client is not None
 
-def get_klines(symbol, timeframe, limit=200):
+    @property
+    def response(self):
+        """Son isteğin HTTP yanıtı (weight başlıkları için)."""
+        return getattr(self._client, "response", None)
+
+    def get_klines(self, **params):
+        return self.client.get_klines(**params)
+
+binance_client = BinanceSource()
+
+def _api_klines(**params):
+    """binance_client.get_klines + weight kontrolü; deadline'a yetişmezse None."""
+    weight = kline_weight(params.get("limit", 500))
+    if not weight_limiter.acquire(weight, getattr(_worker, "deadline", None)):
+        logger.warning(f"⏱️  {params.get('symbol')}: weight bütçesi tur süresine yetişmedi, atlandı")
+        SKIPPED.inc(reason="weight")
+        return None
+    API_WEIGHT.inc(weight)
+    t0 = perf_counter()
     try:
-        interval = {
-            "1m":"1m","5m":"5m","15m":"15m","30m":"30m",
-            "1h":"1h","4h":"4h","1d":"1d"
-        }.get(timeframe, "15m")
-        ks = binance_client.get_klines(symbol=symbol, interval=interval, limit=limit)
-        df = pd.DataFrame(ks, columns=[
-            "timestamp","open","high","low","close","volume",
-            "close_time","quote_volume","trades","taker_buy_base",
-            "taker_buy_quote","ignore"
-        ])
-        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="ms")
-        for c in ["open","high","low","close","volume"]:
-            df[c] = df[c].astype(float)
-        return df[["timestamp","open","high","low","close","volume"]].set_index("timestamp")
+        ks = binance_client.get_klines(**params)
     except Exception as e:
+        status = getattr(e, "status_code", None)
+        API_REQUESTS.inc(status=str(status or "error"))
+        STAGE_SECONDS.observe(perf_counter() - t0, stage="binance")
+        if status in (418, 429):
+            resp = getattr(e, "response", None)
+            retry = _as_float(resp.headers.get("Retry-After") if resp is not None else None, 60.0)
+            weight_limiter.pause(retry)
+        raise
+    STAGE_SECONDS.observe(perf_counter() - t0, stage="binance")
+    API_REQUESTS.inc(status="200")
+    resp = getattr(binance_client, "response", None)
+    if resp is not None:
+        used = resp.headers.get("x-mbx-used-weight-1m")
+        if used is not None:
+            weight_limiter.observe(_as_int(used))
+    return ks
+
+# Bar cache: her (symbol, interval) için geçmişi bellekte tut, sadece yeni
+# barları çek. KLINE_HISTORY, cache'te saklanacak maksimum bar sayısı.
+KLINE_HISTORY = int(os.getenv("KLINE_HISTORY", "500"))
+
+INTERVAL_MS = NATIVE_MS    # Binance'in doğrudan sunduğu interval'ler (bkz. resample.py)
+KLINE_FETCH_MAX = 1000  # Binance tek istekte en fazla 1000 bar döner
+# Taban penceresi 2 kova + 2 bar olduğu için tek istekte sığan en büyük oran
+RESAMPLE_MAX_RATIO = (KLINE_FETCH_MAX - 2) // 2
+
+_bad_tf = set()
+
+def interval_of(timeframe):
+    """
+    Sheet'teki timeframe -> kanonik ad ("60m" -> "1h", "45m", "2h" ...).
+    Ne borsada olan ne de türetilebilen değerler uyarıyla 15m'e düşer.
+    """
+    step = tf_ms(timeframe)
+    if step and (step in INTERVAL_MS.values() or source_interval(step, RESAMPLE_MAX_RATIO)):
+        return resample_label(step)
+    if timeframe not in _bad_tf:
+        _bad_tf.add(timeframe)
+        logger.warning(f"⚠️  Desteklenmeyen timeframe '{timeframe}', 15m kullanılıyor")
+    return "15m"
+
+_kline_cache = {}   # (symbol, interval) -> {"df": DataFrame, "last_open": ms}
+_kline_lock = Lock()
+
+# Yerel kline deposu (KLINE_STORE ayarlıysa): soğuk başlangıçta geçmiş
+# diskten okunur, kapanan barlar diske eklenir (bkz. kline_store.py)
+KLINE_STORE_DIR = os.getenv("KLINE_STORE", "").strip()
+kline_store = None
+if KLINE_STORE_DIR:
+    from kline_store import KlineStore
+    kline_store = KlineStore(KLINE_STORE_DIR)
+
+def _fetch_full(symbol, interval, limit):
+    ks = _api_klines(symbol=symbol, interval=interval, limit=limit)
+    if not ks:
+        return None
+    return {"df": OHLCV.from_klines(ks), "last_open": int(ks[-1][0])}
+
+def _fetch_since(entry, symbol, interval, limit):
+    """
+    Cache'teki son (oluşmakta olan) bardan itibaren çek: o bar yerinde
+    güncellenir, arada kapanan barlar sona eklenir.
+    """
+    last_open = entry["last_open"]
+    step = INTERVAL_MS.get(interval, INTERVAL_MS["15m"])
+    missing = int((time() * 1000 - last_open) // step) + 2
+    if missing >= KLINE_FETCH_MAX:
+        # Arada çok bar kaçmış (uzun kesinti) → baştan yükle
+        return _fetch_full(symbol, interval, limit)
+
+    ks = _api_klines(symbol=symbol, interval=interval,
+                     startTime=last_open, limit=missing)
+    if ks is None:
+        return None     # weight bütçesi yetişmedi → bu tur veri yok
+    if not ks:
+        return entry
+    df = entry["df"].merge(OHLCV.from_klines(ks), keep=max(limit, KLINE_HISTORY))
+    return {"df": df, "last_open": int(ks[-1][0])}
+
+def _seed_from_store(symbol, interval, limit):
+    """Depodaki son barlardan cache girişi; sonrası _fetch_since ile tamamlanır."""
+    series = kline_store.series(symbol, interval)
+    if not len(series):
+        return None
+    df = OHLCV.from_rows(series.tail(max(limit, KLINE_HISTORY)))   # memmap view, kopyasız
+    return {"df": df, "last_open": series.last}
+
+def _store_closed(symbol, interval, df):
+    """Depoda olmayan kapanmış barları ekle (son satır oluşan mum)."""
+    try:
+        series = kline_store.series(symbol, interval)
+        closed = df[:-1]
+        last = series.last
+        if last is not None:
+            closed = closed.since(last)
+        if len(closed):
+            series.append(closed.rows())
+    except Exception as e:
+        logger.error(f"Kline deposu yazma hatası ({symbol}@{interval}): {e}")
+
+def _rest_klines(symbol, interval, limit=200):
+    try:
+        ck = (symbol, interval)
+        with _kline_lock:
+            entry = _kline_cache.get(ck)
+        if entry is None and kline_store is not None:
+            entry = _seed_from_store(symbol, interval, limit)
+
+        if entry is None or len(entry["df"]) < limit:
+            entry = _fetch_full(symbol, interval, limit)
+        else:
+            entry = _fetch_since(entry, symbol, interval, limit)
+        if entry is None:
+            return OHLCV.blank()
+
+        with _kline_lock:
+            _kline_cache[ck] = entry
+        if kline_store is not None:
+            _store_closed(symbol, interval, entry["df"])
+        return entry["df"][-limit:]
+    except Exception as e:
+        FAILURES.inc(stage="klines")
         logger.error(f"Veri çekme hatası ({symbol}): {e}")
-        return pd.DataFrame()
+        return OHLCV.blank()
+
+# WebSocket kaynağı (DATA_SOURCE=ws) — start_stream() ile kurulur
+kline_feed = None
+
+def _feed_klines(symbol, interval, limit):
+    """Borsa interval'i için pencere: WS akışı varsa oradan, yoksa REST cache."""
+    if kline_feed is not None and kline_feed.has(symbol, interval):
+        df = kline_feed.get_klines(symbol, interval, limit)
+        if not df.empty:
+            return df
+    return _rest_klines(symbol, interval, limit)
+
+# ============== MULTI-TIMEFRAME ==============
+# Aynı sembolün timeframe'leri tek taban akıştan yerelde üretilir (bkz. resample.py):
+# RESAMPLE_BASE=auto → sembolün timeframe'lerinin ortak böleni (5m+15m+1h → 5m),
+# 1m / 5m ... → sabit taban, boş → sadece borsada olmayanlar (45m, 10m ...) türetilir.
+RESAMPLE_BASE = os.getenv("RESAMPLE_BASE", "").strip().lower()
+RESAMPLE_VERIFY = float(os.getenv("RESAMPLE_VERIFY", "3600"))   # sn; borsa barlarıyla kontrol, 0: kapalı
+
+def _htf_history(symbol, interval, limit):
+    """
+    Borsadan son limit kapanmış interval barı: doğrudan ya da onu bölen
+    en büyük borsa interval'inden (sayfa sayfa) üretilerek. Hata → None.
+    """
+    try:
+        step = tf_ms(interval)
+        src = interval if interval in INTERVAL_MS else source_interval(step, RESAMPLE_MAX_RATIO)
+        src_ms = INTERVAL_MS[src]
+        now = int(time() * 1000)
+        cur = int(tf_floor(now, step)) - limit * step
+        ks = []
+        while cur < now:
+            n = min(KLINE_FETCH_MAX, (now - cur) // src_ms + 1)
+            page = _api_klines(symbol=symbol, interval=src, startTime=cur, limit=n)
+            if page is None:
+                return None
+            ks += page
+            if len(page) < n:
+                break
+            cur = int(page[-1][0]) + src_ms
+        w = OHLCV.from_klines(ks)
+        w = w[:int(np.searchsorted(w.ts, now - src_ms, "right"))]    # sadece kapanmış barlar
+        return resample(w, step, src_ms)[-limit:] if src != interval else w[-limit:]
+    except Exception as e:
+        FAILURES.inc(stage="resample")
+        logger.error(f"Üst timeframe geçmişi alınamadı ({symbol}@{interval}): {e}")
+        return None
+
+resampler = Resampler(_htf_history, history=KLINE_HISTORY, verify_every=RESAMPLE_VERIFY)
+_routes = {"version": None, "map": {}}
+
+def feed_of(symbol, interval):
+    """(symbol, interval) için borsadan çekilen interval: resample tabanı ya da kendisi."""
+    if _routes["version"] != config_service.version:
+        tfs = {}
+        for p in config_service.pairs:
+            tfs.setdefault(p["symbol"], set()).add(interval_of(p["timeframe"]))
+        _routes["map"] = resample_plan(tfs, RESAMPLE_BASE, RESAMPLE_MAX_RATIO)
+        _routes["version"] = config_service.version
+    src = _routes["map"].get((symbol, interval))
+    if src is None and interval not in INTERVAL_MS:
+        src = source_interval(tf_ms(interval), RESAMPLE_MAX_RATIO)
+    return src or interval
+
+def base_limit(interval, base):
+    """Taban penceresi: oluşan kova + bir önceki tam kova + 2 bar."""
+    return min(KLINE_FETCH_MAX, 2 * (tf_ms(interval) // tf_ms(base)) + 2)
+
+def get_klines(symbol, timeframe, limit=200, base_fn=None):
+    """
+    Son limit bar (son satır oluşan mum). Türetilen timeframe'lerde taban
+    penceresi base_fn(symbol, interval, limit) ile alınır (tur cache'i
+    aynı tabanı paylaştırmak için verir).
+    """
+    interval = interval_of(timeframe)
+    base = feed_of(symbol, interval)
+    if base == interval:
+        return _feed_klines(symbol, interval, limit)
+    try:
+        w = (base_fn or _feed_klines)(symbol, base, base_limit(interval, base))
+        df = resampler.window(symbol, interval, base, w, limit)
+    except Exception as e:
+        FAILURES.inc(stage="resample")
+        logger.error(f"Resample hatası ({symbol}@{interval} ← {base}): {e}")
+        df = None
+    return OHLCV.blank() if df is None else df
+
+# ============== CYCLE CACHE ==============
+class CycleCache:
+    """
+    Tek kontrol turu boyunca paylaşılan veri ve indikatörler.
+    Aynı (symbol, interval) için get_klines bir kere, turdaki paritelerin
+    en uzun ihtiyacı (plan) kadar çağrılır; her parite kendi penceresini
+    sondan keser. Aynı pencere üzerindeki ema/atr/supertrend vb. bir kere hesaplanır.
+    """
+
+    def __init__(self, pairs=()):
+        self.klines = {}
+        self._locks = {}
+        self._lock = Lock()
+        self.need = {}
+        self.fetches = 0
+        self.reuses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+        self.indicators = ind.IndicatorMemo() if ind else None
+        for p in pairs:
+            k = (p["symbol"], interval_of(p["timeframe"]))
+            self.need[k] = max(self.need.get(k, 0), bars_needed(p))
+            base = feed_of(*k)
+            if base != k[1]:
+                bk = (p["symbol"], base)
+                self.need[bk] = max(self.need.get(bk, 0), base_limit(k[1], base))
+
+    def _shared(self, k, limit, fetch):
+        with self._lock:
+            lk = self._locks.setdefault(k, Lock())
+        with lk:   # aynı anahtarı isteyen diğer thread'ler ilk çekimi bekler
+            df = self.klines.get(k)
+            if df is not None and (len(df) >= limit or len(df) < self.need.get(k, 0)):
+                with self._lock:
+                    self.reuses += 1
+                return df[-limit:]
+            df = fetch(max(limit, self.need.get(k, 0)))
+            with self._lock:
+                self.klines[k] = df
+                self.fetches += 1
+            return df[-limit:]
+
+    def _base(self, symbol, interval, limit):
+        # Sembolün türetilen timeframe'leri aynı taban penceresini paylaşır
+        return self._shared((symbol, interval), limit, lambda n: _feed_klines(symbol, interval, n))
+
+    def get_klines(self, symbol, timeframe, limit=200):
+        interval = interval_of(timeframe)
+        return self._shared((symbol, interval), limit,
+                            lambda n: get_klines(symbol, interval, n, base_fn=self._base))
+
+    def scope(self, symbol, timeframe, df):
+        """Bu pencere için indikatör memo kapsamı (pencere birebir aynıysa paylaşılır)."""
+        if self.indicators is None or df.empty:
+            return nullcontext()
+        key = (symbol, interval_of(timeframe), df.index[0], df.index[-1], len(df))
+        return ind.memo_scope(self.indicators, key)
+
+    def count_result(self, hit):
+        with self._lock:
+            if hit:
+                self.result_hits += 1
+            else:
+                self.result_misses += 1
+
+    def summary(self):
+        s = f"veri: {self.fetches} çekim, {self.reuses} tekrar kullanım"
+        if self.result_hits or self.result_misses:
+            s += f" | sonuç: {self.result_misses} hesap, {self.result_hits} tekrar kullanım"
+        if self.indicators is not None:
+            s += f" | indikatör: {self.indicators.misses} hesap, {self.indicators.hits} tekrar kullanım"
+        return s
+
+# ============== INCREMENTAL EVAL (EVAL_MODE=incremental) ==============
+_inc_states = {}   # pair_key -> {"params": str, "last_ts": int (ms), "state": strateji durumu}
+_inc_locks = {}    # pair_key -> Lock; warm-up / değerlendirme pair başına sıralı
+_inc_lock = Lock() # sadece iki dict'in okuma / yazması için
+
+def _inc_pair_lock(pair_key):
+    with _inc_lock:
+        lk = _inc_locks.get(pair_key)
+        if lk is None:
+            lk = _inc_locks[pair_key] = Lock()
+        return lk
+
+def _inc_drop(keys, removed=()):
+    """Durumları bellekten ve kalıcı depodan sil (config değişti / parite devredildi)."""
+    with _inc_lock:
+        for k in keys:
+            _inc_states.pop(k, None)
+        for k in removed:
+            _inc_locks.pop(k, None)
+    if state_store is not None:
+        for k in keys:
+            state_store.delete_indicator(k)
+
+def analyze_incremental(pair_key, df, config, use_closed=True):
+    """
+    Kapanmış barları pair'in kalıcı indikatör durumuna bir kere besler,
+    sonraki çağrılarda sadece yeni kapanan barlar işlenir (bar başına O(1)).
+    Oluşan mum (use_closed=False) durumun kopyasına uygulanır.
+    Parametre değişirse ya da arada bar kaçarsa df'ten yeniden warm-up.
+    Durum state_store'a yazılır; restart sonrası restore_inc_states ile döner.
+    """
+    from strategies.streaming import make_state, warmup
+
+    stype = (config.get("type") or "tmh").lower()
+    params = json.dumps(config, sort_keys=True, default=str)
+    closed = df[:-1]
+
+    with _inc_pair_lock(pair_key):
+        with _inc_lock:
+            ent = _inc_states.get(pair_key)
+        if ent is None or ent["params"] != params or not closed.has(ent["last_ts"]):
+            state = make_state(stype, config)
+            if state is None:
+                # Bu strateji incremental desteklemiyor → batch
+                return analyze_dispatch(closed if (use_closed and len(df) > 1) else df, config)
+            ent = {"params": params, "last_ts": None, "state": state}
+            new = closed
+        else:
+            new = closed.since(ent["last_ts"])
+
+        if len(new):
+            warmup(ent["state"], new["high"], new["low"], new["close"])
+            ent["last_ts"] = new.last_open
+            if state_store is not None:
+                state_store.put_indicator(pair_key, params, ent["last_ts"], ent["state"].to_dict())
+        with _inc_lock:
+            _inc_states[pair_key] = ent
+
+        if use_closed:
+            return ent["state"].signal()
+        peek = ent["state"].copy()
+        peek.update(float(df["high"][-1]), float(df["low"][-1]), float(df["close"][-1]))
+        return peek.signal()
+
+def restore_inc_states():
+    """Kalıcı depodaki indikatör durumlarını yükle; params / bar kontrolü analyze_incremental'da."""
+    if EVAL_MODE != "incremental" or state_store is None:
+        return 0
+    from strategies.streaming import load_state
+    t0 = monotonic()
+    loaded = {}
+    for k, (params, last_ts, d) in state_store.load_indicators().items():
+        try:
+            loaded[k] = {"params": params, "last_ts": last_ts, "state": load_state(d)}
+        except Exception as e:
+            logger.warning(f"⚠️  {k}: indikatör durumu okunamadı ({e}), warm-up yapılacak")
+    with _inc_lock:
+        for k, ent in loaded.items():
+            _inc_states.setdefault(k, ent)
+    logger.info(f"💾 {len(loaded)} indikatör durumu geri yüklendi ({(monotonic() - t0) * 1000:.1f}ms)")
+    return len(loaded)
+
+# ============== RESULT MEMO ==============
+RESULT_MEMO = _as_int(os.getenv("RESULT_MEMO"), 4096)   # en fazla kayıt, 0: kapalı
+
+class ResultMemo:
+    """
+    Kapanmış barlar üzerindeki strateji sonucu: (pair_key, parametre hash'i,
+    son kapanmış barın açılışı) -> sonuç. signal_on_close paritelerinde
+    pencere sonraki mum kapanana kadar değişmez; aradaki turlar
+    indikatörlere dokunmadan aynı sonucu kullanır. LRU, en fazla maxsize kayıt.
+    """
+
+    def __init__(self, maxsize=4096):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._params = {}       # id(config) -> (config, hash); tur başında temizlenir (new_cycle)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, pair_key, config, df_in):
+        ent = self._params.get(id(config))
+        if ent is None or ent[0] is not config:
+            h = hashlib.sha1(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+            ent = self._params[id(config)] = (config, h)
+        return (pair_key, ent[1], df_in.last_open)
+
+    def new_cycle(self):
+        """Önceki turların config dict'lerini bırak (load_pairs her tur yenilerini verebilir)."""
+        self._params = {}
+
+    def get(self, key):
+        with self._lock:
+            r = self._data.get(key)
+            if r is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return dict(r)
+
+    def put(self, key, result):
+        with self._lock:
+            self._data[key] = dict(result)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, pair_keys):
+        pair_keys = set(pair_keys)
+        with self._lock:
+            for k in [k for k in self._data if k[0] in pair_keys]:
+                del self._data[k]
+            self._params.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+result_memo = ResultMemo(RESULT_MEMO)
+
+def _memo_lookup(pair, pair_key, df, df_in, cycle=None):
+    """
+    (anahtar, önceki sonuç ya da None). Sadece kapanmış barla çalışan
+    pariteler; anahtar None ise sonuç saklanmaz.
+    """
+    if RESULT_MEMO <= 0 or not _on_close(pair) or len(df) < 2:
+        return None, None
+    key = result_memo.key(pair_key, pair.get("strategy", {}) or {}, df_in)
+    result = result_memo.get(key)
+    if cycle is not None:
+        cycle.count_result(result is not None)
+    return key, result
 
 # ============== POSITION STATE & DEBOUNCE ==============
+STATE_DB = os.getenv("STATE_DB", str(pathlib.Path(__file__).parent / "state.db"))   # boş: kalıcı değil
+STATE_FLUSH = float(os.getenv("STATE_FLUSH", "1"))   # sn, diske toplu yazma aralığı
+
 pos_state = {}
+_pos_lock = RLock()
+_pos_version = 0      # her durum değişikliğinde artar (snapshot yayını için)
+state_store = None
 
 def key_of(pair):
     return f"{pair['symbol']}@{pair['timeframe']}"
 
+def _persist(pair_key):
+    global _pos_version
+    _pos_version += 1
+    if state_store is not None and pair_key in pos_state:
+        state_store.put(pair_key, pos_state[pair_key])
+    if shard is not None:
+        shard.put(pair_key)
+
 def can_send(pair_key, signal, cooldown_sec=90):
     """Aynı sinyali belirli süre içinde tekrar yollama."""
-    st = pos_state.get(pair_key, {"pos":"NONE","last_sig":None,"ts":0})
-    if st.get("last_sig") == signal and (time() - st.get("ts",0)) < cooldown_sec:
-        return False
-    return True
+    with _pos_lock:
+        st = pos_state.get(pair_key, {"pos":"NONE","last_sig":None,"ts":0})
+        if st.get("last_sig") == signal and (time() - st.get("ts",0)) < cooldown_sec:
+            return False
+        return True
 
 def update_after_send(pair_key, signal):
-    st = pos_state.setdefault(pair_key, {"pos":"NONE","last_sig":None,"ts":0})
-    st["last_sig"] = signal
-    st["ts"] = time()
-    if signal == "ENTER-LONG":
-        st["pos"] = "LONG"
-    elif signal == "ENTER-SHORT":
-        st["pos"] = "SHORT"
-    elif signal in ("EXIT-LONG","EXIT-SHORT","EXIT-ALL"):
-        st["pos"] = "NONE"
+    with _pos_lock:
+        st = pos_state.setdefault(pair_key, {"pos":"NONE","last_sig":None,"ts":0})
+        st["last_sig"] = signal
+        st["ts"] = time()
+        if signal == "ENTER-LONG":
+            st["pos"] = "LONG"
+        elif signal == "ENTER-SHORT":
+            st["pos"] = "SHORT"
+        elif signal in ("EXIT-LONG","EXIT-SHORT","EXIT-ALL"):
+            st["pos"] = "NONE"
+        _persist(pair_key)
+
+def positions_snapshot():
+    with _pos_lock:
+        return {k: dict(v) for k, v in pos_state.items()}
+
+def restore_positions():
+    """
+    Kalıcı depodan pozisyon / son sinyal / cooldown durumunu yükle (ağsız).
+    Döner: geri yüklenen key sayısı.
+    """
+    global state_store
+    if not STATE_DB:
+        return 0
+    from state_store import StateStore
+    t0 = monotonic()
+    try:
+        state_store = StateStore(STATE_DB, flush_interval=STATE_FLUSH).start()
+        saved = state_store.load()
+    except Exception as e:
+        logger.error(f"❌ State store açılamadı ({STATE_DB}): {e}")
+        state_store = None
+        return 0
+    with _pos_lock:
+        pos_state.update(saved)
+    active = sum(1 for st in saved.values() if st.get("pos") != "NONE")
+    logger.info(f"💾 {len(saved)} pozisyon durumu geri yüklendi ({active} aktif, "
+                f"{(monotonic() - t0) * 1000:.1f}ms)")
+    return len(saved)
+
+# ============== SHARDING ==============
+# SHARD_STORE açıkken pariteler canlı instance'lar arasında tutarlı hash ile
+# paylaşılır; her instance sadece lease'i elindeki pariteleri değerlendirir
+# ve alert yollar. Pozisyon durumu lease ile birlikte devredilir (bkz. shard.py).
+SHARD_STORE = os.getenv("SHARD_STORE", "").strip()      # sqlite:///yol | redis://... | boş: kapalı
+SHARD_ID = os.getenv("SHARD_ID", "").strip()            # boş: host-pid
+SHARD_TTL = _as_float(os.getenv("SHARD_TTL"), 15.0)     # sn; worker düşünce devir süresi
+SHARD_VNODES = _as_int(os.getenv("SHARD_VNODES"), 64)
+
+shard = None
+
+def owns(pair_key):
+    if shard is None:
+        return not SHARD_STORE      # depo açılamadıysa çift alert yerine hiçbiri
+    return shard.owns(pair_key)
+
+def owned(pair):
+    return owns(key_of(pair))
+
+def _shard_states(keys):
+    with _pos_lock:
+        return {k: dict(pos_state[k]) for k in keys if k in pos_state}
+
+def _shard_acquired(states):
+    """Devralınan pariteler: önceki sahibin durumu geçerli, artımlı durum sıfırdan."""
+    global _pos_version
+    with _pos_lock:
+        for k, st in states.items():
+            if st:
+                pos_state[k] = st
+                _pos_version += 1
+                if state_store is not None:
+                    state_store.put(k, st)
+    _inc_drop(list(states))
+
+def start_shard():
+    global shard
+    if not SHARD_STORE or shard is not None:
+        return
+    from shard import ShardCoordinator, open_store
+    try:
+        store = open_store(SHARD_STORE)
+    except Exception as e:
+        FAILURES.inc(stage="shard")
+        logger.error(f"❌ Shard deposu açılamadı ({SHARD_STORE}): {e} — hiçbir parite kontrol edilmeyecek")
+        return
+    shard = ShardCoordinator(
+        store, lambda: [key_of(p) for p in load_pairs()], worker_id=SHARD_ID or None,
+        ttl=SHARD_TTL, vnodes=SHARD_VNODES, state_fn=_shard_states, on_acquire=_shard_acquired,
+    ).start()
+    snap = shard.snapshot()
+    logger.info(f"🔀 Shard {snap['id']}: {snap['owned']} parite, {len(snap['members'])} worker "
+                f"({snap['pending']} lease bekliyor)")
 
 # ============== POZISYON SENKRONIZASYONU ==============
 def sync_positions_from_sheet():
@@ -323,11 +1261,17 @@ def sync_positions_from_sheet():
             pair_key = key_of(pair)
             initial_pos = pair.get("initial_position", "NONE")
             
-            pos_state[pair_key] = {
-                "pos": initial_pos,
-                "last_sig": None,
-                "ts": 0
-            }
+            with _pos_lock:
+                if state_store is not None and pair_key in pos_state:
+                    # Kalıcı depodaki durum sheet'teki başlangıç değerinden önceliklidir
+                    logger.info(f"  ├─ {pair_key}: {pos_state[pair_key]['pos']} (kayıtlı)")
+                    continue
+                pos_state[pair_key] = {
+                    "pos": initial_pos,
+                    "last_sig": None,
+                    "ts": 0
+                }
+                _persist(pair_key)
             
             if initial_pos != "NONE":
                 logger.info(f"  ├─ {pair_key}: {initial_pos} ✓")
@@ -342,121 +1286,541 @@ def sync_positions_from_sheet():
 
 # ============== CORE LOOP ==============
 app = Flask(__name__)
-bot_state = {"running": False, "start_time": None, "last_check": None}
+bot_state = {"running": False, "ready": False, "start_time": None, "startup": None,
+             "last_check": None, "last_cycle": None}
+
+def _load_window(pair, cycle=None):
+    """(pair_key, df, df_in): stratejinin warm-up'ı kadar pencere; df_in kapanmış barlar."""
+    pair_key = key_of(pair)
+    symbol, tf = pair["symbol"], pair["timeframe"]
+    config = pair.get("strategy", {}) or {}
+    # Stratejinin warm-up'ı kadar pencere (incremental modda ilk besleme de bu kadar)
+    limit = bars_needed(pair)
+
+    t0 = perf_counter()
+    df = cycle.get_klines(symbol, tf, limit) if cycle else get_klines(symbol, tf, limit)
+    dt = perf_counter() - t0
+    STAGE_SECONDS.observe(dt, stage="klines")
+    _observe_pair(pair_key, "klines", dt)
+
+    use_closed = bool(config.get("signal_on_close", True))
+    df_in = df[:-1] if (use_closed and len(df) > 1) else df    # view, kopya yok
+    return pair_key, df, df_in
+
+def _observe_eval(pair_key, stype, seconds):
+    STAGE_SECONDS.observe(seconds, stage="eval")
+    STRATEGY_SECONDS.observe(seconds, strategy=stype)
+    _observe_pair(pair_key, "eval", seconds)
+
+def _act(pair, pair_key, result, df_in):
+    """Sinyali logla ve gerekiyorsa alert gönder."""
+    alerts = pair.get("alerts", {})
+    stype  = ((pair.get("strategy") or {}).get("type") or "tmh").lower()
+    signal = result["signal"]
+    price  = float(result.get("price", df_in["close"][-1]))
+
+    with _pos_lock:
+        pos = pos_state.setdefault(pair_key, {"pos":"NONE","last_sig":None,"ts":0})["pos"]
+
+    logger.info(f"📊 {pair['symbol']} [{stype}] | {signal} @ ${price:.4f} | Pozisyon: {pos}")
+    if signal != "HOLD":
+        signal_hub.publish("signal", {"pair": pair_key, "strategy": stype, "signal": signal,
+                                      "price": price, "pos": pos, "bar": int(df_in.index[-1])})
+
+    # Alert kontrolü (pozisyon koşulu emit_alert içinde kilit altında tekrar bakılır)
+    if signal == "ENTER-LONG" and alerts.get("enter_long"):
+        emit_alert(pair_key, signal, alerts["enter_long"], lambda p: p != "LONG")
 
-def check_pair(pair: dict):
+    elif signal == "ENTER-SHORT" and alerts.get("enter_short"):
+        emit_alert(pair_key, signal, alerts["enter_short"], lambda p: p != "SHORT")
+
+    elif signal == "EXIT-LONG" and alerts.get("exit_long"):
+        emit_alert(pair_key, signal, alerts["exit_long"], lambda p: p == "LONG")
+
+    elif signal == "EXIT-SHORT" and alerts.get("exit_short"):
+        emit_alert(pair_key, signal, alerts["exit_short"], lambda p: p == "SHORT")
+
+def check_pair(pair: dict, cycle: CycleCache = None):
     symbol   = pair["symbol"]
     tf       = pair["timeframe"]
-    alerts   = pair.get("alerts", {})
     config   = pair.get("strategy", {}) or {}
     stype    = (config.get("type") or "tmh").lower()
 
     try:
-        df = get_klines(symbol, tf)
+        t0 = perf_counter()
+        pair_key, df, df_in = _load_window(pair, cycle)
         if df.empty:
             return
 
-        use_closed = bool(config.get("signal_on_close", True))
-        df_in = df.iloc[:-1] if (use_closed and len(df) > 1) else df
+        # Son kapanmış bar değişmediyse strateji çalışmaz
+        memo_key, result = _memo_lookup(pair, pair_key, df, df_in, cycle)
+        if result is None:
+            t1 = perf_counter()
+            if EVAL_MODE == "incremental":
+                use_closed = bool(config.get("signal_on_close", True))
+                result = analyze_incremental(pair_key, df, config, use_closed)
+            else:
+                with (cycle.scope(symbol, tf, df_in) if cycle else nullcontext()):
+                    result = evaluate(df_in, config)
+            _observe_eval(pair_key, stype, perf_counter() - t1)
+            if memo_key is not None:
+                result_memo.put(memo_key, result)
 
-        result = analyze_dispatch(df_in, config)
-        signal = result["signal"]
-        price  = float(result.get("price", df_in["close"].iloc[-1]))
-        
-        pair_key = key_of(pair)
-        st = pos_state.setdefault(pair_key, {"pos":"NONE","last_sig":None,"ts":0})
-        pos = st["pos"]
-        
-        logger.info(f"📊 {symbol} [{stype}] | {signal} @ ${price:.4f} | Pozisyon: {pos}")
+        _act(pair, pair_key, result, df_in)
+        _observe_pair(pair_key, "total", perf_counter() - t0)
+
+    except Exception as e:
+        FAILURES.inc(stage="pair")
+        logger.error(f"❌ {symbol} hatası: {e}")
+
+# ============== VECTOR EVAL (EVAL_MODE=vector) ==============
+def fetch_pair(pair, cycle, out, memo_keys=None):
+    """
+    Sadece veri penceresini hazırla; değerlendirme turda toplu yapılır.
+    Sonucu memo'da olan parite burada işlenir, değerlendirmeye girmez.
+    """
+    try:
+        pair_key, df, df_in = _load_window(pair, cycle)
+        if df.empty:
+            return
+        memo_key, result = _memo_lookup(pair, pair_key, df, df_in, cycle)
+        if result is not None:
+            _act(pair, pair_key, result, df_in)
+            return
+        if memo_key is not None and memo_keys is not None:
+            memo_keys[id(pair)] = memo_key
+        out.append((pair, pair_key, df_in))
+    except Exception as e:
+        FAILURES.inc(stage="pair")
+        logger.error(f"❌ {pair['symbol']} hatası: {e}")
 
-        # Alert kontrolü
-        if signal == "ENTER-LONG" and alerts.get("enter_long"):
-            if pos != "LONG" and can_send(pair_key, signal):
-                send_wt(alerts["enter_long"])
-                update_after_send(pair_key, signal)
+def evaluate_stacked(items):
+    """
+    items: [(pair, pair_key, df_in)] -> [(pair, pair_key, df_in, result)]
+    Strateji, parametreler ve pencere uzunluğu aynı olan pariteler
+    (pariteler × barlar) dizilerine yığılıp tek geçişte değerlendirilir
+    (satırlar bağımsız, sembol / timeframe farkı önemsiz). Tek kalanlar
+    ve strategies yüklenemezse parite başına analyze_dispatch.
+    """
+    groups = {}
+    for pair, pair_key, df_in in items:
+        config = pair.get("strategy", {}) or {}
+        gk = (json.dumps(config, sort_keys=True, default=str), len(df_in))
+        groups.setdefault(gk, []).append((pair, pair_key, df_in))
 
-        elif signal == "ENTER-SHORT" and alerts.get("enter_short"):
-            if pos != "SHORT" and can_send(pair_key, signal):
-                send_wt(alerts["enter_short"])
-                update_after_send(pair_key, signal)
+    out = []
+    for members in groups.values():
+        config = members[0][0].get("strategy", {}) or {}
+        stype = (config.get("type") or "tmh").lower()
+        t0 = perf_counter()
+        try:
+            if len(members) == 1 or run_batch is None:
+                results = [evaluate(df_in, config) for _, _, df_in in members]
+            else:
+                cols = [np.stack([df_in[c] for _, _, df_in in members]) for c in ("high", "low", "close")]
+                batch = get_evaluator().batch if EVAL_BACKEND == "process" else run_batch
+                results = batch(stype, *cols, config)
+        except Exception as e:
+            FAILURES.inc(stage="eval")
+            logger.error(f"❌ Toplu değerlendirme hatası [{stype}, {len(members)} parite]: {e}")
+            continue
+        dt = perf_counter() - t0
+        STAGE_SECONDS.observe(dt, stage="eval")
+        STRATEGY_SECONDS.observe(dt, strategy=stype)
+        for (pair, pair_key, df_in), result in zip(members, results):
+            _observe_pair(pair_key, "eval", dt / len(members))
+            out.append((pair, pair_key, df_in, result))
+    return out
 
-        elif signal == "EXIT-LONG" and alerts.get("exit_long"):
-            if pos == "LONG" and can_send(pair_key, signal):
-                send_wt(alerts["exit_long"])
-                update_after_send(pair_key, signal)
+# ============== WORKER POOL ==============
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="pair")
 
-        elif signal == "EXIT-SHORT" and alerts.get("exit_short"):
-            if pos == "SHORT" and can_send(pair_key, signal):
-                send_wt(alerts["exit_short"])
-                update_after_send(pair_key, signal)
+def _run_one(pair, cycle, submitted, deadline, waits, work=check_pair):
+    start = monotonic()
+    waits.append(start - submitted)
+    QUEUE_WAIT_SECONDS.observe(start - submitted)
+    if start >= deadline:
+        logger.warning(f"⏱️  {key_of(pair)}: tur süresi doldu, atlandı")
+        SKIPPED.inc(reason="late")
+        return
+    _worker.deadline = deadline
+    try:
+        work(pair, cycle)
+    finally:
+        _worker.deadline = None
 
-    except Exception as e:
-        logger.error(f"❌ {symbol} hatası: {e}")
+def run_pairs(pairs, cycle=None, deadline_s=None, label=None):
+    """
+    Pariteleri kalıcı thread havuzunda (MAX_WORKERS) kontrol eder ve
+    en fazla CYCLE_DEADLINE saniye bekler. Yetişmeyen ve kuyrukta bekleyen
+    işler iptal edilir; çalışanlar kendi başına biter ama tur onları beklemez.
+    EVAL_MODE=vector: havuz sadece veriyi çeker, yetişenler evaluate_stacked
+    ile toplu değerlendirilip alert mantığından geçirilir.
+    label: metriklerde tur (job) etiketi.
+    """
+    t0 = monotonic()
+    deadline = t0 + (CYCLE_DEADLINE if deadline_s is None else deadline_s)
+    result_memo.new_cycle()
+    waits = []
+    fetched, memo_keys = [], {}
+    work = (lambda p, c: fetch_pair(p, c, fetched, memo_keys)) if EVAL_MODE == "vector" else check_pair
+    futs = [_executor.submit(_run_one, p, cycle, monotonic(), deadline, waits, work) for p in pairs]
+    done, pending = wait(futs, timeout=max(0.0, deadline - monotonic()))
+    for f in pending:
+        f.cancel()
+    if EVAL_MODE == "vector":
+        for pair, pair_key, df_in, result in evaluate_stacked(list(fetched)):
+            if id(pair) in memo_keys:
+                result_memo.put(memo_keys[id(pair)], result)
+            try:
+                _act(pair, pair_key, result, df_in)
+            except Exception as e:
+                FAILURES.inc(stage="pair")
+                logger.error(f"❌ {pair['symbol']} hatası: {e}")
+    job = label or "all"
+    if pending:
+        logger.warning(f"⏱️  Tur süresi ({deadline - t0:.0f}s) aşıldı: {len(pending)}/{len(pairs)} parite yetişmedi")
+        OVERRUNS.inc(job=job)
+        SKIPPED.inc(len(pending), reason="cancelled")
+
+    publish_snapshots()
+    elapsed = monotonic() - t0
+    stats = {
+        "pairs": len(pairs),
+        "timed_out": len(pending),
+        "duration": round(elapsed, 3),
+        "queue_wait_avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+        "queue_wait_max": round(max(waits), 3) if waits else 0.0,
+        "weight_used_1m": weight_limiter.used_1m,
+    }
+    bot_state["last_cycle"] = stats
+    CYCLE_SECONDS.observe(elapsed, job=job)
+    if cycle is not None:
+        CYCLE_CACHE.inc(cycle.fetches, kind="fetch")
+        CYCLE_CACHE.inc(cycle.reuses, kind="reuse")
+        CYCLE_CACHE.inc(cycle.result_misses, kind="result_compute")
+        CYCLE_CACHE.inc(cycle.result_hits, kind="result_reuse")
+        stats["results"] = {"compute": cycle.result_misses, "reuse": cycle.result_hits}
+        if cycle.indicators is not None:
+            CYCLE_CACHE.inc(cycle.indicators.misses, kind="indicator_compute")
+            CYCLE_CACHE.inc(cycle.indicators.hits, kind="indicator_reuse")
+    return stats
 
-def check_all_pairs():
+def _on_close(pair):
+    return bool((pair.get("strategy") or {}).get("signal_on_close", True))
+
+def check_all_pairs(select=None, label=None):
+    """
+    Tüm aktif pariteleri (ya da select(pair) True dönenleri) paralel kontrol eder.
+    label: log için grup adı (örn. bar kapanış job'ında timeframe).
+    """
     try:
         pairs = load_pairs()
         if not pairs:
             logger.warning("⚠️  Aktif parite bulunamadı")
             return
+        _sync_bar_jobs(pairs)
+
+        if select is not None or SHARD_STORE:
+            pairs = [p for p in pairs if owned(p) and (select is None or select(p))]
+            if not pairs:
+                return
             
-        logger.info(f"🔄 {len(pairs)} parite kontrol ediliyor...")
+        logger.info(f"🔄 {len(pairs)} parite kontrol ediliyor{f' [{label}]' if label else ''}...")
         bot_state["last_check"] = datetime.now().isoformat()
         
-        threads = []
-        for p in pairs:
-            t = Thread(target=check_pair, args=(p,))
-            t.start()
-            threads.append(t)
-        for t in threads:
-            t.join()
+        cycle = CycleCache(pairs)
+        stats = run_pairs(pairs, cycle, label=label)
             
-        logger.info("✅ Kontrol tamamlandı")
+        logger.info(
+            f"✅ Kontrol tamamlandı ({stats['duration']:.2f}s, kuyruk bekleme ort/max "
+            f"{stats['queue_wait_avg']:.2f}/{stats['queue_wait_max']:.2f}s | {cycle.summary()})"
+        )
     except Exception as e:
+        FAILURES.inc(stage="cycle")
         logger.error(f"❌ Genel hata: {e}")
 
-# ============== FLASK & SCHEDULER ==============
+# ============== STREAM (DATA_SOURCE=ws) ==============
+_stream_pairs = {}   # (symbol, interval) -> [pair, ...]
+
+def _on_bar_close(symbol, interval):
+    """
+    Bar kapanır kapanmaz ilgili pariteleri kontrol et (ortak veri/indikatör).
+    Taban akıştan türetilen timeframe'ler sadece kendi kovaları kapanınca.
+    """
+    end = kline_feed.get_klines(symbol, interval, 1).last_open   # kapanan barın bitişi
+    pairs = [p for p in _stream_pairs.get((symbol, interval), [])
+             if owned(p) and (end is None or end == tf_floor(end, tf_ms(interval_of(p["timeframe"]))))]
+    if pairs:
+        # WS döngüsünü bloklamamak için beklemeyi ayrı thread'de yap
+        Thread(target=run_pairs, args=(pairs, CycleCache(pairs)), kwargs={"label": f"ws_{interval}"},
+               daemon=True).start()
+
+def start_stream():
+    global kline_feed
+    from ws_feed import KlineStream
+
+    pairs = load_pairs()
+    _stream_pairs.clear()
+    need = [KLINE_HISTORY]
+    for p in pairs:
+        # Türetilen timeframe'ler için sembolün taban akışı
+        iv = interval_of(p["timeframe"])
+        k = (p["symbol"], feed_of(p["symbol"], iv))
+        _stream_pairs.setdefault(k, []).append(p)
+        need.append(bars_needed(p) if k[1] == iv else base_limit(iv, k[1]))
+    if not _stream_pairs:
+        logger.warning("⚠️  Stream için parite yok, REST ile devam")
+        return
+
+    # Akışta tutulacak geçmiş en uzun warm-up'tan / taban penceresinden kısa olmasın
+    history = max(need)
+    kline_feed = KlineStream(
+        _stream_pairs.keys(),
+        on_close=_on_bar_close,
+        seed_fn=lambda s, i: _rest_klines(s, i, history),
+        history=history,
+    ).start()
+
+# ============== READ API ==============
+# /pairs ve /positions istek anında hesaplanmaz: tur sonunda (değiştiyse)
+# bir kez JSON'a çevrilen değişmez gövdeler sunulur. If-None-Match
+# ETag'le eşleşirse 304 döner. /signals SSE ile sinyal / alert iter.
+SSE_MAX_CLIENTS = _as_int(os.getenv("SSE_MAX_CLIENTS"), 20)
+SSE_HISTORY = _as_int(os.getenv("SSE_HISTORY"), 500)     # Last-Event-ID ile tekrar gönderilebilen olay
+
+signal_hub = SignalHub(history=SSE_HISTORY, max_clients=SSE_MAX_CLIENTS)
+
+_snapshots = {}          # ad -> (gövde, etag, kaynak versiyonu)
+_snap_lock = Lock()
+
+def _publish(name, version, obj):
+    body = json.dumps(obj, ensure_ascii=False, default=str).encode("utf-8")
+    with _snap_lock:
+        _snapshots[name] = (body, hashlib.sha1(body).hexdigest()[:20], version)
+
+def publish_snapshots():
+    """Değişen snapshot'ları yeniden üret (tur sonunda; değişmediyse maliyetsiz)."""
+    with _snap_lock:
+        have = {k: v[2] for k, v in _snapshots.items()}
+    version = config_service.version
+    if have.get("pairs") != version:
+        pairs = config_service.pairs
+        _publish("pairs", version, {"count": len(pairs), "pairs": pairs})
+    version = _pos_version
+    if have.get("positions") != version:
+        positions = positions_snapshot()
+        _publish("positions", version, {"count": len(positions), "positions": positions})
+
+def _serve_snapshot(name):
+    with _snap_lock:
+        snap = _snapshots.get(name)
+    if snap is None:
+        publish_snapshots()
+        with _snap_lock:
+            snap = _snapshots[name]
+    resp = Response(snap[0], mimetype="application/json")
+    resp.set_etag(snap[1])
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp.make_conditional(request)
+
+# ============== FLASK ==============
 @app.get("/health")
 def health():
-    return jsonify({"status":"ok", "running": bot_state["running"]})
+    # Ağ / disk / kilit yok: server açıldığı andan itibaren ms içinde döner
+    return jsonify({"status":"ok", "running": bot_state["running"], "ready": bot_state["ready"]})
+
+@app.get("/metrics")
+def metrics_view():
+    return Response(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
 
 @app.get("/status")
 def status():
-    return jsonify(bot_state)
+    return jsonify({**bot_state, "alerts": _dispatcher.snapshot() if _dispatcher else None,
+                    "shard": shard.snapshot() if shard else None})
 
 @app.get("/pairs")
 def pairs_view():
-    try:
-        pairs = load_pairs()
-        return jsonify({
-            "count": len(pairs),
-            "pairs": pairs
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """Son yüklenen config (istekte Sheets / dosya okunmaz)."""
+    return _serve_snapshot("pairs")
 
 @app.get("/positions")
 def positions_view():
-    """Mevcut pozisyon durumlarını göster"""
-    try:
-        return jsonify({
-            "count": len(pos_state),
-            "positions": pos_state
-        })
-    except Exception as e:
-        return jsonify({"error": str(e)}), 500
+    """Mevcut pozisyon durumları (son tur sonundaki snapshot)."""
+    return _serve_snapshot("positions")
+
+@app.get("/signals")
+def signals_view():
+    """Sinyal ve alert'lerin canlı akışı (SSE). Last-Event-ID ile kaçırılanlar tekrar gelir."""
+    last = request.headers.get("Last-Event-ID") or request.args.get("last_id")
+    sub = signal_hub.subscribe(_as_int(last, 0) if last else None)
+    if sub is None:
+        return jsonify({"error": f"en fazla {SSE_MAX_CLIENTS} izleyici"}), 503
+    return Response(signal_hub.stream(sub), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ============== CONFIG HOT-RELOAD ==============
+def _on_config_change(diff, pairs):
+    """Sadece değişen/eklenen/silinen pariteler için cache ve durumları yenile."""
+    _inc_drop(diff["removed"] + diff["changed"], removed=diff["removed"])
+    result_memo.invalidate(diff["removed"] + diff["changed"])
+    for k in diff["removed"]:
+        for stage in ("klines", "eval", "total"):
+            PAIR_SECONDS.remove(pair=k, stage=stage)
+
+    by_key = {key_of(p): p for p in pairs}
+    with _pos_lock:
+        for k in diff["added"]:
+            if k not in pos_state:
+                pos_state[k] = {"pos": by_key[k].get("initial_position", "NONE"), "last_sig": None, "ts": 0}
+                _persist(k)
+
+    # Artık kullanılmayan bar cache'lerini bırak
+    keys = {(p["symbol"], interval_of(p["timeframe"])) for p in pairs}
+    used = {(s, feed_of(s, i)) for s, i in keys}
+    with _kline_lock:
+        for ck in [ck for ck in _kline_cache if ck not in used]:
+            del _kline_cache[ck]
+    resampler.retain(keys)
+    if shard is not None:
+        shard.poke()
+    publish_snapshots()
+
+    if kline_feed is not None:
+        _stream_pairs.clear()
+        for p in pairs:
+            k = (p["symbol"], feed_of(p["symbol"], interval_of(p["timeframe"])))
+            if kline_feed.has(*k):
+                _stream_pairs.setdefault(k, []).append(p)
+        extra = sorted(f"{s}@{i}" for s, i in used if not kline_feed.has(s, i))
+        if extra:
+            logger.warning(f"⚠️  Stream dışı pariteler REST ile kontrol edilecek: {', '.join(extra)}")
+
+config_service.subscribe(_on_config_change)
+
+# ============== SCHEDULER ==============
+_scheduler = None
+_bar_jobs = set()        # bar kapanış job'ı kurulu interval'ler
+_sched_lock = Lock()
+
+def _interval_job():
+    """CHECK_INTERVAL job'ı: bar_close modunda sadece oluşan mumla çalışan pariteler."""
+    if SCHEDULE_MODE == "bar_close":
+        check_all_pairs(select=lambda p: not _on_close(p), label="forming")
+    else:
+        check_all_pairs()
+
+def _streamed(pair):
+    return kline_feed is not None and kline_feed.has(
+        pair["symbol"], feed_of(pair["symbol"], interval_of(pair["timeframe"])))
+
+def _bar_job(interval):
+    check_all_pairs(
+        select=lambda p: _on_close(p) and not _streamed(p) and interval_of(p["timeframe"]) == interval,
+        label=interval,
+    )
+
+def _sync_bar_jobs(pairs):
+    """
+    signal_on_close pariteleri timeframe'e göre grupla; her grup için mum
+    sınırı + BAR_CLOSE_GRACE saniyede tetiklenen bir job olsun. Config'ten
+    kalkan timeframe'lerin job'ı silinir. WS akışındaki pariteler zaten
+    kapanışta tetiklendiği için sayılmaz.
+    """
+    if _scheduler is None or SCHEDULE_MODE != "bar_close":
+        return
+    wanted = {interval_of(p["timeframe"]) for p in pairs
+              if _on_close(p) and not _streamed(p)}
+    with _sched_lock:
+        for iv in sorted(wanted - _bar_jobs):
+            step_ms = tf_ms(iv)
+            step = step_ms / 1000
+            first = (int(tf_floor(int(time() * 1000), step_ms)) + step_ms) / 1000 + BAR_CLOSE_GRACE
+            _scheduler.add_job(
+                func=_bar_job,
+                args=(iv,),
+                trigger="interval",
+                seconds=step,
+                start_date=datetime.fromtimestamp(first, tz=timezone.utc),
+                id=f"bar_close_{iv}",
+                replace_existing=True,
+                coalesce=True,
+                max_instances=1,
+                misfire_grace_time=int(step // 2) or 1,
+            )
+            _bar_jobs.add(iv)
+            logger.info(f"⏰ {iv} bar kapanış job'ı kuruldu (+{BAR_CLOSE_GRACE:g}s)")
+        for iv in sorted(_bar_jobs - wanted):
+            try:
+                _scheduler.remove_job(f"bar_close_{iv}")
+            except Exception:
+                pass
+            _bar_jobs.discard(iv)
+            logger.info(f"⏰ {iv} bar kapanış job'ı kaldırıldı")
 
 def start_scheduler():
-    sch = BackgroundScheduler()
+    global _scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED
+    sch = BackgroundScheduler(timezone="UTC")
+    # Önceki tur bitmediği için atlanan / kaçırılan çalıştırmalar
+    sch.add_listener(lambda ev: SKIPPED.inc(reason="max_instances"), EVENT_JOB_MAX_INSTANCES)
+    sch.add_listener(lambda ev: SKIPPED.inc(reason="missed"), EVENT_JOB_MISSED)
     sch.add_job(
-        func=check_all_pairs,
+        func=_interval_job,
         trigger="interval",
         seconds=CHECK_INTERVAL,
         id="check_pairs",
         replace_existing=True
     )
     sch.start()
-    logger.info(f"⏰ Scheduler başlatıldı ({CHECK_INTERVAL}s)")
+    _scheduler = sch
+    if SCHEDULE_MODE == "bar_close":
+        _sync_bar_jobs(load_pairs())
+    logger.info(f"⏰ Scheduler başlatıldı ({CHECK_INTERVAL}s, mod: {SCHEDULE_MODE})")
+
+# ============== STARTUP ==============
+STARTUP_BUDGET = float(os.getenv("STARTUP_BUDGET", "1.0"))   # sn; import → server açılışı hedefi
+
+def warm_start():
+    """
+    Ağ gerektiren başlangıç işleri; server açıldıktan sonra arka planda
+    çalışır, /health bu sırada cevap verir (ready=false).
+    """
+    t0 = perf_counter()
+    try:
+        # Sheet'ten sadece yeni pariteler (kayıtlılar restore_positions ile geldi)
+        sync_positions_from_sheet()
+
+        # Artımlı indikatör durumları (warm-up yerine kaldığı bardan devam)
+        restore_inc_states()
+
+        # Paylaşımlı modda bu instance'ın pariteleri (devralınan durumlarla)
+        start_shard()
+
+        # Outbox'ta bekleyen alert'leri kuyruğa al
+        if WT_ASYNC:
+            get_dispatcher()
+
+        # Değerlendirme process'leri ilk turdan önce ısınsın
+        if EVAL_BACKEND == "process":
+            get_evaluator()
+
+        # WebSocket akışı (opsiyonel)
+        if DATA_SOURCE == "ws":
+            start_stream()
+
+        # İlk kontrol
+        check_all_pairs()
+
+        # Scheduler başlat
+        start_scheduler()
+    except Exception as e:
+        FAILURES.inc(stage="startup")
+        logger.error(f"❌ Başlangıç hatası: {e}")
+    bot_state["ready"] = True
+    bot_state["startup"]["warm_s"] = round(perf_counter() - t0, 3)
+    logger.info(f"🔥 Hazır: ilk tur + scheduler {bot_state['startup']['warm_s']:.2f}s")
 
 if __name__ == "__main__":
     logger.info("="*60)
@@ -466,15 +1830,18 @@ if __name__ == "__main__":
     bot_state["running"] = True
     bot_state["start_time"] = datetime.now().isoformat()
     
-    # Başlangıç pozisyonlarını Google Sheets'den oku
-    sync_positions_from_sheet()
-    
-    # İlk kontrol
-    check_all_pairs()
-    
-    # Scheduler başlat
-    start_scheduler()
-    
+    # Kayıtlı pozisyonlar (ağsız, server açılmadan)
+    restore_positions()
+
+    boot_s = perf_counter() - _T_IMPORT
+    bot_state["startup"] = {"boot_s": round(boot_s, 3), "budget_s": STARTUP_BUDGET, "warm_s": None}
+    if boot_s > STARTUP_BUDGET:
+        logger.warning(f"🐢 Başlangıç bütçesi aşıldı: {boot_s:.2f}s > {STARTUP_BUDGET:g}s")
+    else:
+        logger.info(f"⚡ Başlangıç: {boot_s*1000:.0f}ms (bütçe {STARTUP_BUDGET:g}s)")
+
+    Thread(target=warm_start, name="warm-start", daemon=True).start()
+
     port = int(os.getenv("PORT", 5000))
     logger.info(f"🌐 Server başlatıldı: http://0.0.0.0:{port}")
     app.run(host="0.0.0.0", port=port, debug=False)
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Strateji değerlendirmesi için sıcak process havuzu (EVAL_BACKEND=process).
+
+Parite thread'leri veriyi çekmeye devam eder (ağ I/O thread'lerde kalır);
+sadece strateji hesabı worker process'lere gider, GIL'e takılmaz.
+
+  - Worker'lar bir kez açılır ve strategies'i bir kez import eder
+    (forkserver: sunucu strategies'i önceden yükler, worker'lar ondan çatallanır).
+  - OHLCV pickle'lanmaz: pencere, havuzla birlikte açılan shared memory
+    bloğundaki bir slota yazılır, worker aynı slotu view olarak okur.
+    Görev mesajında sadece (slot, uzunluk, strateji, config) gider.
+  - Slot sayısı aynı anda uçuşta olabilecek değerlendirme sayısıdır;
+    slot bekleyen thread GIL'i bırakır.
+
+    ev = ProcessEvaluator(workers=4).start()
+    ev.analyze("tmh", df_in, config)               # strategies.run ile aynı sonuç
+    ev.batch("tmh", high, low, close, config)      # strategies.run_batch ile aynı
+"""
+
+import os, atexit, logging
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from queue import Queue
+from threading import Lock
+from time import sleep
+
+import numpy as np
+
+from ohlcv import OHLCV
+
+logger = logging.getLogger("wunderbot")
+
+FIELDS = ("ts", "open", "high", "low", "close", "volume")
+SLOT_BYTES = 1 << 20        # slot başına 1 MB: 1000 barlık pencere ya da ~40 × 1000 toplu satır
+
+# ============== WORKER ==============
+_W = {}
+
+def _init(shm_name, slot_bytes):
+    import strategies
+    _W["strategies"] = strategies
+    _W["shm"] = shared_memory.SharedMemory(name=shm_name)
+    _W["slot"] = slot_bytes
+    # İlk gerçek görevde import / ilk çağrı maliyeti olmasın
+    x = np.linspace(100.0, 101.0, 64)
+    for name in strategies.REGISTRY:
+        try:
+            strategies.run_batch(name, x[None] + 0.5, x[None] - 0.5, x[None], {"type": name})
+        except Exception:
+            pass
+
+def _ping(delay):
+    sleep(delay)
+    return os.getpid()
+
+def _arrays(slot, shape, fields, dtypes):
+    off = slot * _W["slot"]
+    out = {}
+    for f, dt in zip(fields, dtypes):
+        a = np.ndarray(shape, dtype=dt, buffer=_W["shm"].buf, offset=off)
+        off += a.nbytes
+        out[f] = a
+    return out
+
+def _analyze(task):
+    slot, n, fields, stype, config = task
+    a = _arrays(slot, (n,), fields, [np.int64 if f == "ts" else np.float64 for f in fields])
+    df = OHLCV(*(a.get(f) for f in FIELDS))
+    return _W["strategies"].run(stype, df, config)
+
+def _batch(task):
+    slot, shape, stype, config = task
+    a = _arrays(slot, shape, ("high", "low", "close"), [np.float64] * 3)
+    return _W["strategies"].run_batch(stype, a["high"], a["low"], a["close"], config)
+
+# ============== PARENT ==============
+class ProcessEvaluator:
+    """
+    workers: process sayısı (varsayılan CPU sayısı); slots: eşzamanlı
+    değerlendirme (varsayılan workers × 4). Havuz çökerse bir kez yeniden
+    kurulur; yine olmazsa hata çağırana döner.
+    """
+
+    def __init__(self, workers=None, slots=None, slot_bytes=SLOT_BYTES):
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        self.n_slots = max(1, slots or self.workers * 4)
+        self.slot_bytes = slot_bytes
+        self.shm = None
+        self.pool = None
+        self._free = Queue()
+        self._lock = Lock()
+        self.stats = {"analyze": 0, "batch": 0, "restarts": 0}
+
+    def start(self):
+        with self._lock:
+            if self.shm is None:
+                self.shm = shared_memory.SharedMemory(create=True, size=self.n_slots * self.slot_bytes)
+                for i in range(self.n_slots):
+                    self._free.put(i)
+                atexit.register(self.close)
+            self._spawn()
+        return self
+
+    def _spawn(self):
+        methods = mp.get_all_start_methods()
+        ctx = mp.get_context("forkserver" if "forkserver" in methods else "spawn")
+        if ctx.get_start_method() == "forkserver":
+            ctx.set_forkserver_preload(["eval_pool", "strategies"])
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx,
+                                        initializer=_init, initargs=(self.shm.name, self.slot_bytes))
+        # Worker'lar şimdi açılsın (ilk turda değil)
+        pids = set(self.pool.map(_ping, [0.05] * self.workers * 2))
+        logger.info(f"🧮 Değerlendirme havuzu: {self.workers} process ({len(pids)} hazır), "
+                    f"{self.n_slots} × {self.slot_bytes >> 10} KB shared memory")
+
+    def _call(self, fn, make_task, write):
+        slot = self._free.get()
+        try:
+            write(np.ndarray(self.slot_bytes, dtype=np.uint8, buffer=self.shm.buf,
+                             offset=slot * self.slot_bytes))
+            for attempt in (0, 1):
+                pool = self.pool
+                try:
+                    return pool.submit(fn, make_task(slot)).result()
+                except BrokenProcessPool:
+                    if attempt:
+                        raise
+                    with self._lock:
+                        if self.pool is pool:
+                            logger.error("❌ Değerlendirme havuzu çöktü, yeniden kuruluyor")
+                            self.stats["restarts"] += 1
+                            self._spawn()
+        finally:
+            self._free.put(slot)
+
+    def analyze(self, stype, df, config):
+        """strategies.run(stype, df, config) — pencere shared memory'den."""
+        import strategies
+        strat = strategies.get(stype)
+        fields = ("ts",) + (strat.columns if strat else ("close",))
+        n = len(df)
+        if 8 * n * len(fields) > self.slot_bytes:
+            return strategies.run(stype, df, config)     # slota sığmayan pencere: thread'de
+
+        def write(buf):
+            off = 0
+            for f in fields:
+                src = np.ascontiguousarray(df.index if f == "ts" else df[f],
+                                           dtype=np.int64 if f == "ts" else np.float64)
+                buf[off:off + src.nbytes] = src.view(np.uint8)
+                off += src.nbytes
+
+        self.stats["analyze"] += 1
+        return self._call(_analyze, lambda slot: (slot, n, fields, stype, config), write)
+
+    def batch(self, stype, high, low, close, config):
+        """
+        strategies.run_batch(...) — satırlar slot boyuna ve worker sayısına
+        göre parçalanıp havuza paralel dağıtılır.
+        """
+        close = np.asarray(close, dtype=np.float64)
+        rows, bars = close.shape
+        if not rows:
+            return []
+        fit = max(1, self.slot_bytes // (3 * 8 * max(bars, 1)))
+        step = max(1, min(fit, -(-rows // self.workers)))
+        cols = (np.asarray(high, dtype=np.float64), np.asarray(low, dtype=np.float64), close)
+
+        def part(a, b):
+            def write(buf):
+                off = 0
+                for c in cols:
+                    src = np.ascontiguousarray(c[a:b])
+                    buf[off:off + src.nbytes] = src.reshape(-1).view(np.uint8)
+                    off += src.nbytes
+            return self._call(_batch, lambda slot: (slot, (b - a, bars), stype, config), write)
+
+        self.stats["batch"] += 1
+        if step >= rows:
+            return part(0, rows)
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=min(self.workers, -(-rows // step))) as ex:
+            parts = ex.map(lambda a: part(a, min(a + step, rows)), range(0, rows, step))
+            return [r for p in parts for r in p]
+
+    def close(self):
+        with self._lock:
+            if self.pool is not None:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+                self.pool = None
+            if self.shm is not None:
+                self.shm.close()
+                self.shm.unlink()
+                self.shm = None
@@ -0,0 +1,328 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Yerel kline deposu: her (symbol, interval) için sütun başına bir ikili dosya.
+
+    <root>/<SYMBOL>/<interval>/ts.bin      int64  (bar açılış zamanı, ms)
+                               open.bin    float64
+                               high.bin ... volume.bin
+
+Dosyalar append-only; okuma np.memmap ile yapılır ve zaman aralığı
+dilimleri kopyasızdır (searchsorted + slice). Yarım kalmış bir ekleme
+açılışta en kısa sütuna kırpılarak düzeltilir. Boşluk onarımı gibi araya
+ekleme gerektiren işlemler dizini yeniden yazıp atomik olarak değiştirir.
+
+Kullanım:
+    python kline_store.py backfill SOLUSDT@15m XRPUSDT@5m --days 365
+    python kline_store.py repair SOLUSDT@15m
+    python kline_store.py info
+"""
+
+import os, json, shutil, logging
+from threading import Lock
+from time import time
+
+import numpy as np
+import pandas as pd
+
+from resample import NATIVE_MS
+
+logger = logging.getLogger("wunderbot")
+
+KLINE_STORE = os.getenv("KLINE_STORE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "klines"))
+
+INTERVAL_MS = NATIVE_MS   # Binance interval'leri (3m, 2h, 6h, 12h, 3d, 1w dahil)
+COLUMNS = ("ts", "open", "high", "low", "close", "volume")
+DTYPES = {"ts": np.int64, "open": np.float64, "high": np.float64,
+          "low": np.float64, "close": np.float64, "volume": np.float64}
+PAGE = 1000     # Binance tek istekte en fazla 1000 bar
+
+def rows_from_klines(ks):
+    """Binance kline listesi -> {sütun: dizi}."""
+    if not ks:
+        return {c: np.empty(0, dtype=DTYPES[c]) for c in COLUMNS}
+    a = np.array([k[:6] for k in ks], dtype=object)
+    out = {"ts": a[:, 0].astype(np.int64)}
+    for i, c in enumerate(COLUMNS[1:], 1):
+        out[c] = a[:, i].astype(np.float64)
+    return out
+
+def rows_from_df(df):
+    out = {"ts": df.index.as_unit("ms").asi8.astype(np.int64)}
+    for c in COLUMNS[1:]:
+        out[c] = df[c].to_numpy(dtype=np.float64)
+    return out
+
+class KlineSeries:
+    """Tek bir (symbol, interval) serisi."""
+
+    def __init__(self, path, interval):
+        self.path = path
+        self.interval = interval
+        self.step = INTERVAL_MS.get(interval, 60_000)
+        self._lock = Lock()         # memmap görünümü / satır sayısı
+        self._wlock = Lock()        # yazmalar (append / merge) sıralı: son bar kontrolü + yazma tek adım
+        self._maps = None
+        self._recover()
+        os.makedirs(path, exist_ok=True)
+        self._count = self._check()
+
+    # ---- dosya düzeyi ----
+    def _file(self, col, base=None):
+        return os.path.join(base or self.path, f"{col}.bin")
+
+    def _recover(self):
+        """Yarım kalmış yeniden yazmayı geri al / tamamla."""
+        old, tmp = self.path + ".old", self.path + ".tmp"
+        if not os.path.exists(self.path) and os.path.exists(old):
+            os.replace(old, self.path)
+        for p in (old, tmp):
+            if os.path.exists(p):
+                shutil.rmtree(p, ignore_errors=True)
+
+    def _check(self):
+        """Satır sayısı = en kısa sütun; fazlalıklar (yarım ekleme) kırpılır."""
+        sizes = {}
+        for c in COLUMNS:
+            f = self._file(c)
+            sizes[c] = os.path.getsize(f) // 8 if os.path.exists(f) else 0
+        n = min(sizes.values())
+        for c in COLUMNS:
+            f = self._file(c)
+            if not os.path.exists(f):
+                open(f, "wb").close()
+            elif sizes[c] != n or os.path.getsize(f) % 8:
+                with open(f, "r+b") as fh:
+                    fh.truncate(n * 8)
+        return n
+
+    def __len__(self):
+        return self._count
+
+    def _arrays(self):
+        with self._lock:
+            if self._maps is None or len(self._maps["ts"]) != self._count:
+                if self._count == 0:
+                    self._maps = {c: np.empty(0, dtype=DTYPES[c]) for c in COLUMNS}
+                else:
+                    self._maps = {c: np.memmap(self._file(c), dtype=DTYPES[c], mode="r", shape=(self._count,))
+                                  for c in COLUMNS}
+            return self._maps
+
+    # ---- okuma ----
+    @property
+    def first(self):
+        return int(self._arrays()["ts"][0]) if self._count else None
+
+    @property
+    def last(self):
+        return int(self._arrays()["ts"][-1]) if self._count else None
+
+    def range(self, start_ms=None, end_ms=None):
+        """[start_ms, end_ms) açılış zamanlı barlar: {sütun: memmap dilimi} (kopyasız)."""
+        a = self._arrays()
+        ts = a["ts"]
+        i = 0 if start_ms is None else int(np.searchsorted(ts, start_ms, "left"))
+        j = len(ts) if end_ms is None else int(np.searchsorted(ts, end_ms, "left"))
+        return {c: a[c][i:j] for c in COLUMNS}
+
+    def tail(self, n):
+        a = self._arrays()
+        return {c: a[c][-n:] if n else a[c][:0] for c in COLUMNS}
+
+    def frame(self, start_ms=None, end_ms=None, tail=None):
+        """bot.get_klines formatında DataFrame (pandas için kopyalanır)."""
+        a = self.tail(tail) if tail is not None else self.range(start_ms, end_ms)
+        df = pd.DataFrame({c: np.asarray(a[c]) for c in COLUMNS[1:]},
+                          index=pd.to_datetime(np.asarray(a["ts"]), unit="ms"))
+        df.index.name = "timestamp"
+        return df
+
+    def gaps(self, start_ms=None, end_ms=None):
+        """Eksik bar aralıkları: [(ilk_eksik_ms, son_eksik_ms), ...]"""
+        ts = self.range(start_ms, end_ms)["ts"]
+        if len(ts) < 2:
+            return []
+        d = np.diff(ts)
+        idx = np.flatnonzero(d > self.step)
+        return [(int(ts[i]) + self.step, int(ts[i + 1]) - self.step) for i in idx]
+
+    # ---- yazma ----
+    def append(self, rows):
+        """Sadece son bardan yenileri sona ekler; eklenen satır sayısını döner."""
+        ts = rows["ts"]
+        with self._wlock:
+            last = self.last
+            keep = ts > last if last is not None else np.ones(len(ts), dtype=bool)
+            if not keep.any():
+                return 0
+            with self._lock:
+                # ts en son yazılır: yarım kalırsa _check() diğerlerini kırpar
+                for c in COLUMNS[1:] + ("ts",):
+                    with open(self._file(c), "ab") as f:
+                        f.write(np.ascontiguousarray(rows[c][keep], dtype=DTYPES[c]).tobytes())
+                        f.flush()
+                        os.fsync(f.fileno())
+                self._count += int(keep.sum())
+            return int(keep.sum())
+
+    def merge(self, rows):
+        """
+        Araya / başa bar ekle (backfill, boşluk onarımı). Aynı ts'li satırlarda
+        yeni değer geçerlidir. Dizin kopyası yazılıp atomik olarak değiştirilir.
+        """
+        if len(rows["ts"]) == 0:
+            return 0
+        with self._wlock:
+            return self._merge(rows)
+
+    def _merge(self, rows):
+        cur = {c: np.array(v) for c, v in self.range().items()}
+        allr = {c: np.concatenate([cur[c], np.asarray(rows[c], dtype=DTYPES[c])]) for c in COLUMNS}
+        # Sonraki kopya kazanır: ters çevir, ilk görüneni al
+        rev = allr["ts"][::-1]
+        _, first = np.unique(rev, return_index=True)
+        order = len(rev) - 1 - first
+        added = len(order) - self._count
+        tmp, old = self.path + ".tmp", self.path + ".old"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for c in COLUMNS:
+            with open(self._file(c, tmp), "wb") as f:
+                f.write(np.ascontiguousarray(allr[c][order], dtype=DTYPES[c]).tobytes())
+                f.flush()
+                os.fsync(f.fileno())
+        with self._lock:
+            self._maps = None
+            os.replace(self.path, old)
+            os.replace(tmp, self.path)
+            shutil.rmtree(old, ignore_errors=True)
+            self._count = len(order)
+        return added
+
+class KlineStore:
+    def __init__(self, root=None):
+        self.root = root or KLINE_STORE
+        self._series = {}
+        self._lock = Lock()
+
+    def series(self, symbol, interval):
+        key = (symbol.upper(), interval)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = KlineSeries(os.path.join(self.root, key[0], interval), interval)
+                self._series[key] = s
+            return s
+
+    def keys(self):
+        out = []
+        if os.path.isdir(self.root):
+            for sym in sorted(os.listdir(self.root)):
+                d = os.path.join(self.root, sym)
+                for iv in sorted(os.listdir(d)) if os.path.isdir(d) else ():
+                    if iv in INTERVAL_MS:
+                        out.append((sym, iv))
+        return out
+
+# ============== BACKFILL / REPAIR ==============
+def binance_fetch():
+    """(symbol, interval, start_ms, end_ms) -> kline listesi; public REST."""
+    from binance.client import Client
+    client = Client()
+    def fetch(symbol, interval, start_ms, end_ms):
+        return client.get_klines(symbol=symbol, interval=interval, limit=PAGE, startTime=start_ms, endTime=end_ms)
+    return fetch
+
+def _pages(fetch, symbol, interval, start_ms, end_ms):
+    """[start_ms, end_ms] aralığını sayfa sayfa çek; sadece kapanmış barlar."""
+    step = INTERVAL_MS.get(interval, 60_000)
+    now = int(time() * 1000)
+    cur = start_ms
+    while cur <= end_ms:
+        ks = fetch(symbol, interval, cur, end_ms)
+        if not ks:
+            break
+        ks = [k for k in ks if int(k[0]) + step <= now]
+        if ks:
+            yield ks
+        nxt = int(ks[-1][0]) + step if ks else end_ms + 1
+        if nxt <= cur or len(ks) < PAGE:
+            break
+        cur = nxt
+
+def backfill(store, symbol, interval, start_ms, end_ms=None, fetch=None):
+    """Serinin öncesini ve sonrasını tamamla; eklenen bar sayısını döner."""
+    fetch = fetch or binance_fetch()
+    s = store.series(symbol, interval)
+    end_ms = end_ms or int(time() * 1000)
+    added = 0
+    if s.first is not None and start_ms < s.first:
+        # Başa ekleme dizini yeniden yazar: tüm sayfaları topla, tek seferde birleştir
+        ks = [k for page in _pages(fetch, symbol, interval, start_ms, s.first - s.step) for k in page]
+        added += s.merge(rows_from_klines(ks))
+    begin = s.last + s.step if s.last is not None else start_ms
+    for ks in _pages(fetch, symbol, interval, begin, end_ms):
+        added += s.append(rows_from_klines(ks))
+    logger.info(f"💽 {symbol}@{interval}: +{added} bar (toplam {len(s)})")
+    return added
+
+def repair(store, symbol, interval, fetch=None):
+    """Boşlukları REST'ten doldur. Döner: (doldurulan bar, kalan boşluk sayısı)."""
+    fetch = fetch or binance_fetch()
+    s = store.series(symbol, interval)
+    ks = [k for a, b in s.gaps() for page in _pages(fetch, symbol, interval, a, b) for k in page]
+    filled = s.merge(rows_from_klines(ks))
+    left = s.gaps()
+    if left:
+        # Borsa bakımı vb. gerçek boşluklar olabilir
+        logger.warning(f"⚠️  {symbol}@{interval}: {len(left)} boşluk doldurulamadı")
+    return filled, len(left)
+
+def _parse_keys(items):
+    out = []
+    for item in items:
+        for part in item.split(","):
+            if "@" in part:
+                sym, iv = part.strip().split("@", 1)
+                out.append((sym.upper(), iv))
+    return out
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    ap = argparse.ArgumentParser(description="Yerel kline deposu")
+    ap.add_argument("--root", default=KLINE_STORE)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    bp = sub.add_parser("backfill")
+    bp.add_argument("keys", nargs="+", help="SYMBOL@tf")
+    bp.add_argument("--days", type=float, default=365)
+    rp = sub.add_parser("repair")
+    rp.add_argument("keys", nargs="+", help="SYMBOL@tf")
+    sub.add_parser("info")
+    args = ap.parse_args()
+
+    store = KlineStore(args.root)
+    if args.cmd == "backfill":
+        fetch = binance_fetch()
+        start = int(time() * 1000) - int(args.days * 86_400_000)
+        for sym, iv in _parse_keys(args.keys):
+            backfill(store, sym, iv, start, fetch=fetch)
+            repair(store, sym, iv, fetch=fetch)
+    elif args.cmd == "repair":
+        fetch = binance_fetch()
+        for sym, iv in _parse_keys(args.keys):
+            filled, left = repair(store, sym, iv, fetch=fetch)
+            logger.info(f"🩹 {sym}@{iv}: {filled} bar dolduruldu, {left} boşluk kaldı")
+    else:
+        info = {}
+        for sym, iv in store.keys():
+            s = store.series(sym, iv)
+            info[f"{sym}@{iv}"] = {
+                "bars": len(s),
+                "first": str(pd.to_datetime(s.first, unit="ms")) if len(s) else None,
+                "last": str(pd.to_datetime(s.last, unit="ms")) if len(s) else None,
+                "gaps": len(s.gaps()),
+            }
+        print(json.dumps(info, indent=2, ensure_ascii=False))
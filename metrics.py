@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Hafif Prometheus metrikleri (ek bağımlılık yok): Counter, Gauge, Histogram
+ve text exposition formatı (render()). Kayıt işlemi bir kilit + birkaç
+toplama olduğu için her zaman açık kalabilir.
+
+    REQS = Counter("wunderbot_x_total", "açıklama", ["status"])
+    REQS.inc(status="200")
+    with STAGE.time(stage="klines"):
+        ...
+"""
+
+import math
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+
+REGISTRY = []
+_collectors = []
+
+# Saniye cinsinden gecikme kovaları (1ms .. 30s)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _esc(v):
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_esc(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _num(v):
+    if v == math.inf:
+        return "+Inf"
+    if isinstance(v, float) and v.is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._values = {}
+        self._lock = Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(n, "") for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def remove(self, **labels):
+        with self._lock:
+            self._values.pop(self._key(labels), None)
+
+    def _samples(self):
+        with self._lock:
+            items = list(self._values.items())
+        for key, v in items:
+            yield self.name, _labels(self.labelnames, key), v
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        out += [f"{n}{lbl} {_num(v)}" for n, lbl, v in self._samples()]
+        return out
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            st = self._values.get(key)
+            if st is None:
+                st = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            st[0][i] += 1
+            st[1] += value
+            st[2] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(k, (list(v[0]), v[1], v[2])) for k, v in self._values.items()]
+        for key, (counts, total, n) in items:
+            acc = 0
+            for b, c in zip(self.buckets + (math.inf,), counts):
+                acc += c
+                le = 'le="%s"' % _num(b)
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {acc}")
+            lbl = _labels(self.labelnames, key)
+            out.append(f"{self.name}_sum{lbl} {_num(total)}")
+            out.append(f"{self.name}_count{lbl} {n}")
+        return out
+
+class _Timer:
+    __slots__ = ("h", "labels", "t0")
+
+    def __init__(self, h, labels):
+        self.h, self.labels = h, labels
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.h.observe(perf_counter() - self.t0, **self.labels)
+        return False
+
+def register_collector(fn):
+    """
+    Scrape anında çağrılır: fn() -> [(ad, tip, açıklama, [(labels dict, değer), ...]), ...]
+    Başka modüllerin kendi sayaçlarını (örn. dispatcher.stats) dışa açmak için.
+    """
+    _collectors.append(fn)
+
+def render():
+    lines = []
+    for m in REGISTRY:
+        lines += m.render()
+    for fn in _collectors:
+        try:
+            families = fn()
+        except Exception:
+            continue
+        for name, kind, help, samples in families:
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, v in samples:
+                names = tuple(labels)
+                lines.append(f"{name}{_labels(names, tuple(labels[n] for n in names))} {_num(v)}")
+    return "\n".join(lines) + "\n"
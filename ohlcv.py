@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""
+Sıkı OHLCV penceresi: int64 açılış zamanı (ms) + bitişik float64 sütunlar.
+
+bot.get_klines ve ws_feed bunu döner; stratejiler DataFrame gibi kullanır
+(len(df), df["close"], df.iloc[:-1], df.empty, df.index). Sütunlar düz
+NumPy dizileridir, dilimler kopya değil view'dur. Borsa yanıtı tek
+np.array çağrısıyla çözülür; pandas gerekmez.
+
+    w = OHLCV.from_klines(client.get_klines(...))
+    closed = w.iloc[:-1]          # kopyasız
+    w.to_frame()                  # araçlar için pandas DataFrame
+"""
+
+import numpy as np
+
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+class OHLCV:
+    __slots__ = ("ts", "open", "high", "low", "close", "volume")
+
+    def __init__(self, ts, open, high, low, close, volume):
+        self.ts = ts
+        self.open, self.high, self.low, self.close, self.volume = open, high, low, close, volume
+
+    # ---- kurulum ----
+    @classmethod
+    def blank(cls):
+        return cls._from_block(np.empty(0, dtype=np.int64), np.empty((5, 0)))
+
+    @classmethod
+    def _from_block(cls, ts, block):
+        return cls(ts, *block)
+
+    @classmethod
+    def from_klines(cls, ks):
+        """
+        Binance kline listesi (ya da (ts, o, h, l, c, v) satırları) ->
+        tek (5 × n) float64 blok; ms zamanları float64'te birebir temsil edilir.
+        """
+        if not len(ks):
+            return cls.blank()
+        a = np.array([k[:6] for k in ks], dtype=np.float64)
+        return cls._from_block(a[:, 0].astype(np.int64), np.ascontiguousarray(a[:, 1:6].T))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """{"ts", "open", ...} sütun sözlüğü (kline_store) -> kopyasız pencere."""
+        return cls(rows["ts"], *(rows[c] for c in COLUMNS))
+
+    @classmethod
+    def from_frame(cls, df):
+        if df is None or df.empty:
+            return cls.blank()
+        ts = df.index.as_unit("ms").asi8.astype(np.int64)
+        return cls(ts, *(df[c].to_numpy(dtype=np.float64) for c in COLUMNS))
+
+    def to_frame(self):
+        import pandas as pd
+        df = pd.DataFrame({c: np.asarray(getattr(self, c)) for c in COLUMNS},
+                          index=pd.to_datetime(np.asarray(self.ts), unit="ms"))
+        df.index.name = "timestamp"
+        return df
+
+    def rows(self):
+        """kline_store.append formatı."""
+        return {"ts": self.ts, **{c: getattr(self, c) for c in COLUMNS}}
+
+    # ---- DataFrame benzeri erişim ----
+    def __len__(self):
+        return len(self.ts)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return OHLCV(self.ts[key], *(getattr(self, c)[key] for c in COLUMNS))
+        if key == "timestamp":
+            return self.ts
+        if key in COLUMNS:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    @property
+    def iloc(self):
+        return self
+
+    @property
+    def empty(self):
+        return len(self.ts) == 0
+
+    @property
+    def index(self):
+        return self.ts
+
+    @property
+    def last_open(self):
+        return int(self.ts[-1]) if len(self.ts) else None
+
+    def since(self, ts_ms):
+        """Açılışı ts_ms'ten sonraki barlar (view)."""
+        return self[int(np.searchsorted(self.ts, ts_ms, "right")):]
+
+    def has(self, ts_ms):
+        if ts_ms is None:
+            return False
+        i = int(np.searchsorted(self.ts, ts_ms, "left"))
+        return i < len(self.ts) and int(self.ts[i]) == ts_ms
+
+    def merge(self, new, keep=None):
+        """
+        new'in ilk barından önceki barlar + new (aynı açılışlı bar yenisiyle
+        değişir); en fazla son keep bar. Tek blok ayrılır.
+        """
+        if not len(new):
+            return self if keep is None or len(self) <= keep else self[-keep:]
+        cut = int(np.searchsorted(self.ts, new.ts[0], "left"))
+        n = cut + len(new)
+        start = 0 if keep is None else max(0, n - keep)
+        old = self[min(start, cut):cut]
+        new = new[max(0, start - cut):]
+        ts = np.concatenate([old.ts, new.ts])
+        block = np.empty((5, len(ts)))
+        k = len(old)
+        for i, c in enumerate(COLUMNS):
+            block[i, :k] = getattr(old, c)
+            block[i, k:] = getattr(new, c)
+        return OHLCV._from_block(ts, block)
+
+    def __repr__(self):
+        if not len(self):
+            return "OHLCV(0 bar)"
+        return f"OHLCV({len(self)} bar, {int(self.ts[0])}..{int(self.ts[-1])})"
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parametre taraması (grid search) + walk-forward.
+
+Akış:
+  1. OHLCV dizileri tek bir shared memory bloğuna yazılır; worker'lar
+     pickle'lamadan aynı bloğu okur.
+  2. Izgaradaki her noktanın kullandığı indikatörler (cached() anahtarları)
+     küçük bir sahte seride kaydedilir; tekil (ad, parametre) kümesi çıkar.
+  3. Her tekil indikatör process havuzunda BİR kez hesaplanıp ikinci bir
+     shared memory bloğuna yazılır (örn. ema(close, 12) tüm noktalar için bir kere).
+  4. Izgara noktaları havuza dağıtılır; her worker indikatörleri hazır
+     memo'dan okur, sadece karar + durum makinesi çalışır.
+
+Kullanım:
+    python optimize.py configs/SOLUSDT.15m.json --days 365 --splits 4
+    python optimize.py configs/XRPUSDT.5m.json --csv xrp.csv --grid grid.json --metric calmar --out sonuc.csv
+
+Çıktı CSV'sindeki parametre sütunları sheet başlıklarıyla aynıdır.
+"""
+
+import os, sys, json, csv, logging, itertools
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+
+import numpy as np
+
+import strategies
+from strategies import REGISTRY, GRIDS, MIN_BARS
+from strategies.indicators import IndicatorMemo, memo_scope, compute, DEPENDS
+from backtest import step_ms, load_history, simulate, equity_curve, summarize
+
+logger = logging.getLogger("wunderbot")
+
+SCOPE = "sweep"                 # memo anahtarlarındaki veri kapsamı
+ROWS = ("open", "high", "low", "close", "volume", "ts")
+
+# Anlamsız kombinasyonları ele
+VALID = {
+    "tmh": lambda p: p.get("ema_fast", 12) < p.get("ema_slow", 26),
+}
+
+METRICS = {
+    "return":        lambda m: m["total_return_pct"],
+    "calmar":        lambda m: m["total_return_pct"] / max(m["max_drawdown_pct"], 1.0),
+    "profit_factor": lambda m: m["profit_factor"] or 0.0,
+    "win_rate":      lambda m: m["win_rate"],
+}
+
+# ============== GRID ==============
+def grid_points(stype, grid):
+    keys = sorted(grid)
+    valid = VALID.get(stype, lambda p: True)
+    pts = [dict(zip(keys, vals)) for vals in itertools.product(*(grid[k] for k in keys))]
+    return [p for p in pts if valid(p)]
+
+class _Recorder:
+    """cached() çağrılarını kaydeden memo: (ad, params) -> çıktı dtype'ları."""
+
+    def __init__(self):
+        self.keys = {}
+
+    def get(self, key, fn):
+        val = fn()
+        _, name, params = key
+        if (name, params) not in self.keys:
+            vals = val if isinstance(val, tuple) else (val,)
+            self.keys[(name, params)] = (isinstance(val, tuple), [v.dtype.str for v in vals])
+        return val
+
+def plan(stype, base, points):
+    """
+    Her noktayı küçük sahte seride çalıştırıp kullandığı indikatörleri topla.
+    Döner: ({(ad, params): (tuple_mu, dtypes)}, nokta başına indikatör sayısı toplamı)
+    """
+    rng = np.random.default_rng(0)
+    c = 100 + np.cumsum(rng.normal(0, 1, MIN_BARS + 10))
+    h, l = c + 1, c - 1
+    layout, naive = {}, 0
+    for p in points:
+        rec = _Recorder()
+        with memo_scope(rec, SCOPE):
+            strategies.series(stype, h, l, c, {**base, **p})
+        naive += len(rec.keys)
+        layout.update(rec.keys)
+    return layout, naive
+
+def _groups(layout):
+    """Birbirine bağımlı indikatörler (supertrend -> atr) aynı işe düşsün."""
+    groups = {}
+    for name, params in layout:
+        dep = DEPENDS.get(name)
+        root = dep(*params) if dep else (name, params)
+        groups.setdefault(root, []).append((name, params))
+    # Bağımlılık önce hesaplansın
+    return [sorted(g, key=lambda k: k != root) for root, g in groups.items()]
+
+# ============== SHARED MEMORY ==============
+def _create(nbytes):
+    return shared_memory.SharedMemory(create=True, size=max(int(nbytes), 1))
+
+_W = {}          # worker durumu: shm'ler, diziler, slot tablosu, memo
+
+def _init(ohlcv_name, ind_name, n, slots):
+    _W["shm"] = [shared_memory.SharedMemory(name=ohlcv_name), shared_memory.SharedMemory(name=ind_name)]
+    arr = np.ndarray((len(ROWS), n), dtype=np.float64, buffer=_W["shm"][0].buf)
+    _W["data"] = {k: arr[i] for i, k in enumerate(ROWS)}
+    _W["ind"] = _W["shm"][1].buf
+    _W["n"] = n
+    _W["slots"] = slots
+    _W["memo"] = None
+
+def _views(key):
+    is_tuple, outs = _W["slots"][key]
+    n = _W["n"]
+    views = tuple(np.ndarray((n,), dtype=dt, buffer=_W["ind"], offset=slot * n * 8) for slot, dt in outs)
+    return views if is_tuple else views[0]
+
+def _compute_group(keys):
+    """Bir grup indikatörü hesapla ve shm slotlarına yaz (faz 1)."""
+    local = {}
+    def get(name, params):
+        if (name, params) not in local:
+            local[(name, params)] = compute(name, params, _W["data"], get)
+        return local[(name, params)]
+    for key in keys:
+        val = get(*key)
+        dst = _views(key)
+        for d, v in zip(dst if isinstance(dst, tuple) else (dst,), val if isinstance(val, tuple) else (val,)):
+            d[:] = v
+    return len(keys)
+
+def _memo():
+    """Faz 1 sonuçlarıyla önceden doldurulmuş memo (worker başına bir kez)."""
+    if _W["memo"] is None:
+        memo = IndicatorMemo()
+        for key in _W["slots"]:
+            val = _views(key)
+            for v in (val if isinstance(val, tuple) else (val,)):
+                v.flags.writeable = False
+            memo._data[(SCOPE,) + key] = val
+        _W["memo"] = memo
+    return _W["memo"]
+
+def _evaluate(task):
+    """Faz 2: bir grup ızgara noktası -> segment metrikleri."""
+    stype, base, points, bounds, alerts, step, fee, cooldown = task
+    d = _W["data"]
+    h, l, c = d["high"], d["low"], d["close"]
+    close_ms = d["ts"].astype(np.int64) + step
+    memo = _memo()
+    before = memo.misses
+    rows = []
+    for p in points:
+        with memo_scope(memo, SCOPE):
+            codes = strategies.series(stype, h, l, c, {**base, **p})
+        segs = []
+        for a, b in bounds:
+            pos, trades = simulate(codes[a:b], c[a:b], close_ms[a:b], alerts, "NONE", cooldown, fee)
+            segs.append(summarize(equity_curve(pos, c[a:b], fee), trades))
+        rows.append({"params": p, "segments": segs})
+    return rows, memo.misses - before
+
+# ============== SWEEP ==============
+def sweep(pair, df, grid=None, splits=0, metric="calmar", workers=None, fee=0.0, cooldown_sec=90):
+    base = dict(pair.get("strategy", {}) or {})
+    stype = (base.get("type") or "tmh").lower()
+    if stype not in REGISTRY:
+        raise ValueError(f"bilinmeyen strateji: {stype}")
+    grid = grid or GRIDS.get(stype) or {}
+    points = grid_points(stype, grid)
+    if not points:
+        raise ValueError("ızgara boş")
+    score = METRICS[metric]
+    workers = workers or os.cpu_count() or 1
+    n = len(df)
+    step = step_ms(pair.get("timeframe"))
+
+    # Segmentler: [tam dönem] + walk-forward için splits+1 eşit parça
+    edges = np.linspace(0, n, splits + 2).astype(int) if splits else []
+    bounds = [(0, n)] + [(int(edges[i]), int(edges[i + 1])) for i in range(len(edges) - 1)]
+
+    t0 = perf_counter()
+    layout, naive = plan(stype, base, points)
+    slots, nslot = {}, 0
+    for key, (is_tuple, dtypes) in layout.items():
+        slots[key] = (is_tuple, [(nslot + i, dt) for i, dt in enumerate(dtypes)])
+        nslot += len(dtypes)
+
+    ohlcv = _create(len(ROWS) * n * 8)
+    ind = _create(nslot * n * 8)
+    try:
+        arr = np.ndarray((len(ROWS), n), dtype=np.float64, buffer=ohlcv.buf)
+        for i, k in enumerate(ROWS[:-1]):
+            arr[i] = df[k].to_numpy(dtype=np.float64)
+        arr[-1] = df.index.as_unit("ms").asi8
+        del arr
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init,
+                                 initargs=(ohlcv.name, ind.name, n, slots)) as ex:
+            groups = _groups(layout)
+            list(ex.map(_compute_group, groups))
+            t1 = perf_counter()
+
+            chunk = max(1, len(points) // (workers * 4))
+            tasks = [(stype, base, points[i:i + chunk], bounds, pair.get("alerts"), step, fee, cooldown_sec)
+                     for i in range(0, len(points), chunk)]
+            rows, misses = [], 0
+            for r, m in ex.map(_evaluate, tasks):
+                rows.extend(r)
+                misses += m
+        t2 = perf_counter()
+    finally:
+        for shm in (ohlcv, ind):
+            shm.close()
+            shm.unlink()
+
+    # Sıralama: walk-forward varsa eğitim segmentlerinin ortalaması (son parça hiç
+    # seçimde kullanılmaz), yoksa tam dönem. test_score sadece kontrol için raporlanır;
+    # ona göre sıralamak parametreyi test verisinde seçmek olur.
+    for r in rows:
+        full = r["segments"][0]
+        r["full"] = full
+        r["score"] = score(full)
+        if splits:
+            r["seg_scores"] = [score(m) for m in r["segments"][1:]]
+            r["train_score"] = float(np.mean(r["seg_scores"][:-1]))
+            r["test_score"] = float(np.mean(r["seg_scores"][1:]))
+    key = (lambda r: (r["train_score"], r["score"])) if splits else (lambda r: r["score"])
+    rows.sort(key=key, reverse=True)
+
+    wf = []
+    for j in range(splits):
+        best = max(rows, key=lambda r: r["seg_scores"][j])
+        a, b = bounds[j + 1], bounds[j + 2]
+        wf.append({
+            "train": [str(df.index[a[0]]), str(df.index[a[1] - 1])],
+            "test":  [str(df.index[b[0]]), str(df.index[b[1] - 1])],
+            "params": best["params"],
+            "train_score": round(best["seg_scores"][j], 4),
+            "test_score": round(best["seg_scores"][j + 1], 4),
+            "test_return_pct": best["segments"][j + 2]["total_return_pct"],
+        })
+    oos = float(np.prod([1 + w["test_return_pct"] / 100 for w in wf]) - 1) * 100 if wf else None
+
+    stats = {
+        "strategy": stype,
+        "points": len(points),
+        "bars": n,
+        "workers": workers,
+        "indicators": len(layout),
+        "indicator_calls_naive": naive,
+        "indicator_recomputed": misses,
+        "indicator_sec": round(t1 - t0, 3),
+        "eval_sec": round(t2 - t1, 3),
+        "points_per_sec": round(len(points) / max(t2 - t1, 1e-9), 1),
+        "walk_forward_oos_return_pct": round(oos, 3) if oos is not None else None,
+    }
+    return rows, wf, stats
+
+def write_results(path, pair, rows, splits=0):
+    stype = (pair.get("strategy", {}).get("type") or "tmh").lower()
+    pkeys = sorted(rows[0]["params"]) if rows else []
+    cols = ["rank", "symbol", "timeframe", "strategy.type"] + pkeys + ["score"]
+    if splits:
+        cols += ["train_score", "test_score"] + [f"seg{i}" for i in range(1, splits + 2)]
+    cols += ["total_return_pct", "max_drawdown_pct", "trades", "win_rate", "profit_factor"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(cols)
+        for i, r in enumerate(rows, 1):
+            line = [i, pair.get("symbol"), pair.get("timeframe"), stype] + [r["params"][k] for k in pkeys]
+            line.append(round(r["score"], 4))
+            if splits:
+                line += [round(r["train_score"], 4), round(r["test_score"], 4)] + [round(s, 4) for s in r["seg_scores"]]
+            m = r["full"]
+            line += [m["total_return_pct"], m["max_drawdown_pct"], m["trades"], m["win_rate"], m["profit_factor"]]
+            w.writerow(line)
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    ap = argparse.ArgumentParser(description="Strateji parametre taraması")
+    ap.add_argument("config", help="configs/*.json dosyası (taban ayarlar + alert'ler)")
+    ap.add_argument("--csv", help="timestamp,open,high,low,close,volume dosyası (yoksa Binance'ten indirilir)")
+    ap.add_argument("--store", nargs="?", const=True,
+                    help="yerel kline deposundan oku; dizin verilmezse KLINE_STORE (bkz. kline_store.py)")
+    ap.add_argument("--days", type=float, default=365)
+    ap.add_argument("--type", help="strateji tipini config'tekinin yerine kullan")
+    ap.add_argument("--grid", help='JSON ızgara: {"ema_fast": [8, 12], ...} (varsayılan: strategies.GRIDS)')
+    ap.add_argument("--splits", type=int, default=0, help="walk-forward pencere sayısı (0: kapalı)")
+    ap.add_argument("--metric", choices=sorted(METRICS), default="calmar")
+    ap.add_argument("--workers", type=int)
+    ap.add_argument("--fee", type=float, default=0.0, help="işlem başına komisyon, yüzde")
+    ap.add_argument("--cooldown", type=float, default=90)
+    ap.add_argument("--out", help="sıralı sonuç CSV'si")
+    ap.add_argument("--top", type=int, default=10)
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        pair = json.load(f)
+    if args.type:
+        pair.setdefault("strategy", {})["type"] = args.type
+    grid = None
+    if args.grid:
+        with open(args.grid, "r", encoding="utf-8") as f:
+            grid = json.load(f)
+    df = load_history(pair, args.days, args.csv, args.store)
+    logger.info(f"📈 {pair['symbol']} {pair['timeframe']}: {len(df)} bar")
+
+    rows, wf, stats = sweep(pair, df, grid, args.splits, args.metric, args.workers,
+                            fee=args.fee / 100, cooldown_sec=args.cooldown)
+    stype = stats["strategy"]
+    out = args.out or f"optimize_{pair['symbol']}_{pair['timeframe']}_{stype}.csv"
+    write_results(out, pair, rows, args.splits)
+    if wf:
+        with open(os.path.splitext(out)[0] + ".wf.json", "w", encoding="utf-8") as f:
+            json.dump(wf, f, indent=2, ensure_ascii=False)
+
+    logger.info(f"🏁 {stats['points']} nokta, {stats['indicators']} tekil indikatör "
+                f"(naif: {stats['indicator_calls_naive']}) — {stats['points_per_sec']} nokta/sn → {out}")
+    for i, r in enumerate(rows[:args.top], 1):
+        wf_s = f" eğitim={r['train_score']:.3f} test={r['test_score']:.3f}" if "train_score" in r else ""
+        logger.info(f"  {i:>2}. {r['params']} skor={r['score']:.3f}{wf_s} "
+                    f"getiri=%{r['full']['total_return_pct']} dd=%{r['full']['max_drawdown_pct']}")
+    json.dump(stats, sys.stdout, indent=2, ensure_ascii=False)
+    print()
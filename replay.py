@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Hızlandırılmış replay: alert hattının yük testi (gerçek webhook yok).
+
+bot.py gerçek yoluyla çalışır: WS kline akışı → bar kapanışı → check_pair →
+emit_alert (can_send / update_after_send) → dispatcher ya da send_wt → WT.
+Borsa ve WT yereldir:
+
+  - ReplayExchange: REST (get_klines, warm-up geçmişi) + Binance combined
+    stream taklidi WS sunucusu. Olaylar simülasyon saatine göre `speed`
+    kat hızlı yollanır; bot'un saati (cooldown, eksik bar hesabı) de aynı
+    simülasyon saatidir.
+  - wt_dispatch.FakeWTServer: gelen alert'leri varış zamanıyla kaydeder
+    (istenirse hata oranı / gecikme ile).
+
+Rapor (JSON): alert/sn (genel ve en yoğun saniye), bar kapanışından
+webhook'a gecikme yüzdelikleri, değerlendirilmeyen barlar, kaybolan /
+çift giden alert'ler.
+
+Kullanım:
+    python replay.py --pairs 300 --tf 15m --bars 50 --speed 1000 --burst
+    python replay.py --pairs 100 --tf 1m,5m --fail-rate 0.1 --wt-latency 0.05
+    python replay.py --file kayit.jsonl --speed 100     # ws_feed.py record çıktısı
+    python replay.py --sync                             # WT_ASYNC=false: send_wt yolu
+"""
+
+import os, json, math, random, asyncio, logging, tempfile
+from bisect import bisect_right
+from collections import defaultdict
+from threading import Thread, Event, Lock, local
+from time import time, sleep, perf_counter, monotonic
+
+from resample import NATIVE_MS
+from ws_feed import STREAMS_PER_CONN, kline_msg, stream_name, load_recording, parse_kline
+
+logger = logging.getLogger("wunderbot")
+
+# ============== SERİ ==============
+def synthetic(keys, warm, bars, ticks=1, seed=1, burst=False, start_ms=None):
+    """
+    Her key için warm geçmiş bar + bars canlı bar (rastgele yürüyüş + trend
+    dalgası). burst: tüm key'ler aynı fiyat yolunu izler, aynı barda sinyal
+    üretir. Döner: ({key: [satır]}, [(at, key, msg, kapanış mı)], başlangıç ms)
+    """
+    step_max = max(NATIVE_MS[i] for _, i in keys)
+    start_ms = start_ms or (int(time() * 1000) // step_max - 1) * step_max
+    history, events = {}, []
+    for n, (symbol, interval) in enumerate(keys):
+        step = NATIVE_MS[interval]
+        rnd = random.Random(seed if burst else seed * 100_003 + n)
+        p = 100.0 if burst else 50.0 + 100 * rnd.random()
+        rows = []
+        for i in range(-warm, bars):
+            t = start_ms + i * step
+            o = h = l = p
+            for j in range(ticks + 1):
+                p = max(0.01, p * (1 + rnd.gauss(0, 0.003) + 0.004 * math.sin(i / 12.0)))
+                h, l = max(h, p), min(l, p)
+                bar = (t, o, h, l, p, 1.0 + rnd.random())
+                if i >= 0:
+                    at = t + (step * (j + 1)) // (ticks + 1)
+                    events.append((at, (symbol, interval), kline_msg(symbol, interval, bar, j == ticks), j == ticks))
+            if i < 0:
+                rows.append(bar)
+        history[(symbol, interval)] = rows
+    events.sort(key=lambda e: e[0])
+    return history, events, start_ms
+
+def recorded(path):
+    """ws_feed.py record çıktısı -> [(at, key, msg, kapanış mı)]"""
+    events = []
+    for at, msg in load_recording(path):
+        parsed = parse_kline(msg)
+        if parsed:
+            symbol, interval, bar, closed = parsed
+            events.append((at, (symbol, interval), msg, closed))
+    if not events:
+        raise SystemExit(f"{path}: kline olayı yok")
+    return events
+
+def split(events, warm):
+    """
+    Her key'in ilk warm kapanmış barı REST geçmişi, sonrası canlı akış.
+    Kayıt warm-up'ı kapsamıyorsa stratejiler kısa pencereyle çalışır.
+    """
+    closes = defaultdict(list)
+    for at, k, msg, closed in events:
+        if closed:
+            closes[k].append((at, parse_kline(msg)[2]))
+    start = max(c[min(warm, len(c)) - 1][0] for c in closes.values()) if closes else events[0][0]
+    history = {k: [b for at, b in c if at <= start] for k, c in closes.items()}
+    return history, [e for e in events if e[0] > start], start
+
+# ============== BORSA ==============
+class ReplayExchange:
+    """
+    REST: get_klines simülasyon saatine kadar kapanmış barlar + oluşan mum.
+    WS: /stream?streams=... — tüm bağlantılar bağlanınca saat başlar,
+    her olay (at - start) / speed sonra yollanır.
+    """
+
+    def __init__(self, history, events, start_ms, speed=1000.0, host="127.0.0.1", port=0):
+        self.start_ms = start_ms
+        self.speed = speed
+        self.host, self.port = host, port
+        self.response = None
+        self.calls = 0
+        self._rows = {k: list(v) for k, v in history.items()}
+        for at, k, msg, closed in events:
+            if closed:
+                _, _, bar, _ = parse_kline(msg)
+                self._rows.setdefault(k, []).append(bar)
+        self._opens = {k: [r[0] for r in v] for k, v in self._rows.items()}
+        self._events = [(at, stream_name(*k), json.dumps(msg), (k, parse_kline(msg)[2][0]) if closed else None)
+                        for at, k, msg, closed in events]
+        self.span_ms = (events[-1][0] - start_ms) if events else 0
+        self.expect_conns = -(-len({k for _, k, _, _ in events}) // STREAMS_PER_CONN)
+        self.sent = {}            # (key, bar açılışı) -> kapanış mesajının gittiği an (time())
+        self.lag_max = 0.0        # takvimin gerisinde kalma (sn, duvar saati)
+        self.done = Event()
+        self._t0 = self.t0_wall = None
+        self._conns = 0
+        self._finished = 0
+        self._lock = Lock()
+
+    # ---- saat ----
+    def now_ms(self):
+        if self._t0 is None:
+            return self.start_ms
+        return self.start_ms + (perf_counter() - self._t0) * self.speed * 1000
+
+    def now(self):
+        return self.now_ms() / 1000
+
+    # ---- REST ----
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        with self._lock:
+            self.calls += 1
+        k = (symbol, interval)
+        rows, opens = self._rows.get(k, []), self._opens.get(k, [])
+        step = NATIVE_MS[interval]
+        now = self.now_ms()
+        hi = bisect_right(opens, now - step)            # kapanmış barlar
+        lo = bisect_right(opens, startTime - 1) if startTime is not None else 0
+        out = [[r[0], *r[1:6], r[0] + step - 1] for r in rows[lo:hi]]
+        if hi and rows[hi - 1][0] + step <= now:
+            c = rows[hi - 1][4]
+            t = rows[hi - 1][0] + step
+            out.append([t, c, c, c, c, 0.0, t + step - 1])   # oluşan mum
+        return out[:limit] if startTime is not None else out[-limit:]
+
+    # ---- WS ----
+    async def _handler(self, ws):
+        from urllib.parse import urlparse, parse_qs
+        wanted = set(parse_qs(urlparse(ws.request.path).query).get("streams", [""])[0].split("/"))
+        mine = [e for e in self._events if e[1] in wanted]
+        self._conns += 1
+        if self._conns >= self.expect_conns and self._t0 is None:
+            self._t0, self.t0_wall = perf_counter(), time()
+            self._go.set()
+        await self._go.wait()
+        for at, _, raw, ck in mine:
+            due = self._t0 + (at - self.start_ms) / 1000 / self.speed
+            delay = due - perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                self.lag_max = max(self.lag_max, -delay)
+            await ws.send(raw)
+            if ck:
+                self.sent[ck] = time()
+        self._finished += 1
+        if self._finished >= self.expect_conns:
+            self.done.set()
+        await ws.wait_closed()
+
+    async def _serve(self, ready):
+        from websockets.asyncio.server import serve
+        self._go = asyncio.Event()
+        async with serve(self._handler, self.host, self.port, max_size=2**22) as server:
+            self.port = server.sockets[0].getsockname()[1]
+            ready.set()
+            await server.serve_forever()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def start(self):
+        ready = Event()
+        Thread(target=lambda: asyncio.run(self._serve(ready)), name="replay-exchange", daemon=True).start()
+        ready.wait(10)
+        return self
+
+# ============== ÇALIŞTIRMA ==============
+def _pct(xs, q):
+    return round(xs[min(len(xs) - 1, int(len(xs) * q))] * 1000, 1) if xs else None
+
+def run(keys=None, warm=None, bars=50, speed=1000.0, burst=False, strategy="tmh", ticks=1,
+        file=None, fail_rate=0.0, wt_latency=0.0, sync=False, seed=1, settle=2.0):
+    """
+    keys: [(SYMBOL, interval)]; warm: geçmiş bar (varsayılan stratejilerin
+    warm-up'ı). bot modülü burada (env kurulduktan sonra) import edilir.
+    """
+    from wt_dispatch import FakeWTServer
+    from bench import BENCH_CONFIGS
+
+    wt = FakeWTServer(fail_rate=fail_rate, latency=wt_latency).start()
+    tmp = tempfile.mkdtemp(prefix="wunderreplay-")
+    os.environ.update({
+        "WT_URL": wt.url, "WT_ASYNC": "false" if sync else "true", "STATE_DB": "", "KLINE_STORE": "",
+        "OUTBOX_PATH": os.path.join(tmp, "outbox.jsonl"), "BINANCE_WEIGHT_LIMIT": "100000000",
+        "DATA_SOURCE": "ws", "SHARD_STORE": "",
+    })
+    import bot
+
+    # ---- seri + pariteler ----
+    types = [strategy] if burst else list(BENCH_CONFIGS)
+    def pairs_for(ks):
+        out = []
+        for n, (symbol, interval) in enumerate(ks):
+            code = f"{symbol}_{interval}"
+            out.append({
+                "symbol": symbol, "timeframe": interval, "enabled": True, "initial_position": "NONE",
+                "strategy": dict(BENCH_CONFIGS.get(types[n % len(types)], {"type": types[n % len(types)]}),
+                                 signal_on_close=True),
+                "alerts": {k: f"{k.upper()}_{code}" for k in ("enter_long", "exit_long", "enter_short", "exit_short")},
+            })
+        return out
+
+    if file:
+        events = recorded(file)
+        keys = sorted({k for _, k, _, _ in events})
+    pairs = pairs_for(keys)
+    warm = warm or max(bot.bars_needed(p) for p in pairs) + 5
+    if file:
+        history, events, start_ms = split(events, warm)
+    else:
+        history, events, start_ms = synthetic(keys, warm, bars, ticks, seed, burst)
+
+    ex = ReplayExchange(history, events, start_ms, speed).start()
+
+    # ---- bot: sahte borsa, simülasyon saati ----
+    bot.binance_client._client = ex
+    bot.time = ex.now
+    bot.kline_feed = None
+    svc = bot.config_service
+    svc.pairs, svc.source, svc.checked, svc.ttl = pairs, "replay", monotonic(), float("inf")
+    with bot._pos_lock:
+        bot.pos_state.clear()
+        for p in pairs:
+            bot.pos_state[bot.key_of(p)] = {"pos": "NONE", "last_sig": None, "ts": 0}
+
+    # ---- ölçüm kancaları (davranışa dokunmaz) ----
+    evals, accepted = defaultdict(int), []
+    cur, lock = local(), Lock()
+    act, emit = bot._act, bot.emit_alert
+
+    def _act(pair, pair_key, result, df_in):
+        cur.bar = (pair["symbol"], bot.interval_of(pair["timeframe"])), int(df_in.ts[-1])
+        with lock:
+            evals[cur.bar] += 1
+        return act(pair, pair_key, result, df_in)
+
+    def emit_alert(pair_key, signal, code, allowed=None):
+        at = time()
+        ok = emit(pair_key, signal, code, allowed)
+        if ok:
+            with lock:
+                accepted.append((code, getattr(cur, "bar", None), at))
+        return ok
+
+    bot._act, bot.emit_alert = _act, emit_alert
+
+    # ---- çalıştır ----
+    import ws_feed
+    ws_feed.WS_URL = ex.url
+    t0 = time()
+    if not sync:
+        bot.get_dispatcher()
+    bot.start_stream()
+    if not ex.done.wait(ex.span_ms / 1000 / speed * 3 + 60):
+        logger.warning("⚠️  Replay akışı süresinde bitmedi")
+    # Son kapanışların değerlendirmesi / gönderimi otursun
+    last, quiet = -1, monotonic()
+    while monotonic() - quiet < settle:
+        n = sum(evals.values()) + len(wt.received)
+        if n != last:
+            last, quiet = n, monotonic()
+        sleep(0.1)
+    if not sync:
+        bot.get_dispatcher().drain(timeout=60)
+    sleep(0.2)
+    wall = time() - t0
+
+    # ---- rapor ----
+    expected = {ck for ck in ex.sent if ck[0] in {(p["symbol"], p["timeframe"]) for p in pairs}}
+    by_code = defaultdict(list)
+    for code, bar, at in accepted:
+        by_code[code].append((at, bar))
+    got = defaultdict(list)
+    for rec in list(wt.received):
+        got[(rec["payload"] or {}).get("code")].append(rec["at"])
+    lat, decide, dropped, dup = [], [], 0, 0
+    for code in by_code.keys() | got.keys():
+        acc, rcv = sorted(by_code.get(code, [])), sorted(got.get(code, []))
+        dropped += max(0, len(acc) - len(rcv))
+        dup += max(0, len(rcv) - len(acc))
+        for (at, bar), r_at in zip(acc, rcv):
+            if bar in ex.sent:
+                lat.append(r_at - ex.sent[bar])
+                decide.append(at - ex.sent[bar])
+    lat.sort()
+    decide.sort()
+    recv = sorted(a for v in got.values() for a in v)
+    peak, j = 0, 0
+    for i, a in enumerate(recv):            # en yoğun 1 sn'lik pencere
+        while recv[j] <= a - 1.0:
+            j += 1
+        peak = max(peak, i - j + 1)
+    same_bar = defaultdict(int)
+    for code, bar, _ in accepted:
+        same_bar[(code, bar)] += 1
+    disp = bot._dispatcher.snapshot() if bot._dispatcher else None
+    return {
+        "pairs": len(pairs),
+        "speed": speed,
+        "burst": burst,
+        "sim_hours": round(ex.span_ms / 3_600_000, 2),
+        "wall_s": round(wall, 2),
+        "closes_sent": len(expected),
+        "exchange_lag_max_s": round(ex.lag_max, 3),
+        "bars_evaluated": sum(1 for ck in expected if evals.get(ck)),
+        "bars_missed": len(expected - evals.keys()),
+        "bars_evaluated_twice": sum(1 for v in evals.values() if v > 1),
+        "alerts_accepted": len(accepted),
+        "alerts_received": len(recv),
+        "alerts_dropped": dropped,
+        "alerts_duplicate": dup,
+        "alerts_same_bar_twice": sum(1 for v in same_bar.values() if v > 1),
+        "alerts_per_sec": round(len(recv) / max(recv[-1] - (ex.t0_wall or t0), 1e-9), 1) if recv else 0.0,
+        "alerts_per_sec_peak": peak,
+        "latency_ms": {"p50": _pct(lat, 0.5), "p90": _pct(lat, 0.9), "p99": _pct(lat, 0.99),
+                       "max": _pct(lat, 1.0)},
+        "decision_ms": {"p50": _pct(decide, 0.5), "p99": _pct(decide, 0.99)},
+        "dispatcher": disp,
+        "wt_fail_rate": fail_rate,
+    }
+
+if __name__ == "__main__":
+    import argparse
+    ap = argparse.ArgumentParser(description="Hızlandırılmış replay ile alert hattı yük testi")
+    ap.add_argument("--pairs", type=int, default=300)
+    ap.add_argument("--tf", default="15m", help="timeframe listesi, virgülle (pariteler sırayla dağılır)")
+    ap.add_argument("--bars", type=int, default=50, help="canlı (replay edilen) bar sayısı")
+    ap.add_argument("--warm", type=int, help="REST geçmişi (varsayılan: strateji warm-up'ı)")
+    ap.add_argument("--speed", type=float, default=1000.0)
+    ap.add_argument("--ticks", type=int, default=1, help="bar başına ara güncelleme")
+    ap.add_argument("--burst", action="store_true", help="tüm pariteler aynı fiyat yolu + strateji: aynı barda sinyal")
+    ap.add_argument("--strategy", default="tmh", help="--burst'te kullanılacak strateji")
+    ap.add_argument("--file", help="ws_feed.py record ile alınmış JSONL")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="sahte WT'nin 503 oranı")
+    ap.add_argument("--wt-latency", type=float, default=0.0, help="sahte WT yanıt gecikmesi (sn)")
+    ap.add_argument("--sync", action="store_true", help="WT_ASYNC=false (send_wt)")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--out")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING,
+                        format="%(asctime)s | %(levelname)s | %(message)s")
+    tfs = [t.strip() for t in args.tf.split(",") if t.strip()]
+    bad = [t for t in tfs if t not in NATIVE_MS]
+    if bad:
+        raise SystemExit(f"desteklenmeyen timeframe: {', '.join(bad)}")
+    keys = [(f"SIM{i:04d}USDT", tfs[i % len(tfs)]) for i in range(args.pairs)]
+    res = run(keys, args.warm, args.bars, args.speed, args.burst, args.strategy, args.ticks,
+              args.file, args.fail_rate, args.wt_latency, args.sync, args.seed)
+    text = json.dumps(res, indent=2, ensure_ascii=False)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
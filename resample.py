@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Çoklu timeframe: sembol başına tek taban akıştan (örn. 1m / 5m) üst
+timeframe barlarını yerelde üretir.
+
+Timeframe'ler "<sayı><m|h|d|w>" biçiminde serbesttir (3m, 45m, 2h, 6h, 2d).
+Kovalar epoch'a hizalıdır (Binance gibi); hafta katları Pazartesi açılır.
+Binance'in doğrudan sunmadığı timeframe'ler kendilerini bölen en büyük
+borsa interval'inden türetilir.
+
+Resampler (symbol, tf) başına kapanmış üst-tf barlarını ve oluşan kovanın
+kapanmış taban barlarından toplamını tutar; her çağrıda sadece yeni
+kapanan taban barları işlenir. Dönen pencerenin son satırı oluşan üst-tf
+barıdır (taban penceresinin son satırı oluşan mum olduğu için).
+
+Borsa barlarıyla tutarlılık kontrolü:
+    python resample.py check SOLUSDT@1h SOLUSDT@45m --base 5m --bars 300
+"""
+
+import re, json, logging
+from math import gcd
+from threading import Lock
+from time import monotonic
+
+import numpy as np
+
+from ohlcv import OHLCV
+
+logger = logging.getLogger("wunderbot")
+
+UNIT_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+# Binance'in doğrudan sunduğu interval'ler (1M sabit uzunlukta olmadığı için yok)
+NATIVE = ("1m", "3m", "5m", "15m", "30m", "1h", "2h", "4h", "6h", "8h", "12h", "1d", "3d", "1w")
+WEEK_MS = UNIT_MS["w"]
+WEEK_ANCHOR = 4 * UNIT_MS["d"]   # 1970-01-01 Perşembe → ilk Pazartesi 01-05
+
+_TF = re.compile(r"^\s*(\d+)\s*([mhdw])\s*$")
+
+def tf_ms(tf):
+    """'45m' / '2h' / '1d' -> ms; geçersizse None."""
+    m = _TF.match(str(tf or "").lower())
+    if not m or int(m.group(1)) <= 0:
+        return None
+    return int(m.group(1)) * UNIT_MS[m.group(2)]
+
+def label(step):
+    """ms -> kanonik ad (60m -> 1h, 7d -> 1w)."""
+    for u in ("w", "d", "h", "m"):
+        if step % UNIT_MS[u] == 0:
+            return f"{step // UNIT_MS[u]}{u}"
+    return None
+
+NATIVE_MS = {iv: tf_ms(iv) for iv in NATIVE}
+
+def floor(ts, step):
+    """Açılış zamanı(ları) -> kova başlangıcı (int ya da int64 dizi)."""
+    a = WEEK_ANCHOR if step % WEEK_MS == 0 else 0
+    return (ts - a) // step * step + a
+
+def source_interval(step, max_ratio=None):
+    """step'i bölen en büyük borsa interval'i (oran max_ratio'yu aşmadan); yoksa None."""
+    for iv in reversed(NATIVE):
+        ms = NATIVE_MS[iv]
+        if step % ms == 0 and (max_ratio is None or step // ms <= max_ratio):
+            if step % WEEK_MS == 0 and ms % WEEK_MS and ms > UNIT_MS["d"]:
+                continue    # 3d epoch'a, haftalık kovalar Pazartesi'ye hizalı
+            return iv
+    return None
+
+def plan(tfs_by_symbol, base="auto", max_ratio=None):
+    """
+    {symbol: {tf, ...}} -> {(symbol, tf): taban interval}. Tabloda olmayanlar
+    borsadan doğrudan çekilir.
+      base=""     : sadece borsada olmayan timeframe'ler türetilir
+      base="auto" : sembolün timeframe'lerinin ortak böleni olan en büyük
+                    borsa interval'i taban olur (5m+15m+1h -> 5m)
+      base="1m"   : bölünebilen her timeframe bu tabandan
+    """
+    fixed = tf_ms(base) if base and base != "auto" else None
+    routes = {}
+    for symbol, tfs in tfs_by_symbol.items():
+        steps = {tf: tf_ms(tf) for tf in tfs if tf_ms(tf)}
+        if not steps:
+            continue
+        b = None
+        if fixed:
+            b = fixed
+        elif base == "auto":
+            g = 0
+            for s in steps.values():
+                g = gcd(g, s)
+            iv = source_interval(g)
+            b = NATIVE_MS[iv] if iv else None
+        for tf, s in steps.items():
+            if b and s != b and s % b == 0 and (max_ratio is None or s // b <= max_ratio):
+                routes[(symbol, tf)] = label(b)
+            elif tf not in NATIVE_MS:
+                src = source_interval(s, max_ratio)
+                if src:
+                    routes[(symbol, tf)] = src
+    return routes
+
+# ============== KOVALAMA ==============
+def resample(w, step, base_step=None):
+    """
+    OHLCV -> step'lik barlar (open ilk, high max, low min, close son, volume toplam).
+    base_step verilirse sadece tam kovalar kalır: başı pencereden önce
+    başlayan ilk kova ve sonu pencereyi aşan son kova atılır.
+    """
+    if not len(w):
+        return OHLCV.blank()
+    b = floor(w.ts, step)
+    s = np.flatnonzero(np.r_[True, b[1:] != b[:-1]])
+    e = np.r_[s[1:], len(w)] - 1
+    block = np.empty((5, len(s)))
+    block[0] = w.open[s]
+    block[1] = np.maximum.reduceat(w.high, s)
+    block[2] = np.minimum.reduceat(w.low, s)
+    block[3] = w.close[e]
+    block[4] = np.add.reduceat(w.volume, s)
+    out = OHLCV._from_block(b[s], block)
+    if base_step is not None:
+        lo = 1 if w.ts[0] != out.ts[0] else 0
+        hi = len(out) - (1 if w.ts[-1] + base_step < out.ts[-1] + step else 0)
+        out = out[lo:max(lo, hi)]
+    return out
+
+def _join(a, b):
+    """Aynı kovanın iki parçası (a önce) -> tek satır."""
+    block = np.array([[a.open[0]], [max(a.high[0], b.high[0])], [min(a.low[0], b.low[0])],
+                      [b.close[-1]], [a.volume[0] + b.volume[-1]]])
+    return OHLCV._from_block(a.ts[:1].copy(), block)
+
+def compare(ours, ref):
+    """Ortak açılışlarda farklı barların açılış zamanları (fiyatlar birebir, hacim ~1e-9)."""
+    _, i, j = np.intersect1d(ours.ts, ref.ts, assume_unique=True, return_indices=True)
+    bad = np.zeros(len(i), dtype=bool)
+    for c in ("open", "high", "low", "close"):
+        bad |= ours[c][i] != ref[c][j]
+    bad |= ~np.isclose(ours.volume[i], ref.volume[j], rtol=1e-9, atol=1e-12)
+    return ours.ts[i][bad], len(i)
+
+# ============== RESAMPLER ==============
+class _Series:
+    __slots__ = ("step", "base_step", "closed", "acc", "next", "want", "checked", "lock")
+
+    def __init__(self, step, base_step):
+        self.step, self.base_step = step, base_step
+        self.closed = OHLCV.blank()
+        self.acc = None          # oluşan kovanın kapanmış taban barlarından toplamı (1 satır)
+        self.next = None         # işlenecek sonraki kapanmış taban barının açılışı
+        self.want = 0
+        self.checked = 0.0
+        self.lock = Lock()
+
+class Resampler:
+    """
+    history_fn(symbol, tf, limit) -> borsadan kapanmış üst-tf barları (OHLCV)
+    ya da None. İlk çağrıda (ve arada taban barı kaçarsa / daha uzun pencere
+    istenirse) geçmiş bununla yüklenir, sonrası taban barlarından yürür.
+    verify_every > 0 ise o kadar saniyede bir son barlar borsayla
+    karşılaştırılır; fark varsa seri borsadan yeniden yüklenir.
+    """
+
+    def __init__(self, history_fn, history=500, verify_every=0.0, verify_bars=20):
+        self.history_fn = history_fn
+        self.history = history
+        self.verify_every = verify_every
+        self.verify_bars = verify_bars
+        self._series = {}
+        self._lock = Lock()
+        self.stats = {"seed": 0, "fold": 0, "check": 0, "mismatch": 0}
+
+    def _get(self, symbol, tf, base):
+        k = (symbol, tf)
+        step, base_step = tf_ms(tf), tf_ms(base)
+        with self._lock:
+            s = self._series.get(k)
+            if s is None or s.base_step != base_step:
+                s = self._series[k] = _Series(step, base_step)
+            return s
+
+    def retain(self, keys):
+        """Sadece verilen (symbol, tf) serilerini tut."""
+        with self._lock:
+            for k in [k for k in self._series if k not in keys]:
+                del self._series[k]
+
+    def _seed(self, s, symbol, tf, w, limit):
+        cur = int(floor(w.ts[-1], s.step))
+        hist = self.history_fn(symbol, tf, limit)
+        if hist is None:
+            return False
+        hist = hist[:int(np.searchsorted(hist.ts, cur))]
+        start = int(hist.ts[-1]) + s.step if len(hist) else cur
+        if w.ts[0] > start:
+            logger.warning(f"⚠️  {symbol}@{tf}: taban penceresi {label(s.step)} kovasını kapsamıyor, sonraki tura")
+            return False
+        s.closed = hist[-max(limit, self.history):]
+        s.acc, s.next, s.want = None, start, limit
+        s.checked = monotonic()
+        self.stats["seed"] += 1
+        return True
+
+    def _fold(self, s, w):
+        """Yeni kapanan taban barlarını kovalara ekle; kapanan kovaları seriye yaz."""
+        new = w[:-1].since(s.next - 1)
+        if len(new):
+            r = resample(new, s.step)
+            if s.acc is not None:
+                if r.ts[0] == s.acc.ts[0]:
+                    r = _join(s.acc, r[:1]).merge(r[1:])
+                else:
+                    r = s.acc.merge(r)
+            done, s.acc = r[:-1], r[-1:]
+            s.next = int(new.ts[-1]) + s.base_step
+            self.stats["fold"] += 1
+        else:
+            done = OHLCV.blank()
+        # Oluşan taban barı yeni kovadaysa biriken kova kapanmıştır
+        if s.acc is not None and floor(int(w.ts[-1]), s.step) > s.acc.ts[0]:
+            done = done.merge(s.acc) if len(done) else s.acc
+            s.acc = None
+        if len(done):
+            s.closed = s.closed.merge(done, keep=max(s.want, self.history))
+
+    def window(self, symbol, tf, base, w, limit):
+        """
+        w: taban penceresi (son satır oluşan mum). Döner: son limit üst-tf
+        barı (son satır oluşan bar) ya da geçmiş yüklenemezse None.
+        """
+        if not len(w):
+            return OHLCV.blank()
+        s = self._get(symbol, tf, base)
+        with s.lock:
+            if s.next is None or limit > s.want or w.ts[0] > s.next:
+                if not self._seed(s, symbol, tf, w, limit):
+                    s.next = None
+                    return None
+            self._fold(s, w)
+            f_ts = int(floor(int(w.ts[-1]), s.step))
+            last = w[-1:]
+            if s.acc is not None and s.acc.ts[0] == f_ts:
+                forming = _join(s.acc, last)
+            else:
+                forming = OHLCV._from_block(np.array([f_ts]), np.array(
+                    [last.open, last.high, last.low, last.close, last.volume]))
+            out = s.closed.merge(forming, keep=limit)
+            due = self.verify_every > 0 and monotonic() - s.checked >= self.verify_every
+            if due:
+                s.checked = monotonic()
+        if due:
+            self.check(symbol, tf)
+        return out
+
+    def check(self, symbol, tf):
+        """Son kapanmış barları borsanınkilerle karşılaştır; fark sayısını döner."""
+        with self._lock:
+            s = self._series.get((symbol, tf))
+        if s is None or not len(s.closed):
+            return 0
+        ref = self.history_fn(symbol, tf, self.verify_bars)
+        if ref is None:
+            return 0
+        with s.lock:
+            bad, n = compare(s.closed, ref)
+            if len(bad):
+                s.next = None        # borsa esas: sonraki çağrıda yeniden yükle
+        self.stats["check"] += 1
+        if len(bad):
+            self.stats["mismatch"] += len(bad)
+            logger.warning(f"⚠️  {symbol}@{tf}: {len(bad)}/{n} bar borsayla uyuşmuyor "
+                           f"(ilk: {int(bad[0])}), seri yeniden yüklenecek")
+        return len(bad)
+
+# ============== CLI ==============
+def _check_cli(symbol, tf, base, bars, fetch):
+    """Taban barlarından toplu + artımlı üretim vs borsa barları."""
+    from time import time
+    from kline_store import _pages
+    step, base_step = tf_ms(tf), tf_ms(base)
+    src = tf if tf in NATIVE_MS else source_interval(step)
+    now = int(time() * 1000)
+    start = int(floor(now, step)) - bars * step
+    get = lambda iv: OHLCV.from_klines([k for p in _pages(fetch, symbol, iv, start, now) for k in p])
+    w, ref = get(base), resample(get(src), step, NATIVE_MS[src])
+    batch = resample(w, step, base_step)
+    bad_batch, n = compare(batch, ref)
+
+    # Artımlı yol: tabanı tur tur besle (her turda son satır oluşan mum sayılır)
+    r = Resampler(lambda s, t, n: ref[:1], history=bars + 1)
+    chunk = max(1, step // base_step // 3)
+    out = None
+    for i in range(chunk + 1, len(w) + 1, chunk):
+        out = r.window(symbol, tf, base, w[max(0, i - 2 * step // base_step - 2):i], bars) or out
+    bad_inc, n_inc = compare(out[:-1], ref) if out is not None else (ref.ts, 0)
+    return {"bars": n, "batch_mismatch": len(bad_batch), "incremental_bars": n_inc,
+            "incremental_mismatch": len(bad_inc)}
+
+if __name__ == "__main__":
+    import argparse
+    from kline_store import binance_fetch, _parse_keys
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    ap = argparse.ArgumentParser(description="Taban barlarından üst timeframe üretimi")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    cp = sub.add_parser("check", help="borsa barlarıyla tutarlılık")
+    cp.add_argument("keys", nargs="+", help="SYMBOL@tf")
+    cp.add_argument("--base", default="1m")
+    cp.add_argument("--bars", type=int, default=200)
+    args = ap.parse_args()
+
+    fetch = binance_fetch()
+    report = {f"{sym}@{tf}": _check_cli(sym, label(tf_ms(tf)), args.base, args.bars, fetch)
+              for sym, tf in _parse_keys(args.keys)}
+    print(json.dumps(report, indent=2, ensure_ascii=False))
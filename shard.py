@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Birden fazla bot instance'ı arasında parite paylaşımı (SHARD_STORE).
+
+Her parite (key_of: SYMBOL@tf) tutarlı hash halkasında canlı worker'lardan
+birine düşer; worker o paritenin lease'ini koordinasyon deposunda alır ve
+sadece lease'i elindeyken değerlendirir / alert yollar.
+
+  - Üyelik: her worker ttl/3 saniyede bir kalp atışı yazar; ttl içinde
+    atmayan worker halkadan düşer, pariteleri lease'leri dolunca
+    diğerlerine geçer. Yeni worker gelince halka değişir, eski sahip
+    artık kendine düşmeyen lease'leri bırakır, yeni sahip hemen alır.
+  - Lease süresi dolmadan başkası alamaz; sahip kendi saatine göre
+    lease'in %90'ı dolunca (yenileyemediyse) paritede işlem yapmayı
+    bırakır. Aynı paritede iki worker aynı anda alert yollamaz.
+  - Pozisyon durumu lease kaydıyla birlikte tutulur: sahip her
+    değişiklikte yazar, yeni sahip lease'i alırken okur (devir).
+
+Depolar:
+    sqlite:///yol/shard.db  (ya da düz yol) — aynı makinedeki instance'lar
+    redis://host:6379/0     — makineler arası (redis paketi gerekir)
+
+    python shard.py status --store sqlite:///tmp/shard.db
+"""
+
+import os, json, socket, sqlite3, logging, hashlib, atexit
+from bisect import bisect
+from threading import Thread, Lock, Event
+from time import time, monotonic
+
+logger = logging.getLogger("wunderbot")
+
+def _h(s):
+    return int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big")
+
+def default_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+# ============== HASH RING ==============
+class Ring:
+    """Worker başına vnodes sanal nokta; worker eklenip çıkınca sadece ~1/N parite yer değiştirir."""
+
+    def __init__(self, members, vnodes=64):
+        pts = sorted((_h(f"{m}#{i}"), m) for m in set(members) for i in range(vnodes))
+        self._points = [p for p, _ in pts]
+        self._owners = [m for _, m in pts]
+
+    def owner(self, key):
+        if not self._points:
+            return None
+        return self._owners[bisect(self._points, _h(key)) % len(self._points)]
+
+# ============== STORES ==============
+class SQLiteLeaseStore:
+    """
+    Tek dosyalı depo (aynı makinedeki process'ler, WAL). Süreler duvar
+    saatiyle tutulur; instance'lar aynı saati paylaşır.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS members (id TEXT PRIMARY KEY, expires REAL NOT NULL)",
+        "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, owner TEXT, "
+        "expires REAL NOT NULL DEFAULT 0, state TEXT)",
+    )
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        for sql in self.SCHEMA:
+            self._conn.execute(sql)
+
+    def _tx(self, fn):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self._conn)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            return out
+
+    def beat(self, me, ttl):
+        """Kalp atışı; canlı üyeler (sıralı)."""
+        now = time()
+
+        def run(c):
+            c.execute("INSERT INTO members (id, expires) VALUES (?, ?) "
+                      "ON CONFLICT(id) DO UPDATE SET expires=excluded.expires", (me, now + ttl))
+            c.execute("DELETE FROM members WHERE expires < ?", (now,))
+            return [r[0] for r in c.execute("SELECT id FROM members ORDER BY id")]
+        return self._tx(run)
+
+    def claim(self, keys, me, ttl):
+        """
+        Boştaki / süresi dolmuş / zaten bizdeki lease'leri al ya da yenile.
+        Döner: {key: devredilen durum ya da None} — elimizdeki lease'ler.
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        now = time()
+
+        def run(c):
+            c.executemany(
+                "INSERT INTO leases (key, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET owner=excluded.owner, expires=excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.owner IS NULL OR leases.expires < ?",
+                [(k, me, now + ttl, now) for k in keys])
+            held = {}
+            for i in range(0, len(keys), 500):
+                part = keys[i:i + 500]
+                q = f"SELECT key, state FROM leases WHERE owner = ? AND key IN ({','.join('?' * len(part))})"
+                held.update(c.execute(q, [me, *part]).fetchall())
+            return held
+        return {k: json.loads(s) if s else None for k, s in self._tx(run).items()}
+
+    def save(self, states, me):
+        """Sadece sahibi olduğumuz lease'lerin durumunu yaz."""
+        if states:
+            self._tx(lambda c: c.executemany(
+                "UPDATE leases SET state = ? WHERE key = ? AND owner = ?",
+                [(json.dumps(st), k, me) for k, st in states.items()]))
+
+    def release(self, keys, me, states=None):
+        states = states or {}
+        if keys:
+            self._tx(lambda c: c.executemany(
+                "UPDATE leases SET owner = NULL, expires = 0, state = COALESCE(?, state) "
+                "WHERE key = ? AND owner = ?",
+                [(json.dumps(states[k]) if k in states else None, k, me) for k in keys]))
+
+    def leave(self, me):
+        self._tx(lambda c: c.execute("DELETE FROM members WHERE id = ?", (me,)))
+
+    def members(self):
+        with self._lock:
+            return [r[0] for r in self._conn.execute(
+                "SELECT id FROM members WHERE expires >= ? ORDER BY id", (time(),))]
+
+    def leases(self):
+        """{key: (owner, kalan sn)} — status için."""
+        now = time()
+        with self._lock:
+            rows = self._conn.execute("SELECT key, owner, expires FROM leases").fetchall()
+        return {k: (o, round(e - now, 1)) for k, o, e in rows if o and e > now}
+
+class RedisLeaseStore:
+    """
+    Makineler arası depo. Lease'ler PX süreli anahtarlar (süreyi Redis
+    sayar, worker saatleri önemsiz); al / yenile / bırak Lua ile atomik.
+    """
+
+    CLAIM = ("local v = redis.call('GET', KEYS[1]) "
+             "if v == false or v == ARGV[1] then redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2]) return 1 end "
+             "return 0")
+    RELEASE = ("if redis.call('GET', KEYS[1]) == ARGV[1] then "
+               "if ARGV[2] ~= '' then redis.call('SET', KEYS[2], ARGV[2]) end "
+               "return redis.call('DEL', KEYS[1]) end return 0")
+    SAVE = ("if redis.call('GET', KEYS[1]) == ARGV[1] then redis.call('SET', KEYS[2], ARGV[2]) return 1 end "
+            "return 0")
+
+    def __init__(self, url, prefix="wunderbot:shard"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("redis:// deposu için 'pip install redis' gerekli")
+        self.r = redis.Redis.from_url(url, decode_responses=True)
+        self.p = prefix
+        self._claim = self.r.register_script(self.CLAIM)
+        self._release = self.r.register_script(self.RELEASE)
+        self._save = self.r.register_script(self.SAVE)
+
+    def _lease(self, k):
+        return f"{self.p}:lease:{k}"
+
+    def _state(self, k):
+        return f"{self.p}:state:{k}"
+
+    def beat(self, me, ttl):
+        now = time()
+        pipe = self.r.pipeline()
+        pipe.zadd(f"{self.p}:members", {me: now + ttl})
+        pipe.zremrangebyscore(f"{self.p}:members", "-inf", now)
+        pipe.zrangebyscore(f"{self.p}:members", now, "+inf")
+        return sorted(pipe.execute()[-1])
+
+    def claim(self, keys, me, ttl):
+        keys = list(keys)
+        if not keys:
+            return {}
+        pipe = self.r.pipeline()
+        for k in keys:
+            self._claim(keys=[self._lease(k)], args=[me, int(ttl * 1000)], client=pipe)
+        held = [k for k, ok in zip(keys, pipe.execute()) if ok]
+        states = self.r.mget([self._state(k) for k in held]) if held else []
+        return {k: json.loads(s) if s else None for k, s in zip(held, states)}
+
+    def save(self, states, me):
+        if states:
+            pipe = self.r.pipeline()
+            for k, st in states.items():
+                self._save(keys=[self._lease(k), self._state(k)], args=[me, json.dumps(st)], client=pipe)
+            pipe.execute()
+
+    def release(self, keys, me, states=None):
+        states = states or {}
+        if keys:
+            pipe = self.r.pipeline()
+            for k in keys:
+                self._release(keys=[self._lease(k), self._state(k)],
+                              args=[me, json.dumps(states[k]) if k in states else ""], client=pipe)
+            pipe.execute()
+
+    def leave(self, me):
+        self.r.zrem(f"{self.p}:members", me)
+
+    def members(self):
+        return sorted(self.r.zrangebyscore(f"{self.p}:members", time(), "+inf"))
+
+    def leases(self):
+        out = {}
+        for lk in self.r.scan_iter(f"{self.p}:lease:*"):
+            owner, ttl = self.r.get(lk), self.r.pttl(lk)
+            if owner and ttl > 0:
+                out[lk.split(":lease:", 1)[1]] = (owner, round(ttl / 1000, 1))
+        return out
+
+def open_store(url):
+    """sqlite:///yol, düz dosya yolu ya da redis://..."""
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisLeaseStore(url)
+    return SQLiteLeaseStore(url[len("sqlite:///"):] if url.startswith("sqlite:///") else url)
+
+# ============== COORDINATOR ==============
+class ShardCoordinator:
+    """
+    keys_fn: tüm parite key'leri (config). state_fn(keys) -> {key: durum}
+    devir için yazılacak pozisyon durumları. on_acquire({key: durum|None})
+    yeni alınan lease'ler için, sahiplik görünür olmadan önce çağrılır.
+    """
+
+    def __init__(self, store, keys_fn, worker_id=None, ttl=15.0, vnodes=64,
+                 state_fn=None, on_acquire=None):
+        self.store = store
+        self.keys_fn = keys_fn
+        self.id = worker_id or default_id()
+        self.ttl = ttl
+        self.vnodes = vnodes
+        self.state_fn = state_fn or (lambda keys: {})
+        self.on_acquire = on_acquire
+        self.members = []
+        self._owned = frozenset()
+        self._want = frozenset()
+        self._until = 0.0
+        self._dirty = set()
+        self._lock = Lock()
+        self._tick_lock = Lock()
+        self._wake = Event()
+        self._force = False
+        self._stop = Event()
+        self._thread = None
+        self.stats = {"acquired": 0, "released": 0, "lost": 0, "fenced": 0, "errors": 0}
+
+    # ---- bot tarafı ----
+    def owns(self, key):
+        return key in self._owned and monotonic() < self._until
+
+    def put(self, key):
+        """Sahip olunan paritenin durumu değişti; hemen depoya yazılsın."""
+        if key in self._owned:
+            with self._lock:
+                self._dirty.add(key)
+            self._wake.set()
+
+    def poke(self):
+        """Config değişti: bir sonraki tur beklemeden halkayı yeniden hesapla."""
+        self._force = True
+        self._wake.set()
+
+    # ---- tur ----
+    def _flush(self):
+        with self._lock:
+            keys, self._dirty = self._dirty, set()
+        keys &= self._owned
+        if keys:
+            self.store.save(self.state_fn(keys), self.id)
+
+    def tick(self):
+        with self._tick_lock:
+            t0 = monotonic()
+            self.members = self.store.beat(self.id, self.ttl)
+            ring = Ring(self.members or [self.id], self.vnodes)
+            want = frozenset(k for k in self.keys_fn() if ring.owner(k) == self.id)
+            drop = self._owned - want
+            if drop:
+                # Önce işlem yapmayı bırak, sonra son durumla birlikte devret
+                with self._lock:
+                    self._owned = self._owned & want
+                self.store.release(drop, self.id, self.state_fn(drop))
+                self.stats["released"] += len(drop)
+                logger.info(f"🔀 Shard: {len(drop)} parite bırakıldı ({len(self.members)} worker)")
+            self._flush()
+            held = self.store.claim(want, self.id, self.ttl)
+            new = {k: st for k, st in held.items() if k not in self._owned}
+            lost = (self._owned & want) - held.keys()
+            if new and self.on_acquire:
+                self.on_acquire(new)
+            with self._lock:
+                self._owned = frozenset(held)
+                self._want = want
+                self._until = t0 + self.ttl * 0.9
+            if new:
+                self.stats["acquired"] += len(new)
+                logger.info(f"🔀 Shard: {len(new)} parite alındı, {len(held)}/{len(want)} bizde "
+                            f"({len(self.members)} worker)")
+            if lost:
+                self.stats["lost"] += len(lost)
+                logger.warning(f"⚠️  Shard: {len(lost)} paritenin lease'i kaybedildi")
+            return len(held)
+
+    def _loop(self):
+        every = self.ttl / 3
+        nxt = monotonic() + every
+        while not self._stop.is_set():
+            self._wake.wait(max(0.0, nxt - monotonic()))
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                if self._force or monotonic() >= nxt:
+                    self._force = False
+                    self.tick()
+                    nxt = monotonic() + every
+                else:
+                    self._flush()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"❌ Shard deposu hatası: {e}")
+                nxt = monotonic() + min(every, 1.0)
+
+    def start(self):
+        try:
+            self.tick()
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.error(f"❌ Shard deposu hatası: {e}")
+        self._thread = Thread(target=self._loop, name="shard", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def close(self):
+        """Lease'leri son durumla bırak; diğer worker'lar ttl beklemeden alır."""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._wake.set()
+        with self._tick_lock:
+            owned, self._owned = self._owned, frozenset()
+            try:
+                if owned:
+                    self.store.release(owned, self.id, self.state_fn(owned))
+                self.store.leave(self.id)
+            except Exception as e:
+                logger.error(f"❌ Shard kapanış hatası: {e}")
+
+    def snapshot(self):
+        return {"id": self.id, "members": list(self.members), "owned": len(self._owned),
+                "pending": len(self._want - self._owned), "valid": monotonic() < self._until,
+                **self.stats}
+
+if __name__ == "__main__":
+    import argparse
+    from collections import Counter
+    ap = argparse.ArgumentParser(description="Shard üyeleri ve lease dağılımı")
+    ap.add_argument("cmd", choices=["status"])
+    ap.add_argument("--store", default=os.getenv("SHARD_STORE", ""), required=not os.getenv("SHARD_STORE"))
+    args = ap.parse_args()
+
+    store = open_store(args.store)
+    leases = store.leases()
+    per = Counter(o for o, _ in leases.values())
+    members = store.members()
+    print(f"{len(members)} worker, {len(leases)} aktif lease")
+    for m in sorted(set(members) | set(per)):
+        print(f"  {m:40s} {per.get(m, 0):6d} parite{'' if m in members else '  (üyeliği düşmüş)'}")
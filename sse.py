@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Server-Sent Events yayını (GET /signals): sinyal ve alert'ler oluştukça
+bağlı izleyicilere itilir, dashboard'ların poll etmesine gerek kalmaz.
+
+Yayın bloklamaz: her izleyicinin sınırlı kuyruğu vardır, yavaş izleyicide
+en eski olay düşer (sayılır). Son `history` olay tutulur; yeniden bağlanan
+istemci Last-Event-ID ile kaçırdıklarını alır.
+
+    hub = SignalHub()
+    hub.publish("signal", {"pair": "SOLUSDT@15m", "signal": "ENTER-LONG"})
+    sub = hub.subscribe(last_id)            # dolu ise None
+    Response(hub.stream(sub), mimetype="text/event-stream")
+"""
+
+import json
+from collections import deque
+from queue import Queue, Empty, Full
+from threading import Lock
+from time import time
+
+class SignalHub:
+    def __init__(self, history=500, queue_size=1000, max_clients=20, keepalive=15.0):
+        self.queue_size = queue_size
+        self.max_clients = max_clients
+        self.keepalive = keepalive
+        self._history = deque(maxlen=history)
+        self._subs = set()
+        self._next = 1
+        self._lock = Lock()
+        self.stats = {"published": 0, "dropped": 0, "rejected": 0}
+
+    @property
+    def clients(self):
+        return len(self._subs)
+
+    def publish(self, kind, data):
+        # id atama ve kuyruklara dağıtım aynı kilit altında: izleyici olayları id sırasıyla alır
+        with self._lock:
+            ev = (self._next, kind, json.dumps({"ts": time(), **data}, ensure_ascii=False, default=str))
+            self._next += 1
+            self._history.append(ev)
+            self.stats["published"] += 1
+            for q in self._subs:
+                try:
+                    q.put_nowait(ev)
+                except Full:
+                    # Yavaş izleyici: en eskisini at, yenisini koy
+                    try:
+                        q.get_nowait()
+                    except Empty:
+                        pass
+                    try:
+                        q.put_nowait(ev)
+                    except Full:
+                        pass
+                    self.stats["dropped"] += 1
+
+    def subscribe(self, last_id=None):
+        q = Queue(self.queue_size)
+        with self._lock:
+            if len(self._subs) >= self.max_clients:
+                self.stats["rejected"] += 1
+                return None
+            if last_id is not None:
+                for ev in self._history:
+                    if ev[0] > last_id and not q.full():
+                        q.put_nowait(ev)
+            self._subs.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subs.discard(q)
+
+    def stream(self, q):
+        """text/event-stream gövdesi; istemci koptuğunda (yazma hatası) abonelik düşer."""
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    eid, kind, data = q.get(timeout=self.keepalive)
+                except Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"id: {eid}\nevent: {kind}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(q)
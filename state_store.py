@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Pozisyon / son sinyal / cooldown durumunun kalıcı deposu (SQLite, WAL).
+
+Yazmalar bellekte "kirli" olarak işaretlenir ve arka plan thread'i
+tarafından flush_interval saniyede bir tek transaction'da diske basılır;
+kapanışta (atexit) kalanlar yazılır. Başlangıçta load() ağ olmadan
+milisaniyeler içinde tüm durumu döner.
+
+EVAL_MODE=incremental'da pair başına indikatör durumu da (strategies.streaming
+to_dict() çıktısı) aynı şekilde yazılır; restart sonrası warm-up gerekmez.
+"""
+
+import json, sqlite3, logging, atexit
+from threading import Thread, Lock, Event
+
+logger = logging.getLogger("wunderbot")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key      TEXT PRIMARY KEY,
+    pos      TEXT NOT NULL,
+    last_sig TEXT,
+    ts       REAL NOT NULL DEFAULT 0,
+    extra    TEXT
+);
+CREATE TABLE IF NOT EXISTS indicators (
+    key      TEXT PRIMARY KEY,
+    params   TEXT NOT NULL,
+    last_ts  INTEGER,
+    state    TEXT NOT NULL
+);
+"""
+
+class StateStore:
+    def __init__(self, path, flush_interval=1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._dirty = {}          # key -> state dict (None: sil)
+        self._dirty_ind = {}      # key -> (params, last_ts, state JSON) (None: sil)
+        self._lock = Lock()
+        self._db_lock = Lock()
+        self._stop = Event()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._thread = None
+
+    def load(self):
+        """{key: {"pos", "last_sig", "ts", ...}}"""
+        with self._db_lock:
+            rows = self._conn.execute("SELECT key, pos, last_sig, ts, extra FROM positions").fetchall()
+        out = {}
+        for key, pos, last_sig, ts, extra in rows:
+            st = {"pos": pos, "last_sig": last_sig, "ts": ts}
+            if extra:
+                try:
+                    st.update(json.loads(extra))
+                except Exception:
+                    pass
+            out[key] = st
+        return out
+
+    def load_indicators(self):
+        """{key: (params, last_ts, state dict)}; okunamayan kayıt atlanır."""
+        with self._db_lock:
+            rows = self._conn.execute("SELECT key, params, last_ts, state FROM indicators").fetchall()
+        out = {}
+        for key, params, last_ts, state in rows:
+            try:
+                out[key] = (params, last_ts, json.loads(state))
+            except Exception:
+                pass
+        return out
+
+    def put_indicator(self, key, params, last_ts, state):
+        """İndikatör durumu (to_dict()); çağıranın kilidi altında JSON'a çevrilir."""
+        rec = (params, last_ts, json.dumps(state))
+        with self._lock:
+            self._dirty_ind[key] = rec
+
+    def delete_indicator(self, key):
+        with self._lock:
+            self._dirty_ind[key] = None
+
+    def put(self, key, state):
+        """Durumu kirli işaretle (kopyası alınır); bir sonraki flush'ta yazılır."""
+        with self._lock:
+            self._dirty[key] = dict(state)
+
+    def delete(self, key):
+        with self._lock:
+            self._dirty[key] = None
+
+    def flush(self):
+        with self._lock:
+            batch, self._dirty = self._dirty, {}
+            ibatch, self._dirty_ind = self._dirty_ind, {}
+        if not batch and not ibatch:
+            return 0
+        ups, dels = [], []
+        for key, st in batch.items():
+            if st is None:
+                dels.append((key,))
+                continue
+            extra = {k: v for k, v in st.items() if k not in ("pos", "last_sig", "ts")}
+            ups.append((key, st.get("pos", "NONE"), st.get("last_sig"), float(st.get("ts") or 0),
+                        json.dumps(extra) if extra else None))
+        try:
+            with self._db_lock:
+                self._conn.execute("BEGIN")
+                if ups:
+                    self._conn.executemany(
+                        "INSERT INTO positions (key, pos, last_sig, ts, extra) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET pos=excluded.pos, last_sig=excluded.last_sig, "
+                        "ts=excluded.ts, extra=excluded.extra",
+                        ups,
+                    )
+                if dels:
+                    self._conn.executemany("DELETE FROM positions WHERE key = ?", dels)
+                iups = [(k,) + r for k, r in ibatch.items() if r is not None]
+                if iups:
+                    self._conn.executemany(
+                        "INSERT INTO indicators (key, params, last_ts, state) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET params=excluded.params, last_ts=excluded.last_ts, "
+                        "state=excluded.state",
+                        iups,
+                    )
+                idels = [(k,) for k, r in ibatch.items() if r is None]
+                if idels:
+                    self._conn.executemany("DELETE FROM indicators WHERE key = ?", idels)
+                self._conn.execute("COMMIT")
+        except Exception as e:
+            logger.error(f"❌ State store yazma hatası: {e}")
+            with self._db_lock:
+                try:
+                    self._conn.execute("ROLLBACK")
+                except Exception:
+                    pass
+            # Yazılamayanları geri koy (bu arada gelen daha yeni değerleri ezmeden)
+            with self._lock:
+                for k, v in batch.items():
+                    self._dirty.setdefault(k, v)
+                for k, v in ibatch.items():
+                    self._dirty_ind.setdefault(k, v)
+            return 0
+        return len(batch) + len(ibatch)
+
+    def _loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def start(self):
+        self._thread = Thread(target=self._loop, name="state-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def close(self):
+        self._stop.set()
+        self.flush()
+        with self._db_lock:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
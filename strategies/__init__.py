@@ -1,16 +1,120 @@
-from importlib import import_module
+import numpy as np
 
-REGISTRY = {
-    "tmh":        ("strategies.tmh", "analyze_tmh"),           # senin mevcut hibrit
-    "wt_cross":   ("strategies.wt_cross", "analyze_wt_cross"),  # LazyBear
-    "ssl_channel":("strategies.ssl_channel", "analyze_ssl_channel"),
+from strategies import tmh, wt_cross, ssl_channel
+from strategies.indicators import as_f64
+
+MIN_BARS = 50   # her stratejinin en az istediği bar (eski len(df) < 50 kuralı)
+COLUMNS = ("high", "low", "close")
+
+class Strategy:
+    """
+    Kayıtlı strateji; giriş noktaları modül yüklenirken bir kere çözülür.
+      analyze(df, config)                 -> son barın sinyali (batch)
+      signals(high, low, close, config)   -> tüm seri için SIGNALS kodları
+      state(config)                       -> bar bar ilerleyen durum (incremental)
+      batch(high, low, close, config)     -> (pariteler × barlar) dizilerde satır
+                                             başına son bar kodu (tek geçiş)
+      lookback(config)                    -> indikatörlerin pencere başından
+                                             etkilenmemesi için gereken kapanmış bar
+      columns                             -> df'te olması gereken kolonlar
+    """
+
+    def __init__(self, name, analyze, signals=None, lookback=None, columns=COLUMNS):
+        self.name = name
+        self.analyze = analyze
+        self.signals = signals
+        self._lookback = lookback
+        self.columns = tuple(columns)
+
+    def min_bars(self, config):
+        """Sinyal üretmek için en az bar (warm-up); veri çekimi bu kadar pencere ister."""
+        need = int(self._lookback(config)) if self._lookback else 0
+        return max(MIN_BARS, need)
+
+    def batch(self, high, low, close, config):
+        """Her satırın son barındaki sinyal kodu; analyze() ile aynı karar."""
+        if self.signals is None:
+            return np.zeros(np.shape(close)[0], dtype=np.int8)
+        return self.signals(high, low, close, config)[:, -1]
+
+    def state(self, config):
+        from strategies.streaming import STATES
+        cls = STATES.get(self.name)
+        return cls(config) if cls else None
+
+    def __repr__(self):
+        return f"Strategy({self.name!r})"
+
+REGISTRY = {}
+
+def register(name, analyze, signals=None, lookback=None, columns=COLUMNS):
+    REGISTRY[name] = Strategy(name, analyze, signals, lookback, columns)
+    return REGISTRY[name]
+
+register("tmh", tmh.analyze_tmh, tmh.signals_tmh, tmh.lookback_tmh)                   # senin mevcut hibrit
+register("wt_cross", wt_cross.analyze_wt_cross, wt_cross.signals_wt_cross, wt_cross.lookback_wt_cross)  # LazyBear
+register("ssl_channel", ssl_channel.analyze_ssl_channel, ssl_channel.signals_ssl_channel,
+         ssl_channel.lookback_ssl_channel)
+
+def get(name):
+    """Ad -> Strategy (bilinmiyorsa None)."""
+    return REGISTRY.get((name or "tmh").lower())
+
+def min_bars(name, config):
+    """Parite için gereken kapanmış bar sayısı; bilinmeyen stratejide MIN_BARS."""
+    strat = get(name)
+    return strat.min_bars(config) if strat else MIN_BARS
+
+# Optimizer için varsayılan parametre ızgaraları (REGISTRY anahtarlarıyla)
+GRIDS = {
+    "tmh": {
+        "ema_fast":              [8, 12, 16, 21],
+        "ema_slow":              [21, 26, 34, 50],
+        "supertrend_period":     [7, 10, 14],
+        "supertrend_multiplier": [1.5, 2.0, 2.5, 3.0],
+    },
+    "wt_cross": {
+        "n1": [6, 8, 10, 12, 14],
+        "n2": [13, 17, 21, 25, 30],
+    },
+    "ssl_channel": {
+        "ssl_period": [5, 7, 10, 13, 16, 20, 25, 30],
+    },
 }
 
 def run(name: str, df, config: dict):
-    key = (name or "tmh").lower()
-    if key not in REGISTRY:
-        return {"signal":"HOLD", "price": float(df["close"].iloc[-1])}
-    mod_name, fn_name = REGISTRY[key]
-    mod = import_module(mod_name)
-    fn  = getattr(mod, fn_name)
-    return fn(df, config)
+    strat = get(name)
+    if strat is None or len(df) < strat.min_bars(config):
+        return {"signal":"HOLD", "price": float(as_f64(df["close"])[-1]) if len(df) else 0}
+    return strat.analyze(df, config)
+
+# ============== SIGNAL SERIES (backtest) ==============
+# Tüm barlar için sinyal kodu dizisi: kod = SIGNALS indeksi
+SIGNALS = ("HOLD", "ENTER-LONG", "ENTER-SHORT", "EXIT-LONG", "EXIT-SHORT")
+
+def series(name: str, high, low, close, config: dict):
+    """
+    Her bar i için, 0..i barlarını görmüş stratejinin sinyali (int8 kod).
+    Tek geçişte hesaplanır; incremental moddaki bar bar değerlendirme ile aynıdır.
+    """
+    strat = get(name)
+    if strat is None or strat.signals is None:
+        return np.zeros(len(close), dtype=np.int8)
+    codes = strat.signals(high, low, close, config)
+    codes[:strat.min_bars(config) - 1] = 0
+    return codes
+
+def run_batch(name: str, high, low, close, config: dict):
+    """
+    Aynı strateji + parametrelerle, aynı uzunlukta pencereleri olan
+    paritelerin (pariteler × barlar) dizileri -> satır başına run() sonucu.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    rows, bars = close.shape
+    price = close[:, -1] if bars else np.zeros(rows)
+    strat = get(name)
+    if strat is None or bars < strat.min_bars(config):
+        codes = np.zeros(rows, dtype=np.int8)
+    else:
+        codes = strat.batch(high, low, close, config)
+    return [{"signal": SIGNALS[k], "price": float(p)} for k, p in zip(codes.tolist(), price.tolist())]
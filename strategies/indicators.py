@@ -0,0 +1,337 @@
+"""
+Dizi tabanlı indikatör çekirdekleri (float64 NumPy dizileri üzerinde).
+
+Hepsi pandas karşılıklarıyla aynı sonucu verecek şekilde yazıldı:
+  ema        -> Series.ewm(span=n, adjust=False).mean()
+  sma        -> Series.rolling(window=n, min_periods=...).mean()
+  atr        -> TR'nin n periyotluk basit ortalaması
+  supertrend -> stratejilerdeki basit supertrend (kapanış vs üst bant)
+  ssl_state  -> SSL Channel hlv durumu ve bantları
+  wavetrend  -> LazyBear WaveTrend (wt1, wt2)
+
+Çekirdekler son eksen (barlar) boyunca çalışır; (pariteler × barlar)
+2-D dizi verilirse her satır bağımsız ve 1-D ile bit bit aynı hesaplanır.
+"""
+import math
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+def as_f64(x):
+    """Series / liste / dizi -> bitişik float64 dizi (gerekmedikçe kopyalamaz)."""
+    if hasattr(x, "to_numpy"):
+        x = x.to_numpy()
+    return np.ascontiguousarray(x, dtype=np.float64)
+
+def ema(x, n):
+    """
+    pandas ewm(span=n, adjust=False).mean() ile birebir aynı özyineleme
+    (NaN'ler atlanır ama ağırlık sönümü devam eder, ignore_na=False).
+    """
+    x = as_f64(x)
+    if x.ndim == 2:
+        return _ema_2d(x, n)
+    out = np.empty_like(x)
+    com = (int(n) - 1) / 2.0
+    alpha = 1.0 / (1.0 + com)
+    decay = 1.0 - alpha
+    new_wt = alpha
+    w = np.nan
+    old_wt = 1.0
+    for i, cur in enumerate(x.tolist()):
+        if w == w:
+            old_wt *= decay
+            if com == 1:
+                new_wt = 1.0 - old_wt   # pandas'ın com==1 özel durumu
+            if cur == cur:
+                if w != cur:
+                    w = (old_wt * w + new_wt * cur) / (old_wt + new_wt)
+                old_wt = 1.0
+        elif cur == cur:
+            w = cur
+        out[i] = w
+    return out
+
+def _ema_2d(x, n):
+    """ema()'nın satır başına durumla sütun sütun ilerleyen hali."""
+    rows, m = x.shape
+    out = np.empty_like(x)
+    com = (int(n) - 1) / 2.0
+    alpha = 1.0 / (1.0 + com)
+    decay = 1.0 - alpha
+    new_wt = np.full(rows, alpha)
+    w = np.full(rows, np.nan)
+    old_wt = np.ones(rows)
+    with np.errstate(invalid="ignore"):
+        for i in range(m):
+            cur = x[:, i]
+            has = w == w
+            ok = cur == cur
+            old_wt = np.where(has, old_wt * decay, old_wt)
+            if com == 1:
+                new_wt = np.where(has, 1.0 - old_wt, new_wt)
+            upd = has & ok & (w != cur)
+            w = np.where(upd, (old_wt * w + new_wt * cur) / (old_wt + new_wt), w)
+            old_wt = np.where(has & ok, 1.0, old_wt)
+            w = np.where(~has & ok, cur, w)
+            out[:, i] = w
+    return out
+
+# EMA başlangıç etkisi bu orana inene kadar gereken bar (bkz. ema_settle)
+EMA_TOL = 1e-4
+
+def ema_settle(n, tol=EMA_TOL):
+    """
+    ema(n) ilk değerden başladığı için pencere başı sonucu etkiler; etki
+    (1 - alpha)^k ile söner. tol altına inmesi için gereken bar sayısı.
+    """
+    n = int(n)
+    if n <= 1:
+        return 1
+    return int(math.ceil(math.log(tol) / math.log(1.0 - 2.0 / (n + 1.0))))
+
+def sma(x, n, min_periods=None):
+    """
+    pandas rolling(window=n, min_periods=...).mean() ile birebir aynı:
+    Kahan telafili kayan toplam + sabit pencere / işaret düzeltmeleri.
+    Fiyatlar tick'e yuvarlı olduğu için kapanış == ortalama eşitlikleri
+    gerçek veride sık görülür; son bit farkı bile sinyali değiştirir.
+    """
+    x = as_f64(x)
+    n = int(n)
+    minp = n if min_periods is None else min(max(int(min_periods), 1), n)
+    if x.ndim == 2:
+        return _sma_2d(x, n, minp)
+    vals = x.tolist()
+    out = np.empty_like(x)
+    nobs = neg_ct = same = 0
+    sum_x = comp_add = comp_rem = 0.0
+    prev = vals[0] if vals else np.nan
+    for i, val in enumerate(vals):
+        if i >= n:
+            old = vals[i - n]
+            if old == old:
+                nobs -= 1
+                y = -old - comp_rem
+                t = sum_x + y
+                comp_rem = t - sum_x - y
+                sum_x = t
+                if old < 0:
+                    neg_ct -= 1
+        if val == val:
+            nobs += 1
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = t - sum_x - y
+            sum_x = t
+            if val < 0:
+                neg_ct += 1
+            same = same + 1 if val == prev else 1
+            prev = val
+        if nobs >= minp and nobs > 0:
+            r = sum_x / nobs
+            if same >= nobs:
+                r = prev
+            elif neg_ct == 0 and r < 0:
+                r = 0.0
+            elif neg_ct == nobs and r > 0:
+                r = 0.0
+        else:
+            r = np.nan
+        out[i] = r
+    return out
+
+def _sma_2d(x, n, minp):
+    """sma()'nın satır başına durumla sütun sütun ilerleyen hali."""
+    rows, m = x.shape
+    out = np.empty_like(x)
+    nobs = np.zeros(rows, dtype=np.int64)
+    neg_ct = np.zeros(rows, dtype=np.int64)
+    same = np.zeros(rows, dtype=np.int64)
+    sum_x = np.zeros(rows); comp_add = np.zeros(rows); comp_rem = np.zeros(rows)
+    prev = x[:, 0].copy() if m else np.full(rows, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i in range(m):
+            if i >= n:
+                old = x[:, i - n]
+                ok = old == old
+                nobs -= ok
+                y = -old - comp_rem
+                t = sum_x + y
+                comp_rem = np.where(ok, t - sum_x - y, comp_rem)
+                sum_x = np.where(ok, t, sum_x)
+                neg_ct -= ok & (old < 0)
+            val = x[:, i]
+            ok = val == val
+            nobs += ok
+            y = val - comp_add
+            t = sum_x + y
+            comp_add = np.where(ok, t - sum_x - y, comp_add)
+            sum_x = np.where(ok, t, sum_x)
+            neg_ct += ok & (val < 0)
+            same = np.where(ok, np.where(val == prev, same + 1, 1), same)
+            prev = np.where(ok, val, prev)
+            r = sum_x / nobs
+            r = np.where(same >= nobs, prev,
+                np.where((neg_ct == 0) & (r < 0), 0.0,
+                np.where((neg_ct == nobs) & (r > 0), 0.0, r)))
+            out[:, i] = np.where((nobs >= minp) & (nobs > 0), r, np.nan)
+    return out
+
+def true_range(high, low, close):
+    h, l, c = as_f64(high), as_f64(low), as_f64(close)
+    pc = np.empty_like(c)
+    pc[..., :1] = np.nan
+    pc[..., 1:] = c[..., :-1]
+    tr = np.fmax(np.fmax(h - l, np.abs(h - pc)), np.abs(l - pc))
+    return tr
+
+def atr(high, low, close, n=14):
+    return sma(true_range(high, low, close), n)
+
+def _carry(values, valid):
+    """valid olmayan pozisyonlara son geçerli değeri taşı (valid[..., 0] True olmalı)."""
+    idx = np.where(valid, np.arange(values.shape[-1]), 0)
+    np.maximum.accumulate(idx, axis=-1, out=idx)
+    return np.take_along_axis(values, idx, axis=-1)
+
+def supertrend(high, low, close, period=10, mult=2.0, atrv=None):
+    """
+    (st, dir) döner. ATR hazır değilken önceki değer taşınır;
+    aksi halde kapanış <= üst bant ise dir=-1 (st=üst), değilse dir=1 (st=alt).
+    atrv verilirse (aynı period ile hesaplanmış) tekrar hesaplanmaz.
+    """
+    h, l, c = as_f64(high), as_f64(low), as_f64(close)
+    if c.shape[-1] == 0:
+        return np.empty(c.shape), np.empty(c.shape, dtype=np.int64)
+    hl2 = (h + l) / 2
+    if atrv is None:
+        atrv = atr(h, l, c, period)
+    up = hl2 + mult * atrv
+    dn = hl2 - mult * atrv
+    below = c <= up
+    st = np.where(below, up, dn)
+    dirn = np.where(below, -1, 1)
+    st[..., 0] = up[..., 0]; dirn[..., 0] = 1
+    valid = ~np.isnan(atrv)
+    valid[..., 0] = True
+    return _carry(st, valid), _carry(dirn, valid)
+
+def ssl_state(high, low, close, period=10):
+    """(hlv, ssl_down, ssl_up) döner; hlv: 1 / -1, eşitlikte önceki değer."""
+    h, l, c = as_f64(high), as_f64(low), as_f64(close)
+    sma_high = sma(h, period)
+    sma_low = sma(l, period)
+    if c.shape[-1] == 0:
+        return np.empty(c.shape, dtype=np.int64), sma_high, sma_low
+    state = np.where(c > sma_high, 1, np.where(c < sma_low, -1, 0))
+    state[..., 0] = 1
+    hlv = _carry(state, state != 0)
+    ssl_down = (hlv < 0) * sma_high + (hlv >= 0) * sma_low
+    ssl_up = (hlv < 0) * sma_low + (hlv >= 0) * sma_high
+    return hlv, ssl_down, ssl_up
+
+def wavetrend(high, low, close, n1=10, n2=21):
+    """LazyBear WaveTrend: (wt1, wt2)."""
+    h, l, c = as_f64(high), as_f64(low), as_f64(close)
+    ap = (h + l + c) / 3.0
+    esa = ema(ap, n1)
+    d = ema(np.abs(ap - esa), n1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ci = (ap - esa) / (0.015 * np.where(d == 0, np.nan, d))
+    wt1 = ema(ci, n2)
+    wt2 = sma(wt1, 4, min_periods=1)
+    return wt1, wt2
+
+def cross_over(a, b):
+    """a[i-1] <= b[i-1] ve a[i] > b[i]; ilk eleman False."""
+    out = np.zeros(np.shape(a), dtype=bool)
+    out[..., 1:] = (a[..., :-1] <= b[..., :-1]) & (a[..., 1:] > b[..., 1:])
+    return out
+
+def cross_under(a, b):
+    """a[i-1] >= b[i-1] ve a[i] < b[i]; ilk eleman False."""
+    out = np.zeros(np.shape(a), dtype=bool)
+    out[..., 1:] = (a[..., :-1] >= b[..., :-1]) & (a[..., 1:] < b[..., 1:])
+    return out
+
+# ============== KERNEL TABLE ==============
+# cached() anahtarlarındaki (ad, parametreler) -> çekirdek çağrısı.
+# d: {"high", "low", "close"} dizileri; get(ad, params): bağımlı indikatör.
+KERNELS = {
+    "ema":        lambda d, get, col, n: ema(d[col], n),
+    "atr":        lambda d, get, n: atr(d["high"], d["low"], d["close"], n),
+    "supertrend": lambda d, get, p, m: supertrend(d["high"], d["low"], d["close"], p, m, atrv=get("atr", (p,))),
+    "wavetrend":  lambda d, get, n1, n2: wavetrend(d["high"], d["low"], d["close"], n1, n2),
+    "ssl":        lambda d, get, p: ssl_state(d["high"], d["low"], d["close"], p),
+}
+
+# Hesaplanırken başka bir indikatörü kullananlar (aynı işte hesaplansınlar)
+DEPENDS = {
+    "supertrend": lambda p, m: ("atr", (p,)),
+}
+
+def compute(name, params, data, get=None):
+    """KERNELS üzerinden tek bir indikatör; get verilmezse bağımlılıklar da hesaplanır."""
+    if get is None:
+        get = lambda n, p: compute(n, p, data)
+    return KERNELS[name](data, get, *params)
+
+# ============== CYCLE MEMO ==============
+class IndicatorMemo:
+    """
+    Bir kontrol turu boyunca hesaplanan indikatör dizileri.
+    Anahtar: (veri kapsamı, indikatör adı, parametreler); kapsam
+    memo_scope() ile verilir (symbol, timeframe, pencere başı/sonu).
+    Dönen diziler salt-okunurdur, paylaşıldıkları için değiştirilemez.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fn):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                return self._data[key]
+        val = _freeze(fn())
+        with self._lock:
+            if key in self._data:
+                # Aynı anda başka thread hesapladı; ilkini kullan
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            self._data[key] = val
+        return val
+
+def _freeze(val):
+    if isinstance(val, np.ndarray):
+        val.flags.writeable = False
+    elif isinstance(val, tuple):
+        for v in val:
+            _freeze(v)
+    return val
+
+_scope = threading.local()
+
+@contextmanager
+def memo_scope(memo, key):
+    """Bu thread'deki cached() çağrılarını memo'ya ve veri kapsamına bağla."""
+    prev = getattr(_scope, "current", None)
+    _scope.current = (memo, key) if memo is not None else None
+    try:
+        yield
+    finally:
+        _scope.current = prev
+
+def cached(name, params, fn):
+    """Aktif memo_scope varsa fn() sonucunu paylaş, yoksa direkt hesapla."""
+    cur = getattr(_scope, "current", None)
+    if cur is None:
+        return fn()
+    memo, key = cur
+    return memo.get((key, name, params), fn)
@@ -1,33 +1,31 @@
 def analyze_ssl_channel(df, config):
-    import numpy as np, pandas as pd
-    if len(df) < 50:
-        p = float(df['close'].iloc[-1]) if len(df) else 0
-        return {'signal':'HOLD','price':p}
+    from strategies.indicators import as_f64, ssl_state, cross_over, cross_under, cached
     period = int(config.get('ssl_period', config.get('period', 10)))
-    smaHigh = df['high'].rolling(window=period).mean()
-    smaLow  = df['low'].rolling(window=period).mean()
-    close = df['close']
-    hlv = [1]
-    for i in range(1, len(df)):
-        hi = smaHigh.iloc[i]; lo = smaLow.iloc[i]
-        if close.iloc[i] > (hi if hi==hi else close.iloc[i]):  # hi==hi -> not NaN
-            hlv.append(1)
-        elif close.iloc[i] < (lo if lo==lo else close.iloc[i]):
-            hlv.append(-1)
-        else:
-            hlv.append(hlv[-1])
+    close = as_f64(df['close'])
+    _, sslDown, sslUp = cached('ssl', (period,), lambda: ssl_state(df['high'], df['low'], close, period))
+    cross_up   = cross_over(sslUp[-2:], sslDown[-2:])
+    cross_down = cross_under(sslUp[-2:], sslDown[-2:])
+    return decide_ssl_channel(bool(cross_up[-1]), bool(cross_down[-1]), float(close[-1]), config)
+
+def lookback_ssl_channel(config):
+    """SMA penceresi + kesişim için önceki bar."""
+    return int(config.get('ssl_period', config.get('period', 10))) + 1
+
+def signals_ssl_channel(high, low, close, config):
+    """decide_ssl_channel'ın tüm seriye vektörel uygulanışı (strategies.SIGNALS kodları)."""
     import numpy as np
-    hlv = np.array(hlv)
-    sslDown = (hlv < 0) * smaHigh + (hlv >= 0) * smaLow
-    sslUp   = (hlv < 0) * smaLow  + (hlv >= 0) * smaHigh
-    sslDown = pd.Series(sslDown, index=df.index)
-    sslUp   = pd.Series(sslUp,   index=df.index)
-    cross_up   = (sslUp.shift(1) <= sslDown.shift(1)) & (sslUp > sslDown)
-    cross_down = (sslUp.shift(1) >= sslDown.shift(1)) & (sslUp < sslDown)
-    price = float(close.iloc[-1])
+    from strategies.indicators import as_f64, ssl_state, cross_over, cross_under, cached
+    period = int(config.get('ssl_period', config.get('period', 10)))
+    close = as_f64(close)
+    _, sslDown, sslUp = cached('ssl', (period,), lambda: ssl_state(high, low, close, period))
+    codes = (4, 3) if config.get('enter_exit', False) else (1, 2)
+    return np.select([cross_over(sslUp, sslDown), cross_under(sslUp, sslDown)], codes, 0).astype(np.int8)
+
+def decide_ssl_channel(cross_up, cross_down, price, config):
+    """Son bar kesişimlerinden sinyal (batch ve incremental mod ortak)."""
     enter_exit = bool(config.get('enter_exit', False))
-    if cross_up.iloc[-1]:
+    if cross_up:
         return {'signal': ('EXIT-SHORT' if enter_exit else 'ENTER-LONG'), 'price': price}
-    if cross_down.iloc[-1]:
+    if cross_down:
         return {'signal': ('EXIT-LONG' if enter_exit else 'ENTER-SHORT'), 'price': price}
     return {'signal':'HOLD','price':price}
@@ -0,0 +1,305 @@
+"""
+Bar başına O(1) ilerleyen indikatör durumları (incremental mod).
+
+Her sınıf tek bir kapanmış barla `update()` edilir; aritmetik
+strategies.indicators'daki dizi çekirdekleriyle (dolayısıyla pandas ile)
+aynıdır. Fark sadece başlangıç noktasıdır: durum warm-up'tan itibaren tüm
+geçmişi taşır, batch mod ise her çağrıda son pencereden yeniden başlar.
+
+Durumlar to_dict() / load_state() ile JSON'a yazılıp geri okunabilir.
+"""
+import copy, math
+from collections import deque
+
+from strategies.tmh import decide_tmh, lookback_tmh
+from strategies.wt_cross import decide_wt_cross, lookback_wt_cross
+from strategies.ssl_channel import decide_ssl_channel, lookback_ssl_channel
+
+MIN_BARS = 50   # strategies.MIN_BARS; sinyal için en az max(MIN_BARS, lookback) bar
+NAN = float("nan")
+
+class _State:
+    def to_dict(self):
+        out = {"__type__": type(self).__name__}
+        for k, v in vars(self).items():
+            if isinstance(v, _State):
+                v = v.to_dict()
+            elif isinstance(v, deque):
+                v = list(v)
+            out[k] = v
+        return out
+
+    @classmethod
+    def _from_dict(cls, d):
+        obj = cls.__new__(cls)
+        for k, v in d.items():
+            if k == "__type__":
+                continue
+            if isinstance(v, dict) and "__type__" in v:
+                v = load_state(v)
+            obj.__dict__[k] = v
+        return obj
+
+    def copy(self):
+        return copy.deepcopy(self)
+
+def load_state(d):
+    return _TYPES[d["__type__"]]._from_dict(d)
+
+def _div(a, b):
+    """NumPy float bölmesi gibi: sıfıra bölmede hata yerine inf/nan."""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+# ============== PRIMITIVES ==============
+class EMA(_State):
+    """ewm(span=n, adjust=False).mean() — bkz. indicators.ema"""
+
+    def __init__(self, n):
+        self.com = (int(n) - 1) / 2.0
+        self.alpha = 1.0 / (1.0 + self.com)
+        self.new_wt = self.alpha
+        self.old_wt = 1.0
+        self.value = NAN
+
+    def update(self, cur):
+        w = self.value
+        if w == w:
+            self.old_wt *= 1.0 - self.alpha
+            if self.com == 1:
+                self.new_wt = 1.0 - self.old_wt
+            if cur == cur:
+                if w != cur:
+                    w = (self.old_wt * w + self.new_wt * cur) / (self.old_wt + self.new_wt)
+                self.old_wt = 1.0
+        elif cur == cur:
+            w = cur
+        self.value = w
+        return w
+
+class SMA(_State):
+    """rolling(window=n, min_periods=...).mean() — bkz. indicators.sma"""
+
+    def __init__(self, n, min_periods=None):
+        self.n = int(n)
+        self.minp = self.n if min_periods is None else min(max(int(min_periods), 1), self.n)
+        self.window = deque(maxlen=self.n)
+        self.nobs = self.neg_ct = self.same = 0
+        self.sum_x = self.comp_add = self.comp_rem = 0.0
+        self.prev = None
+        self.value = NAN
+
+    @classmethod
+    def _from_dict(cls, d):
+        obj = super()._from_dict(d)
+        obj.window = deque(obj.window, maxlen=obj.n)
+        return obj
+
+    def update(self, val):
+        if self.prev is None:
+            self.prev = val
+        if len(self.window) == self.n:
+            old = self.window[0]
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.comp_rem
+                t = self.sum_x + y
+                self.comp_rem = t - self.sum_x - y
+                self.sum_x = t
+                if old < 0:
+                    self.neg_ct -= 1
+        self.window.append(val)
+        if val == val:
+            self.nobs += 1
+            y = val - self.comp_add
+            t = self.sum_x + y
+            self.comp_add = t - self.sum_x - y
+            self.sum_x = t
+            if val < 0:
+                self.neg_ct += 1
+            self.same = self.same + 1 if val == self.prev else 1
+            self.prev = val
+        if self.nobs >= self.minp and self.nobs > 0:
+            r = self.sum_x / self.nobs
+            if self.same >= self.nobs:
+                r = self.prev
+            elif self.neg_ct == 0 and r < 0:
+                r = 0.0
+            elif self.neg_ct == self.nobs and r > 0:
+                r = 0.0
+        else:
+            r = NAN
+        self.value = r
+        return r
+
+def _fmax(a, b):
+    if a != a:
+        return b
+    if b != b:
+        return a
+    return a if a >= b else b
+
+class ATR(_State):
+    def __init__(self, n=14):
+        self.prev_close = NAN
+        self.sma = SMA(n)
+
+    def update(self, h, l, c):
+        pc = self.prev_close
+        tr = _fmax(_fmax(h - l, abs(h - pc)), abs(l - pc))
+        self.prev_close = c
+        return self.sma.update(tr)
+
+class Supertrend(_State):
+    def __init__(self, period=10, mult=2.0):
+        self.mult = float(mult)
+        self.atr = ATR(period)
+        self.st = NAN
+        self.dir = 1
+        self.bars = 0
+
+    def update(self, h, l, c):
+        hl2 = (h + l) / 2
+        atrv = self.atr.update(h, l, c)
+        up = hl2 + self.mult * atrv
+        dn = hl2 - self.mult * atrv
+        if self.bars == 0:
+            self.st, self.dir = up, 1
+        elif atrv == atrv:
+            if c <= up:
+                self.st, self.dir = up, -1
+            else:
+                self.st, self.dir = dn, 1
+        self.bars += 1
+        return self.st, self.dir
+
+class SSL(_State):
+    def __init__(self, period=10):
+        self.sma_high = SMA(period)
+        self.sma_low = SMA(period)
+        self.hlv = 1
+        self.bars = 0
+        self.down = self.up = NAN
+
+    def update(self, h, l, c):
+        hi = self.sma_high.update(h)
+        lo = self.sma_low.update(l)
+        if self.bars > 0:
+            if c > hi:
+                self.hlv = 1
+            elif c < lo:
+                self.hlv = -1
+        self.bars += 1
+        self.down = (self.hlv < 0) * hi + (self.hlv >= 0) * lo
+        self.up = (self.hlv < 0) * lo + (self.hlv >= 0) * hi
+        return self.down, self.up
+
+class WaveTrend(_State):
+    def __init__(self, n1=10, n2=21):
+        self.esa = EMA(n1)
+        self.d = EMA(n1)
+        self.wt1 = EMA(n2)
+        self.wt2 = SMA(4, min_periods=1)
+
+    def update(self, h, l, c):
+        ap = (h + l + c) / 3.0
+        esa = self.esa.update(ap)
+        d = self.d.update(abs(ap - esa))
+        ci = _div(ap - esa, 0.015 * (NAN if d == 0 else d))
+        wt1 = self.wt1.update(ci)
+        return wt1, self.wt2.update(wt1)
+
+# ============== STRATEGIES ==============
+class TMHState(_State):
+    def __init__(self, config):
+        self.config = dict(config)
+        self.ema_f = EMA(int(config.get("ema_fast", 12)))
+        self.ema_s = EMA(int(config.get("ema_slow", 26)))
+        self.st = Supertrend(int(config.get("supertrend_period", 10)),
+                             float(config.get("supertrend_multiplier", 2.0)))
+        self.min_bars = max(MIN_BARS, lookback_tmh(config))
+        self.bars = 0
+        self.close = NAN
+
+    def update(self, h, l, c):
+        self.ema_f.update(c)
+        self.ema_s.update(c)
+        self.st.update(h, l, c)
+        self.close = c
+        self.bars += 1
+
+    def signal(self):
+        if self.bars < self.min_bars:
+            return {"signal":"HOLD", "price": self.close if self.bars else 0}
+        return decide_tmh(self.close, self.ema_f.value, self.ema_s.value, self.st.dir, self.config)
+
+class WTCrossState(_State):
+    def __init__(self, config):
+        self.config = dict(config)
+        self.wt = WaveTrend(int(config.get("n1", 10)), int(config.get("n2", 21)))
+        self.min_bars = max(MIN_BARS, lookback_wt_cross(config))
+        self.prev = (NAN, NAN)
+        self.last = (NAN, NAN)
+        self.bars = 0
+        self.close = NAN
+
+    def update(self, h, l, c):
+        self.prev = self.last
+        self.last = self.wt.update(h, l, c)
+        self.close = c
+        self.bars += 1
+
+    def signal(self):
+        if self.bars < self.min_bars:
+            return {"signal":"HOLD", "price": self.close if self.bars else 0}
+        (p1, p2), (w1, w2) = self.prev, self.last
+        bull = (p1 <= p2) and (w1 > w2)
+        bear = (p1 >= p2) and (w1 < w2)
+        return decide_wt_cross(bull, bear, float(w2), float(self.close), self.config)
+
+class SSLChannelState(_State):
+    def __init__(self, config):
+        self.config = dict(config)
+        self.ssl = SSL(int(config.get("ssl_period", config.get("period", 10))))
+        self.min_bars = max(MIN_BARS, lookback_ssl_channel(config))
+        self.prev = (NAN, NAN)
+        self.last = (NAN, NAN)
+        self.bars = 0
+        self.close = NAN
+
+    def update(self, h, l, c):
+        self.prev = self.last
+        self.last = self.ssl.update(h, l, c)
+        self.close = c
+        self.bars += 1
+
+    def signal(self):
+        if self.bars < self.min_bars:
+            return {"signal":"HOLD", "price": self.close if self.bars else 0}
+        (pd_, pu), (d, u) = self.prev, self.last
+        cross_up = (pu <= pd_) and (u > d)
+        cross_down = (pu >= pd_) and (u < d)
+        return decide_ssl_channel(cross_up, cross_down, float(self.close), self.config)
+
+STATES = {
+    "tmh":         TMHState,
+    "wt_cross":    WTCrossState,
+    "ssl_channel": SSLChannelState,
+}
+
+_TYPES = {c.__name__: c for c in (EMA, SMA, ATR, Supertrend, SSL, WaveTrend,
+                                  TMHState, WTCrossState, SSLChannelState)}
+
+def make_state(stype, config):
+    """Strateji için boş durum; incremental desteği yoksa None."""
+    cls = STATES.get((stype or "tmh").lower())
+    return cls(config) if cls else None
+
+def warmup(state, high, low, close):
+    """Geçmiş barları sırayla besle (bir kere, başlangıçta)."""
+    for h, l, c in zip(high, low, close):
+        state.update(float(h), float(l), float(c))
+    return state
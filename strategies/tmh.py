@@ -5,55 +5,69 @@ def analyze_tmh(df, config):
     - Supertrend Direction
     - Confirmation logic: any_2_of_3, all_3, supertrend_only
     """
-    import pandas as pd
+    from strategies.indicators import as_f64, ema, atr, supertrend, cached
 
-    if len(df) < 50:
-        p = float(df["close"].iloc[-1]) if len(df) else 0
-        return {"signal":"HOLD","price":p}
+    # Config parametreleri
+    ema_fast = int(config.get("ema_fast", 12))
+    ema_slow = int(config.get("ema_slow", 26))
+    st_per   = int(config.get("supertrend_period", 10))
+    st_mult  = float(config.get("supertrend_multiplier", 2.0))
+
+    # İndikatör hesaplamaları
+    h, l, c = as_f64(df["high"]), as_f64(df["low"]), as_f64(df["close"])
+    ema_f = cached("ema", ("close", ema_fast), lambda: ema(c, ema_fast))
+    ema_s = cached("ema", ("close", ema_slow), lambda: ema(c, ema_slow))
+    atrv  = cached("atr", (st_per,), lambda: atr(h, l, c, st_per))
+    _, st_dir = cached("supertrend", (st_per, st_mult), lambda: supertrend(h, l, c, st_per, st_mult, atrv=atrv))
 
-    def ema(s, n): return s.ewm(span=int(n), adjust=False).mean()
+    return decide_tmh(float(c[-1]), ema_f[-1], ema_s[-1], st_dir[-1], config)
 
-    def atr(df_, n=14):
-        h,l,c = df_["high"], df_["low"], df_["close"]
-        tr = pd.concat([(h-l), (h-c.shift()).abs(), (l-c.shift()).abs()], axis=1).max(axis=1)
-        return tr.rolling(window=n).mean()
+def lookback_tmh(config):
+    """EMA'ların sönmesi ve ATR'nin (önceki kapanış dahil) tam penceresi."""
+    from strategies.indicators import ema_settle
+    return max(ema_settle(config.get("ema_fast", 12)), ema_settle(config.get("ema_slow", 26)),
+               int(config.get("supertrend_period", 10)) + 1)
 
-    def supertrend(df_, period=10, mult=2.0):
-        hl2 = (df_["high"] + df_["low"]) / 2
-        atrv = atr(df_, period)
-        up = hl2 + mult*atrv
-        dn = hl2 - mult*atrv
-        st = pd.Series(index=df_.index, dtype=float)
-        dirn = pd.Series(index=df_.index, dtype=int)
-        st.iloc[0] = up.iloc[0]; dirn.iloc[0] = 1
-        for i in range(1, len(df_)):
-            if pd.isna(atrv.iloc[i]):
-                st.iloc[i] = st.iloc[i-1]; dirn.iloc[i] = dirn.iloc[i-1]; continue
-            if df_["close"].iloc[i] <= up.iloc[i]:
-                st.iloc[i] = up.iloc[i]; dirn.iloc[i] = -1
-            else:
-                st.iloc[i] = dn.iloc[i]; dirn.iloc[i] = 1
-        return st, dirn
+def signals_tmh(high, low, close, config):
+    """decide_tmh'nin tüm seriye vektörel uygulanışı (strategies.SIGNALS kodları)."""
+    import numpy as np
+    from strategies.indicators import as_f64, ema, atr, supertrend, cached
 
-    # Config parametreleri
     ema_fast = int(config.get("ema_fast", 12))
     ema_slow = int(config.get("ema_slow", 26))
     st_per   = int(config.get("supertrend_period", 10))
     st_mult  = float(config.get("supertrend_multiplier", 2.0))
+
+    h, l, c = as_f64(high), as_f64(low), as_f64(close)
+    ema_f = cached("ema", ("close", ema_fast), lambda: ema(c, ema_fast))
+    ema_s = cached("ema", ("close", ema_slow), lambda: ema(c, ema_slow))
+    atrv  = cached("atr", (st_per,), lambda: atr(h, l, c, st_per))
+    _, st_dir = cached("supertrend", (st_per, st_mult), lambda: supertrend(h, l, c, st_per, st_mult, atrv=atrv))
+
+    stBull = st_dir == 1
+    stBear = st_dir == -1
+    bull_count = ((ema_f > ema_s) & (c > ema_f)).astype(np.int8) + stBull
+    bear_count = ((ema_f < ema_s) & (c < ema_f)).astype(np.int8) + stBear
+
     confirmation_mode = (config.get("confirmation_mode") or "any_2_of_3").lower()
+    if confirmation_mode == "supertrend_only":
+        conds, codes = [stBull, stBear], [1, 2]
+    elif confirmation_mode == "all_3":
+        conds = [bull_count >= 2, bear_count >= 2, bear_count >= 1, bull_count >= 1]
+        codes = [1, 2, 3, 4]
+    else:
+        conds, codes = [bull_count >= 2, bear_count >= 2], [1, 2]
+    return np.select(conds, codes, 0).astype(np.int8)
 
-    # İndikatör hesaplamaları
-    ema_f = ema(df["close"], ema_fast)
-    ema_s = ema(df["close"], ema_slow)
-    _, st_dir = supertrend(df, st_per, st_mult)
+def decide_tmh(close, ema_f, ema_s, st_dir, config):
+    """Son bar değerlerinden sinyal (batch ve incremental mod ortak)."""
+    confirmation_mode = (config.get("confirmation_mode") or "any_2_of_3").lower()
 
-    close = float(df["close"].iloc[-1])
-    
     # Bullish/Bearish koşullar
-    emaBull = (ema_f.iloc[-1] > ema_s.iloc[-1]) and (close > ema_f.iloc[-1])
-    emaBear = (ema_f.iloc[-1] < ema_s.iloc[-1]) and (close < ema_f.iloc[-1])
-    stBull  = st_dir.iloc[-1] == 1
-    stBear  = st_dir.iloc[-1] == -1
+    emaBull = bool((ema_f > ema_s) and (close > ema_f))
+    emaBear = bool((ema_f < ema_s) and (close < ema_f))
+    stBull  = bool(st_dir == 1)
+    stBear  = bool(st_dir == -1)
 
     bull_count = sum([emaBull, stBull])
     bear_count = sum([emaBear, stBear])
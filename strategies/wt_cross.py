@@ -1,29 +1,49 @@
 def analyze_wt_cross(df, config):
+    from strategies.indicators import as_f64, wavetrend, cross_over, cross_under, cached
+    n1 = int(config.get("n1", 10))
+    n2 = int(config.get("n2", 21))
+
+    wt1, wt2 = cached("wavetrend", (n1, n2), lambda: wavetrend(df["high"], df["low"], df["close"], n1, n2))
+
+    last_bull = bool(cross_over(wt1[-2:], wt2[-2:])[-1])
+    last_bear = bool(cross_under(wt1[-2:], wt2[-2:])[-1])
+    last_wt2  = float(wt2[-1])
+    price = float(as_f64(df["close"])[-1])
+    return decide_wt_cross(last_bull, last_bear, last_wt2, price, config)
+
+def lookback_wt_cross(config):
+    """esa ve sapma EMA'ları (n1, art arda), wt1 EMA'sı (n2), wt2 SMA(4) ve kesişim için önceki bar."""
+    from strategies.indicators import ema_settle
+    return 2 * ema_settle(config.get("n1", 10)) + ema_settle(config.get("n2", 21)) + 4 + 1
+
+def signals_wt_cross(high, low, close, config):
+    """decide_wt_cross'un tüm seriye vektörel uygulanışı (strategies.SIGNALS kodları)."""
     import numpy as np
-    if len(df) < 50:
-        p = float(df['close'].iloc[-1]) if len(df) else 0
-        return {"signal":"HOLD","price":p}
+    from strategies.indicators import wavetrend, cross_over, cross_under, cached
     n1 = int(config.get("n1", 10))
     n2 = int(config.get("n2", 21))
+    wt1, wt2 = cached("wavetrend", (n1, n2), lambda: wavetrend(high, low, close, n1, n2))
+
     ob2 = float(config.get("obLevel2", 53))
     os2 = float(config.get("osLevel2", -53))
-    mode = (config.get("mode") or "basic").lower()  # basic|oversold_bullish|overbought_bearish|dual_filtered
+    mode = (config.get("mode") or "basic").lower()
     enter_exit = bool(config.get("enter_exit", False))
 
-    ap = (df["high"] + df["low"] + df["close"]) / 3.0
-    esa = ap.ewm(span=n1, adjust=False).mean()
-    d = (ap - esa).abs().ewm(span=n1, adjust=False).mean()
-    ci = (ap - esa) / (0.015 * d.replace(0, np.nan))
-    wt1 = ci.ewm(span=n2, adjust=False).mean()
-    wt2 = wt1.rolling(window=4, min_periods=1).mean()
-
-    bull = (wt1.shift(1) <= wt2.shift(1)) & (wt1 > wt2)
-    bear = (wt1.shift(1) >= wt2.shift(1)) & (wt1 < wt2)
+    bull = cross_over(wt1, wt2)
+    bear = cross_under(wt1, wt2)
+    if mode in ("oversold_bullish","dual_filtered"):
+        bull &= wt2 < os2
+    if mode in ("overbought_bearish","dual_filtered"):
+        bear &= wt2 > ob2
+    codes = (4, 3) if enter_exit else (1, 2)
+    return np.select([bull, bear], codes, 0).astype(np.int8)
 
-    last_bull = bool(bull.iloc[-1])
-    last_bear = bool(bear.iloc[-1])
-    last_wt2  = float(wt2.iloc[-1])
-    price = float(df["close"].iloc[-1])
+def decide_wt_cross(last_bull, last_bear, last_wt2, price, config):
+    """Son bar kesişimlerinden sinyal (batch ve incremental mod ortak)."""
+    ob2 = float(config.get("obLevel2", 53))
+    os2 = float(config.get("osLevel2", -53))
+    mode = (config.get("mode") or "basic").lower()  # basic|oversold_bullish|overbought_bearish|dual_filtered
+    enter_exit = bool(config.get("enter_exit", False))
 
     def bull_ok():
         if mode in ("oversold_bullish","dual_filtered"):
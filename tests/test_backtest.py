@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""backtest.simulate / equity_curve: ücretler ve devralınan pozisyon."""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backtest import equity_curve, simulate
+from strategies import SIGNALS
+
+FEE = 0.001
+CLOSE = np.array([100.0, 102.0, 101.0, 105.0, 104.0, 110.0])
+TS = np.arange(len(CLOSE)) * 3_600_000
+
+def codes(**at):
+    out = np.zeros(len(CLOSE), dtype=np.int8)
+    for i, sig in at.items():
+        out[int(i[1:])] = SIGNALS.index(sig)
+    return out
+
+def test_inherited_position_has_no_entry_fee():
+    pos, trades = simulate(codes(b3="EXIT-LONG"), CLOSE, TS, initial_position="LONG", fee=FEE)
+    eq = equity_curve(pos, CLOSE, FEE, initial_side=1)
+    assert eq[0] == 1.0                                 # ilk barda işlem yok
+    (tr,) = trades
+    assert tr["inherited"] and not tr["open"]
+    assert tr["pnl_pct"] == pytest.approx((105 / 100 - 1 - FEE) * 100)
+    assert eq[-1] == pytest.approx(1.02 * (101 / 102) * (105 / 101 - FEE))   # ücret bar getirisinden düşer
+
+def test_round_trip_pays_two_fees():
+    pos, trades = simulate(codes(b1="ENTER-LONG", b3="EXIT-LONG"), CLOSE, TS, fee=FEE)
+    eq = equity_curve(pos, CLOSE, FEE)
+    (tr,) = trades
+    assert "inherited" not in tr
+    assert tr["pnl_pct"] == pytest.approx((105 / 102 - 1 - 2 * FEE) * 100)
+    assert eq[-1] == pytest.approx((1 - FEE) * (101 / 102) * (105 / 101 - FEE))
+
+def test_reversal_charges_double_turnover():
+    pos, trades = simulate(codes(b1="ENTER-SHORT"), CLOSE, TS, initial_position="LONG", fee=FEE)
+    eq = equity_curve(pos, CLOSE, FEE, initial_side=1)
+    assert [t["side"] for t in trades] == ["LONG", "SHORT"]
+    assert eq[1] == pytest.approx(1.02 - 2 * FEE)
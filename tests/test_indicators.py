@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+strategies.indicators çekirdekleri ve analyze_* / signals_* giriş noktaları,
+NumPy'a geçişten önceki pandas referans uygulamalarıyla (aşağıda
+korunan) tick'e yuvarlanmış rastgele seriler üzerinde karşılaştırılır.
+
+    python -m pytest -q tests/test_indicators.py
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import strategies
+from strategies import indicators as ind
+from strategies.ssl_channel import analyze_ssl_channel
+from strategies.tmh import analyze_tmh
+from strategies.wt_cross import analyze_wt_cross
+
+# ============== Veri ==============
+
+def tick_series(n=400, seed=0, tick=0.01, flat=True):
+    """Tick'e yuvarlanmış rastgele yürüyüş; flat=True ise düz bölgeler (eşitlik / sıfır sapma) eklenir."""
+    rng = np.random.default_rng(seed)
+    ret = rng.normal(0, 0.003, n) + 0.002 * np.sin(np.arange(n) / 40.0)
+    c = np.round(100 * np.exp(np.cumsum(ret)) / tick) * tick
+    o = np.concatenate([[c[0]], c[:-1]])
+    h = np.round(np.maximum(o, c) * (1 + np.abs(rng.normal(0, 0.001, n))) / tick) * tick
+    l = np.round(np.minimum(o, c) * (1 - np.abs(rng.normal(0, 0.001, n))) / tick) * tick
+    if flat:
+        for s in rng.integers(60, n - 40, 3):
+            h[s:s + 25] = l[s:s + 25] = c[s:s + 25] = c[s]
+    idx = pd.date_range("2024-01-01", periods=n, freq="1min")
+    return pd.DataFrame({"open": o, "high": h, "low": l, "close": c}, index=idx)
+
+SEEDS = (0, 1, 2)
+
+@pytest.fixture(params=SEEDS)
+def df(request):
+    return tick_series(seed=request.param)
+
+# ============== pandas referansları ==============
+
+def ref_ema(s, n):
+    return s.ewm(span=int(n), adjust=False).mean()
+
+def ref_atr(df_, n=14):
+    h, l, c = df_["high"], df_["low"], df_["close"]
+    tr = pd.concat([(h - l), (h - c.shift()).abs(), (l - c.shift()).abs()], axis=1).max(axis=1)
+    return tr.rolling(window=n).mean()
+
+def ref_supertrend(df_, period=10, mult=2.0):
+    hl2 = (df_["high"] + df_["low"]) / 2
+    atrv = ref_atr(df_, period)
+    up = hl2 + mult * atrv
+    dn = hl2 - mult * atrv
+    st = pd.Series(index=df_.index, dtype=float)
+    dirn = pd.Series(index=df_.index, dtype=int)
+    st.iloc[0] = up.iloc[0]; dirn.iloc[0] = 1
+    for i in range(1, len(df_)):
+        if pd.isna(atrv.iloc[i]):
+            st.iloc[i] = st.iloc[i - 1]; dirn.iloc[i] = dirn.iloc[i - 1]; continue
+        if df_["close"].iloc[i] <= up.iloc[i]:
+            st.iloc[i] = up.iloc[i]; dirn.iloc[i] = -1
+        else:
+            st.iloc[i] = dn.iloc[i]; dirn.iloc[i] = 1
+    return st, dirn
+
+def ref_ssl(df_, period=10):
+    smaHigh = df_["high"].rolling(window=period).mean()
+    smaLow = df_["low"].rolling(window=period).mean()
+    close = df_["close"]
+    hlv = [1]
+    for i in range(1, len(df_)):
+        hi = smaHigh.iloc[i]; lo = smaLow.iloc[i]
+        if close.iloc[i] > (hi if hi == hi else close.iloc[i]):
+            hlv.append(1)
+        elif close.iloc[i] < (lo if lo == lo else close.iloc[i]):
+            hlv.append(-1)
+        else:
+            hlv.append(hlv[-1])
+    hlv = np.array(hlv)
+    sslDown = pd.Series((hlv < 0) * smaHigh + (hlv >= 0) * smaLow, index=df_.index)
+    sslUp = pd.Series((hlv < 0) * smaLow + (hlv >= 0) * smaHigh, index=df_.index)
+    return hlv, sslDown, sslUp
+
+def ref_wavetrend(df_, n1=10, n2=21):
+    ap = (df_["high"] + df_["low"] + df_["close"]) / 3.0
+    esa = ap.ewm(span=n1, adjust=False).mean()
+    d = (ap - esa).abs().ewm(span=n1, adjust=False).mean()
+    ci = (ap - esa) / (0.015 * d.replace(0, np.nan))
+    wt1 = ci.ewm(span=n2, adjust=False).mean()
+    wt2 = wt1.rolling(window=4, min_periods=1).mean()
+    return wt1, wt2
+
+def ref_tmh(df_, config):
+    ema_fast = int(config.get("ema_fast", 12))
+    ema_slow = int(config.get("ema_slow", 26))
+    st_per = int(config.get("supertrend_period", 10))
+    st_mult = float(config.get("supertrend_multiplier", 2.0))
+    confirmation_mode = (config.get("confirmation_mode") or "any_2_of_3").lower()
+    ema_f = ref_ema(df_["close"], ema_fast)
+    ema_s = ref_ema(df_["close"], ema_slow)
+    _, st_dir = ref_supertrend(df_, st_per, st_mult)
+    close = float(df_["close"].iloc[-1])
+    emaBull = (ema_f.iloc[-1] > ema_s.iloc[-1]) and (close > ema_f.iloc[-1])
+    emaBear = (ema_f.iloc[-1] < ema_s.iloc[-1]) and (close < ema_f.iloc[-1])
+    stBull = st_dir.iloc[-1] == 1
+    stBear = st_dir.iloc[-1] == -1
+    bull_count = sum([emaBull, stBull])
+    bear_count = sum([emaBear, stBear])
+    if confirmation_mode == "supertrend_only":
+        if stBull and not stBear:
+            return {"signal": "ENTER-LONG", "price": close}
+        if stBear and not stBull:
+            return {"signal": "ENTER-SHORT", "price": close}
+    elif confirmation_mode == "all_3":
+        if bull_count >= 2:
+            return {"signal": "ENTER-LONG", "price": close}
+        if bear_count >= 2:
+            return {"signal": "ENTER-SHORT", "price": close}
+        if bear_count >= 1:
+            return {"signal": "EXIT-LONG", "price": close}
+        if bull_count >= 1:
+            return {"signal": "EXIT-SHORT", "price": close}
+    else:
+        if bull_count >= 2:
+            return {"signal": "ENTER-LONG", "price": close}
+        if bear_count >= 2:
+            return {"signal": "ENTER-SHORT", "price": close}
+    return {"signal": "HOLD", "price": close}
+
+def ref_ssl_channel(df_, config):
+    period = int(config.get("ssl_period", config.get("period", 10)))
+    _, sslDown, sslUp = ref_ssl(df_, period)
+    cross_up = (sslUp.shift(1) <= sslDown.shift(1)) & (sslUp > sslDown)
+    cross_down = (sslUp.shift(1) >= sslDown.shift(1)) & (sslUp < sslDown)
+    price = float(df_["close"].iloc[-1])
+    enter_exit = bool(config.get("enter_exit", False))
+    if cross_up.iloc[-1]:
+        return {"signal": ("EXIT-SHORT" if enter_exit else "ENTER-LONG"), "price": price}
+    if cross_down.iloc[-1]:
+        return {"signal": ("EXIT-LONG" if enter_exit else "ENTER-SHORT"), "price": price}
+    return {"signal": "HOLD", "price": price}
+
+def ref_wt_cross(df_, config):
+    n1 = int(config.get("n1", 10))
+    n2 = int(config.get("n2", 21))
+    ob2 = float(config.get("obLevel2", 53))
+    os2 = float(config.get("osLevel2", -53))
+    mode = (config.get("mode") or "basic").lower()
+    enter_exit = bool(config.get("enter_exit", False))
+    wt1, wt2 = ref_wavetrend(df_, n1, n2)
+    bull = (wt1.shift(1) <= wt2.shift(1)) & (wt1 > wt2)
+    bear = (wt1.shift(1) >= wt2.shift(1)) & (wt1 < wt2)
+    last_bull = bool(bull.iloc[-1])
+    last_bear = bool(bear.iloc[-1])
+    last_wt2 = float(wt2.iloc[-1])
+    price = float(df_["close"].iloc[-1])
+    bull_ok = last_bull and (last_wt2 < os2) if mode in ("oversold_bullish", "dual_filtered") else last_bull
+    bear_ok = last_bear and (last_wt2 > ob2) if mode in ("overbought_bearish", "dual_filtered") else last_bear
+    if bull_ok:
+        return {"signal": ("EXIT-SHORT" if enter_exit else "ENTER-LONG"), "price": price}
+    if bear_ok:
+        return {"signal": ("EXIT-LONG" if enter_exit else "ENTER-SHORT"), "price": price}
+    return {"signal": "HOLD", "price": price}
+
+# ============== İndikatörler ==============
+
+@pytest.mark.parametrize("n", [1, 2, 12, 26, 50])
+def test_ema(df, n):
+    np.testing.assert_array_equal(ind.ema(df["close"], n), ref_ema(df["close"], n).to_numpy())
+
+@pytest.mark.parametrize("n,minp", [(1, None), (4, None), (10, None), (4, 1), (20, 5)])
+def test_sma(df, n, minp):
+    want = df["high"].rolling(window=n, min_periods=minp).mean().to_numpy()
+    np.testing.assert_allclose(ind.sma(df["high"], n, min_periods=minp), want, rtol=1e-12, atol=0)
+
+@pytest.mark.parametrize("n", [1, 10, 14])
+def test_atr(df, n):
+    got = ind.atr(df["high"], df["low"], df["close"], n)
+    np.testing.assert_allclose(got, ref_atr(df, n).to_numpy(), rtol=1e-12, atol=0)
+
+@pytest.mark.parametrize("period,mult", [(10, 2.0), (7, 3.0), (14, 1.0)])
+def test_supertrend(df, period, mult):
+    st, dirn = ind.supertrend(df["high"], df["low"], df["close"], period, mult)
+    ref_st, ref_dir = ref_supertrend(df, period, mult)
+    np.testing.assert_array_equal(dirn, ref_dir.to_numpy())
+    np.testing.assert_allclose(st, ref_st.to_numpy(), rtol=1e-12, atol=0)
+
+@pytest.mark.parametrize("period", [5, 10, 20])
+def test_ssl_state(df, period):
+    hlv, down, up = ind.ssl_state(df["high"], df["low"], df["close"], period)
+    ref_hlv, ref_down, ref_up = ref_ssl(df, period)
+    np.testing.assert_array_equal(hlv, ref_hlv)
+    np.testing.assert_allclose(down, ref_down.to_numpy(), rtol=1e-12, atol=0)
+    np.testing.assert_allclose(up, ref_up.to_numpy(), rtol=1e-12, atol=0)
+
+@pytest.mark.parametrize("n1,n2", [(10, 21), (6, 13), (21, 34)])
+def test_wavetrend(df, n1, n2):
+    wt1, wt2 = ind.wavetrend(df["high"], df["low"], df["close"], n1, n2)
+    ref1, ref2 = ref_wavetrend(df, n1, n2)
+    np.testing.assert_allclose(wt1, ref1.to_numpy(), rtol=1e-9, atol=1e-9)
+    np.testing.assert_allclose(wt2, ref2.to_numpy(), rtol=1e-9, atol=1e-9)
+
+def test_2d_rows_match_1d():
+    frames = [tick_series(seed=s) for s in SEEDS]
+    h, l, c = (np.stack([f[k].to_numpy() for f in frames]) for k in ("high", "low", "close"))
+    st2, dir2 = ind.supertrend(h, l, c, 10, 2.0)
+    wt1_2, _ = ind.wavetrend(h, l, c)
+    for i, f in enumerate(frames):
+        st, dirn = ind.supertrend(f["high"], f["low"], f["close"], 10, 2.0)
+        np.testing.assert_array_equal(st2[i], st)
+        np.testing.assert_array_equal(dir2[i], dirn)
+        np.testing.assert_array_equal(wt1_2[i], ind.wavetrend(f["high"], f["low"], f["close"])[0])
+
+# ============== Stratejiler ==============
+
+CASES = [
+    ("tmh", analyze_tmh, ref_tmh, {}),
+    ("tmh", analyze_tmh, ref_tmh, {"confirmation_mode": "all_3"}),
+    ("tmh", analyze_tmh, ref_tmh, {"confirmation_mode": "supertrend_only", "supertrend_period": 7,
+                                   "supertrend_multiplier": 3.0}),
+    ("tmh", analyze_tmh, ref_tmh, {"ema_fast": 5, "ema_slow": 20}),
+    ("ssl_channel", analyze_ssl_channel, ref_ssl_channel, {}),
+    ("ssl_channel", analyze_ssl_channel, ref_ssl_channel, {"ssl_period": 20, "enter_exit": True}),
+    ("wt_cross", analyze_wt_cross, ref_wt_cross, {}),
+    ("wt_cross", analyze_wt_cross, ref_wt_cross, {"mode": "dual_filtered", "obLevel2": 20, "osLevel2": -20}),
+    ("wt_cross", analyze_wt_cross, ref_wt_cross, {"mode": "oversold_bullish", "osLevel2": 0, "enter_exit": True}),
+    ("wt_cross", analyze_wt_cross, ref_wt_cross, {"mode": "overbought_bearish", "obLevel2": 0, "n1": 6, "n2": 13}),
+]
+
+@pytest.mark.parametrize("name,analyze,ref,config", CASES)
+def test_analyze_matches_reference(name, analyze, ref, config):
+    df = tick_series(n=260, seed=3)
+    got, want = [], []
+    for k in range(strategies.MIN_BARS, len(df) + 1):
+        part = df.iloc[:k]
+        got.append(analyze(part, config))
+        want.append(ref(part, config))
+    assert got == want
+    # Karşılaştırma anlamlı olsun: en az bir HOLD dışı sinyal
+    assert any(s["signal"] != "HOLD" for s in want)
+
+@pytest.mark.parametrize("name,analyze,ref,config", CASES)
+def test_signals_match_analyze(name, analyze, ref, config):
+    df = tick_series(n=260, seed=4)
+    codes = strategies.get(name).signals(df["high"], df["low"], df["close"], config)
+    got = [strategies.SIGNALS[k] for k in codes[strategies.MIN_BARS - 1:].tolist()]
+    want = [ref(df.iloc[:k], config)["signal"] for k in range(strategies.MIN_BARS, len(df) + 1)]
+    assert got == want
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""KlineSeries: sona ekleme (eşzamanlı dahil), birleştirme, boşluk onarımı ve yarım yazma kurtarma."""
+import os
+import sys
+from threading import Barrier, Thread
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kline_store import COLUMNS, KlineStore, backfill, repair
+
+STEP = 60_000
+
+def klines(start, n, price=100.0):
+    """Binance get_klines formatında n bar (start: ilk bar indeksi)."""
+    out = []
+    for i in range(start, start + n):
+        o = i * STEP
+        out.append([o, str(price + i), str(price + i + 1), str(price + i - 1), str(price + i + 0.5),
+                    "10", o + STEP - 1, "0", 1, "0", "0", "0"])
+    return out
+
+def rows(start, n, price=100.0):
+    ts = np.arange(start, start + n, dtype=np.int64) * STEP
+    base = price + np.arange(start, start + n, dtype=np.float64)
+    return {"ts": ts, "open": base, "high": base + 1, "low": base - 1, "close": base + 0.5,
+            "volume": np.full(n, 10.0)}
+
+def fake_fetch(start_bar, end_bar, missing=()):
+    """Borsa taklidi: [start_bar, end_bar) barları, missing hariç."""
+    def fetch(symbol, interval, start_ms, end_ms):
+        a = max(start_ms // STEP, start_bar)
+        b = min(end_ms // STEP + 1, end_bar, a + 1000)
+        return [k for k in klines(a, max(0, b - a)) if k[0] // STEP not in missing]
+    return fetch
+
+def test_append_only_newer_and_reopen(tmp_path):
+    s = KlineStore(str(tmp_path)).series("SOLUSDT", "1m")
+    assert s.append(rows(0, 10)) == 10
+    assert s.append(rows(5, 10)) == 5            # 5..9 zaten var
+    assert s.append(rows(0, 3)) == 0
+    s2 = KlineStore(str(tmp_path)).series("SOLUSDT", "1m")
+    assert len(s2) == 15 and s2.first == 0 and s2.last == 14 * STEP
+    np.testing.assert_array_equal(s2.range()["close"], rows(0, 15)["close"])
+
+def test_concurrent_appends_stay_monotonic(tmp_path):
+    s = KlineStore(str(tmp_path)).series("SOLUSDT", "1m")
+    s.append(rows(0, 1))
+    n_threads, start = 8, Barrier(8)
+
+    def run():
+        start.wait()
+        for k in range(1, 60):
+            s.append(rows(k, 1))                  # hepsi aynı barları yazmaya çalışır
+
+    ts = [Thread(target=run) for _ in range(n_threads)]
+    [t.start() for t in ts]
+    [t.join() for t in ts]
+    got = KlineStore(str(tmp_path)).series("SOLUSDT", "1m").range()["ts"]
+    np.testing.assert_array_equal(got, np.arange(60) * STEP)
+
+def test_merge_backfills_and_overwrites(tmp_path):
+    s = KlineStore(str(tmp_path)).series("SOLUSDT", "1m")
+    s.append(rows(10, 10))
+    assert s.merge(rows(0, 12, price=500.0)) == 10   # 0..9 eklendi, 10..11 güncellendi
+    a = s.range()
+    np.testing.assert_array_equal(a["ts"], np.arange(20) * STEP)
+    assert a["close"][11] == 500.0 + 11 + 0.5
+    assert a["close"][12] == 100.0 + 12 + 0.5
+    assert s.append(rows(20, 1)) == 1
+
+def test_backfill_and_repair_gaps(tmp_path):
+    store = KlineStore(str(tmp_path))
+    backfill(store, "SOLUSDT", "1m", 100 * STEP, 400 * STEP, fetch=fake_fetch(0, 400, missing=range(150, 160)))
+    s = store.series("SOLUSDT", "1m")
+    assert s.gaps() == [(150 * STEP, 159 * STEP)]
+
+    backfill(store, "SOLUSDT", "1m", 0, 400 * STEP, fetch=fake_fetch(0, 400))
+    assert s.first == 0
+    filled, left = repair(store, "SOLUSDT", "1m", fetch=fake_fetch(0, 400))
+    assert (filled, left) == (10, 0)
+    np.testing.assert_array_equal(s.range()["ts"], np.arange(400) * STEP)
+
+def test_partial_append_truncated_on_open(tmp_path):
+    s = KlineStore(str(tmp_path)).series("SOLUSDT", "1m")
+    s.append(rows(0, 5))
+    # ts yazılmadan kesilen ekleme: diğer sütunlarda fazladan satır + yarım bayt
+    for c in COLUMNS[1:]:
+        with open(s._file(c), "ab") as f:
+            f.write(np.zeros(2).tobytes() + b"\x01\x02")
+    s2 = KlineStore(str(tmp_path)).series("SOLUSDT", "1m")
+    assert len(s2) == 5
+    assert all(os.path.getsize(s2._file(c)) == 5 * 8 for c in COLUMNS)
+    assert s2.append(rows(5, 1)) == 1
+    np.testing.assert_array_equal(s2.range()["open"], rows(0, 6)["open"])
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+resample: kova hizalama (hafta Pazartesi) ve Resampler'ın artımlı ürettiği
+üst-tf penceresinin aynı taban barlarından toplu resample ile birebir aynı
+olması; taban barı kaçınca ve borsa farkında yeniden yükleme.
+"""
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ohlcv import OHLCV
+from resample import (NATIVE_MS, WEEK_MS, Resampler, floor, label, plan, resample,
+                      source_interval, tf_ms)
+
+BASE = NATIVE_MS["1m"]
+T0 = 1_704_067_200_000                   # 2024-01-01 00:00 UTC (Pazartesi)
+
+def base_bars(n, seed):
+    rng = np.random.default_rng(seed)
+    c = np.round(100 + np.cumsum(rng.normal(0, 0.3, n)), 2)
+    o = np.r_[c[0], c[:-1]]
+    h = np.maximum(o, c) + np.round(rng.uniform(0, 0.2, n), 2)
+    l = np.minimum(o, c) - np.round(rng.uniform(0, 0.2, n), 2)
+    return OHLCV(T0 + np.arange(n, dtype=np.int64) * BASE, o, h, l, c, rng.uniform(1, 10, n))
+
+def assert_same(got, want):
+    np.testing.assert_array_equal(got.ts, want.ts)
+    for c in ("open", "high", "low", "close"):
+        np.testing.assert_array_equal(got[c], want[c])
+    np.testing.assert_allclose(got.volume, want.volume, rtol=1e-12)
+
+class Exchange:
+    """history_fn taklidi: `now` barı oluşan mum, öncesindeki tam kovalar kapanmış."""
+
+    def __init__(self, bars, step):
+        self.bars, self.step, self.now, self.bias = bars, step, 0, 0.0
+
+    def __call__(self, symbol, tf, limit):
+        out = resample(self.bars[:self.now + 1], self.step, BASE)[-limit:]
+        return OHLCV(out.ts, out.open, out.high, out.low, out.close + self.bias, out.volume)
+
+def test_tf_and_alignment():
+    assert tf_ms("45m") == 45 * 60_000 and tf_ms(" 2H ") == 7_200_000
+    assert tf_ms("0m") is None and tf_ms("abc") is None
+    assert label(3_600_000) == "1h" and label(7 * 86_400_000) == "1w"
+    assert floor(T0 + 3 * 86_400_000 + 5, WEEK_MS) == T0          # Perşembe -> Pazartesi
+    assert floor(T0 + 50 * 60_000, tf_ms("45m")) % tf_ms("45m") == 0
+    assert source_interval(tf_ms("45m")) == "15m"
+    assert source_interval(tf_ms("2w")) == "1w"                     # 3d haftaya hizalı değil
+    assert source_interval(tf_ms("3w"), max_ratio=2) is None
+    assert plan({"SOL": {"5m", "15m", "1h"}}) == {("SOL", "15m"): "5m", ("SOL", "1h"): "5m"}
+    assert plan({"SOL": {"1h", "45m"}}, base="") == {("SOL", "45m"): "15m"}
+
+def test_batch_drops_partial_buckets():
+    w = base_bars(100, 1)[7:]                                      # ilk kova eksik başlar
+    full = resample(w, tf_ms("15m"), BASE)
+    assert full.ts[0] == T0 + 15 * BASE and len(full) == 5          # 90..99 kovası eksik
+    assert (full.ts[1:] - full.ts[:-1] == tf_ms("15m")).all()
+
+@pytest.mark.parametrize("tf", ["15m", "45m", "2h"])
+def test_incremental_matches_batch(tf):
+    step, bars = tf_ms(tf), base_bars(3000, 2)
+    ex = Exchange(bars, step)
+    r = Resampler(ex, history=50)
+    rng = np.random.default_rng(3)
+    i, limit = 900, 30
+    while i < len(bars):
+        ex.now = i
+        out = r.window("SOL", tf, "1m", bars[max(0, i - 200):i + 1], limit)
+        assert_same(out, resample(bars[:i + 1], step)[-limit:])
+        i += int(rng.integers(1, 7))
+    assert r.stats["seed"] == 1 and r.stats["fold"] > 0
+
+def test_gap_in_base_reseeds():
+    step, bars = tf_ms("15m"), base_bars(1500, 4)
+    ex = Exchange(bars, step)
+    r = Resampler(ex, history=50)
+    for i in (600, 601, 1000):                                     # 1000: pencere 602'yi kapsamıyor
+        ex.now = i
+        out = r.window("SOL", "15m", "1m", bars[i - 100:i + 1], 20)
+        assert_same(out, resample(bars[:i + 1], step)[-20:])
+    assert r.stats["seed"] == 2
+
+def test_check_mismatch_reloads_from_exchange():
+    step, bars = tf_ms("15m"), base_bars(1500, 5)
+    ex = Exchange(bars, step)
+    r = Resampler(ex, history=50, verify_bars=10)
+    ex.now, ex.bias = 600, 1.0                                     # yanlış geçmişle yüklendi
+    r.window("SOL", "15m", "1m", bars[500:601], 20)
+    ex.bias = 0.0
+    assert r.check("SOL", "15m") == 10
+    ex.now = 601
+    assert_same(r.window("SOL", "15m", "1m", bars[501:602], 20), resample(bars[:602], step)[-20:])
+    assert r.stats["seed"] == 2 and r.check("SOL", "15m") == 0
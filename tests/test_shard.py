@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+ShardCoordinator: aynı sqlite dosyasını paylaşan iki worker arasında lease
+alma, devir (durumla birlikte), süre dolması ve kuyruktaki alert'lerin
+lease kaybında gönderilmemesi.
+"""
+import os
+import sys
+from time import sleep
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from shard import ShardCoordinator, SQLiteLeaseStore
+from wt_dispatch import AlertDispatcher, FakeWTServer
+
+KEYS = [f"P{i}USDT@1m" for i in range(40)]
+
+def worker(path, wid, ttl=30.0, states=None):
+    acquired = {}
+    c = ShardCoordinator(SQLiteLeaseStore(path), lambda: KEYS, worker_id=wid, ttl=ttl,
+                         state_fn=lambda keys: {k: (states or {}).get(k) for k in keys if (states or {}).get(k)},
+                         on_acquire=acquired.update)
+    c.acquired = acquired
+    return c
+
+def owned(c):
+    return {k for k in KEYS if c.owns(k)}
+
+def test_single_worker_claims_all(tmp_path):
+    a = worker(str(tmp_path / "shard.db"), "a")
+    assert a.tick() == len(KEYS)
+    assert owned(a) == set(KEYS)
+
+def test_handover_to_new_worker_with_state(tmp_path):
+    path = str(tmp_path / "shard.db")
+    a = worker(path, "a", states={k: {"pos": "LONG", "last_sig": "ENTER-LONG", "ts": 1.0} for k in KEYS})
+    b = worker(path, "b")
+    a.tick()
+    b.tick()                        # b halkada ama lease'ler hâlâ a'da
+    assert not owned(b) and owned(a) == set(KEYS)
+
+    a.tick()                        # a, b'ye düşenleri son durumla bırakır
+    b.tick()                        # b alır
+    oa, ob = owned(a), owned(b)
+    assert oa and ob and not (oa & ob) and oa | ob == set(KEYS)
+    assert set(b.acquired) == ob
+    assert all(st == {"pos": "LONG", "last_sig": "ENTER-LONG", "ts": 1.0} for st in b.acquired.values())
+
+def test_lease_expires_when_worker_dies(tmp_path):
+    path = str(tmp_path / "shard.db")
+    a = worker(path, "a", ttl=0.4)
+    b = worker(path, "b", ttl=0.4)
+    a.tick()
+    b.tick()
+    a.tick()
+    b.tick()
+    assert owned(a) and owned(b)
+
+    sleep(0.45)                     # a kalp atmıyor (çöktü)
+    assert not owned(a)             # kendi saatine göre %90'da bırakır
+    b.tick()
+    assert owned(b) == set(KEYS)
+
+def test_close_releases_immediately(tmp_path):
+    path = str(tmp_path / "shard.db")
+    a = worker(path, "a")
+    b = worker(path, "b")
+    a.tick()
+    b.tick()
+    a.close()
+    assert not owned(a)
+    b.tick()
+    assert owned(b) == set(KEYS)
+
+def test_queued_alert_fenced_after_lease_loss(tmp_path, monkeypatch):
+    srv = FakeWTServer().start()
+    try:
+        d = AlertDispatcher(srv.url, senders=1, max_retries=0)
+        owner = {"X@1m": False}
+        d.can_send = lambda alert: owner.get(alert["meta"]["pair"], True)
+        dead = []
+        d.on_dead = dead.append
+        d.start()
+        d.submit("ENTER", meta={"pair": "X@1m"})
+        d.submit("OTHER", meta={"pair": "Y@1m"})
+        assert d.drain(10)
+        assert [r["payload"]["code"] for r in srv.received] == ["OTHER"]
+        assert [a["payload"]["code"] for a in dead] == ["ENTER"]
+        assert d.stats["fenced"] == 1
+    finally:
+        srv.stop()
+
+def test_dead_alert_not_rolled_back_for_foreign_pair(monkeypatch):
+    prev = {"pos": "NONE", "last_sig": None, "ts": 0}
+    cur = {"pos": "LONG", "last_sig": "ENTER-LONG", "ts": 5.0}
+    monkeypatch.setattr(bot, "pos_state", {"X@1m": dict(cur)})
+    alert = {"meta": {"pair": "X@1m", "signal": "ENTER-LONG", "prev": prev, "ts": 5.0}}
+
+    monkeypatch.setattr(bot, "owns", lambda k: False)
+    bot._on_dead_alert(alert)
+    assert bot.pos_state["X@1m"] == cur
+
+    monkeypatch.setattr(bot, "owns", lambda k: True)
+    bot._on_dead_alert(alert)
+    assert bot.pos_state["X@1m"] == prev
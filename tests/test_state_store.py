@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+StateStore: flush edilen durum restart (close'suz çökme dahil) sonrası
+geri okunur; yazma hatasında kirli kayıtlar, arada gelen daha yeni
+değerleri ezmeden sıraya geri konur.
+"""
+import os
+import sys
+from time import sleep
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from state_store import StateStore
+
+LONG = {"pos": "LONG", "last_sig": "ENTER-LONG", "ts": 10.0}
+
+class FailingConn:
+    """sqlite bağlantısı taklidi: executemany hata verir (öncesinde on_write çağrılır)."""
+
+    def __init__(self, conn, on_write=None):
+        self.conn, self.on_write = conn, on_write
+
+    def execute(self, *a):
+        return self.conn.execute(*a)
+
+    def executemany(self, *a):
+        if self.on_write:
+            self.on_write()
+        raise OSError("disk dolu")
+
+    def close(self):
+        self.conn.close()
+
+def test_roundtrip_and_delete(tmp_path):
+    path = str(tmp_path / "state.db")
+    s = StateStore(path)
+    s.put("A@1m", dict(LONG, entry=101.5))
+    s.put("B@1m", {"pos": "SHORT", "last_sig": None, "ts": 0})
+    s.put_indicator("A@1m", "tmh|12", 600_000, {"ema": [1.0, 2.0]})
+    assert s.flush() == 3
+    s.delete("B@1m")
+    s.put("A@1m", dict(LONG, ts=11.0))
+    s.close()
+
+    s2 = StateStore(path)
+    assert s2.load() == {"A@1m": dict(LONG, ts=11.0)}
+    assert s2.load_indicators() == {"A@1m": ("tmh|12", 600_000, {"ema": [1.0, 2.0]})}
+    s2.delete_indicator("A@1m")
+    s2.close()
+    assert StateStore(path).load_indicators() == {}
+
+def test_flushed_state_survives_crash(tmp_path):
+    path = str(tmp_path / "state.db")
+    s = StateStore(path)
+    s.put("A@1m", LONG)
+    s.flush()
+    s.put("B@1m", LONG)               # flush'tan önce çöktü: kaybolur, A kalır
+    assert StateStore(path).load() == {"A@1m": LONG}
+
+def test_failed_flush_requeues_without_clobbering(tmp_path):
+    path = str(tmp_path / "state.db")
+    s = StateStore(path)
+    s.put("A@1m", LONG)
+    s.put("B@1m", LONG)
+    s.put_indicator("A@1m", "p", 1, {"x": 1})
+    newer = {"pos": "NONE", "last_sig": "EXIT-LONG", "ts": 20.0}
+    real = s._conn
+    s._conn = FailingConn(real, on_write=lambda: s.put("A@1m", newer))
+    assert s.flush() == 0
+    s._conn = real
+    assert s.flush() == 3
+    s.close()
+    s2 = StateStore(path)
+    assert s2.load() == {"A@1m": newer, "B@1m": LONG}
+    assert s2.load_indicators() == {"A@1m": ("p", 1, {"x": 1})}
+
+def test_background_flush_and_close(tmp_path):
+    path = str(tmp_path / "state.db")
+    s = StateStore(path, flush_interval=0.05).start()
+    s.put("A@1m", LONG)
+    sleep(0.3)
+    assert StateStore(path).load() == {"A@1m": LONG}
+    s.put("B@1m", LONG)
+    s.close()                          # kalanlar kapanışta yazılır
+    assert set(StateStore(path).load()) == {"A@1m", "B@1m"}
+
+def test_unreadable_rows_skipped(tmp_path):
+    path = str(tmp_path / "state.db")
+    s = StateStore(path)
+    s.put("A@1m", LONG)
+    s.put_indicator("A@1m", "p", 1, {"x": 1})
+    s.flush()
+    s._conn.execute("UPDATE positions SET extra = '{bozuk'")
+    s._conn.execute("INSERT INTO indicators VALUES ('B@1m', 'p', 1, 'bozuk')")
+    assert s.load() == {"A@1m": LONG}
+    assert set(s.load_indicators()) == {"A@1m"}
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Artımlı (EVAL_MODE=incremental) indikatör durumları: JSON'a yazılıp geri
+okunan durum kaldığı bardan aynı sonuçlarla devam etmeli; bot restart'ta
+durumları state_store'dan yükler.
+"""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from ohlcv import OHLCV
+from state_store import StateStore
+from strategies.streaming import load_state, make_state, warmup
+from test_indicators import tick_series
+
+def window(n, seed):
+    df = tick_series(n=n, seed=seed)
+    return OHLCV.from_frame(df.assign(volume=1.0))
+
+CONFIGS = [
+    {"type": "tmh"},
+    {"type": "wt_cross", "n1": 6, "n2": 13},
+    {"type": "ssl_channel", "ssl_period": 20},
+]
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_state_json_roundtrip_continues(config):
+    df = tick_series(n=300, seed=5)
+    h, l, c = (df[k].to_numpy() for k in ("high", "low", "close"))
+    live = warmup(make_state(config["type"], config), h[:150], l[:150], c[:150])
+    restored = load_state(json.loads(json.dumps(live.to_dict())))
+    for i in range(150, 300):
+        live.update(h[i], l[i], c[i])
+        restored.update(h[i], l[i], c[i])
+        assert restored.signal() == live.signal()
+
+@pytest.fixture
+def inc_store(tmp_path, monkeypatch):
+    store = StateStore(str(tmp_path / "state.db"))
+    monkeypatch.setattr(bot, "EVAL_MODE", "incremental")
+    monkeypatch.setattr(bot, "state_store", store)
+    monkeypatch.setattr(bot, "_inc_states", {})
+    yield store
+    store.close()
+
+@pytest.mark.parametrize("config", CONFIGS)
+def test_restart_resumes_from_store(inc_store, config):
+    full = window(300, 6)
+    bot.analyze_incremental("X@1m", full[:200], config)
+    inc_store.flush()
+
+    bot._inc_states.clear()              # restart
+    assert bot.restore_inc_states() == 1
+    assert bot._inc_states["X@1m"]["last_ts"] == full[:199].last_open
+    resumed = [bot.analyze_incremental("X@1m", full[:k], config) for k in range(201, 300)]
+
+    bot._inc_states.clear()              # soğuk warm-up ile karşılaştır
+    inc_store.delete_indicator("X@1m")
+    cold = [bot.analyze_incremental("X@1m", full[:k], config) for k in range(201, 300)]
+    assert resumed == cold
+
+def test_changed_params_rewarm(inc_store):
+    full = window(300, 7)
+    bot.analyze_incremental("X@1m", full[:200], {"type": "tmh"})
+    inc_store.flush()
+    bot._inc_states.clear()
+    bot.restore_inc_states()
+    cfg = {"type": "tmh", "ema_fast": 5}
+    got = bot.analyze_incremental("X@1m", full[:250], cfg)
+    bot._inc_states.clear()
+    assert got == bot.analyze_incremental("X@1m", full[:250], cfg)
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+KlineStream: ara güncellemeler tetiklemez, her bar kapanışı on_close'u bir
+kez çağırır ve pencere REST görünümüyle aynıdır (son satır oluşan mum).
+Replay sunucusuna karşı uçtan uca; bot._on_bar_close türetilen
+timeframe'leri sadece kendi kovaları kapanınca çalıştırır.
+"""
+import asyncio
+import json
+import os
+import socket
+import sys
+from threading import Event, Thread
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot
+from ws_feed import INTERVAL_MS, KlineStream, kline_msg, serve_replay, synthetic_messages
+
+T0 = 1_704_067_200_000                   # 15m / 1h'e hizalı
+STEP = INTERVAL_MS["5m"]
+
+def bar(i, c=100.0):
+    return (T0 + i * STEP, c, c + 1, c - 1, c + i, 2.0)
+
+def msg(*a):
+    return json.dumps(kline_msg(*a))
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def test_close_triggers_once_with_forming_placeholder():
+    closes = []
+    s = KlineStream([("SOLUSDT", "5m")], on_close=lambda sym, iv: closes.append((sym, iv)))
+    s._handle('{"data": {"e": "trade"}}')
+    for j in range(3):                                     # ara güncellemeler
+        s._handle(msg("SOLUSDT", "5m", bar(0, 100.0 + j), False))
+    assert closes == [] and len(s.get_klines("SOLUSDT", "5m")) == 1
+
+    s._handle(msg("SOLUSDT", "5m", bar(0, 103.0), True))
+    assert closes == [("SOLUSDT", "5m")]
+    w = s.get_klines("SOLUSDT", "5m")
+    assert list(w.ts) == [T0, T0 + STEP]                   # kapanan + oluşan yer tutucu
+    assert w.close[0] == 103.0 and w.open[1] == 103.0 and w.volume[1] == 0.0
+
+    s._handle(msg("SOLUSDT", "5m", bar(1, 104.0), False))   # yer tutucu ezilir
+    w = s.get_klines("SOLUSDT", "5m")
+    assert list(w.ts) == [T0, T0 + STEP] and w.open[1] == 104.0
+    s._handle(msg("SOLUSDT", "5m", bar(0, 1.0), False))     # geç gelen eski bar yok sayılır
+    assert s.get_klines("SOLUSDT", "5m").close[0] == 103.0
+
+def test_replay_end_to_end():
+    keys = [("SOLUSDT", "15m"), ("XRPUSDT", "5m")]
+    events = synthetic_messages(keys, bars=30, ticks=3, start_ms=T0)
+    port = free_port()
+    # Sunucu ve istemci daemon thread'lerde kalır; bağlantı açık durur, yeniden bağlanma olmaz
+    loop = asyncio.new_event_loop()
+    Thread(target=loop.run_until_complete, args=(serve_replay(events, port=port, speed=0),), daemon=True).start()
+
+    closed = {k: [] for k in keys}
+    done = Event()
+
+    def on_close(symbol, interval):
+        closed[(symbol, interval)].append(int(s.get_klines(symbol, interval, 2).ts[0]))
+        if all(len(v) == 30 for v in closed.values()):
+            done.set()
+
+    s = KlineStream(keys, on_close=on_close, url=f"ws://127.0.0.1:{port}")
+    for _ in range(50):                                    # sunucu dinlemeye başlasın
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            done.wait(0.05)
+    s.start()
+    assert done.wait(10), {k: len(v) for k, v in closed.items()}
+
+    for k in keys:
+        step = INTERVAL_MS[k[1]]
+        assert closed[k] == [T0 + i * step for i in range(30)]
+        want = [float(m["data"]["k"]["c"]) for _, m in events
+                if m["data"]["k"]["x"] and (m["data"]["s"], m["data"]["k"]["i"]) == k]
+        assert list(s.get_klines(*k, limit=31).close[:-1]) == want
+
+class SyncThread:
+    def __init__(self, target, args=(), kwargs=None, **_):
+        self.run = lambda: target(*args, **(kwargs or {}))
+
+    def start(self):
+        self.run()
+
+def test_bot_triggers_derived_tf_on_bucket_close(monkeypatch):
+    p5 = {"symbol": "SOLUSDT", "timeframe": "5m"}
+    p15 = {"symbol": "SOLUSDT", "timeframe": "15m"}
+    feed = KlineStream([("SOLUSDT", "5m")], on_close=bot._on_bar_close)
+    runs = []
+    monkeypatch.setattr(bot, "kline_feed", feed)
+    monkeypatch.setattr(bot, "_stream_pairs", {("SOLUSDT", "5m"): [p5, p15]})
+    monkeypatch.setattr(bot, "owned", lambda p: True)
+    monkeypatch.setattr(bot, "Thread", SyncThread)
+    monkeypatch.setattr(bot, "run_pairs", lambda pairs, cycle, label=None: runs.append([p["timeframe"] for p in pairs]))
+
+    for i in range(9):
+        feed._handle(msg("SOLUSDT", "5m", bar(i), False))
+        feed._handle(msg("SOLUSDT", "5m", bar(i), True))
+    # 15m kovası 2., 5. ve 8. 5m barının kapanışında kapanır
+    assert runs == [["5m"], ["5m"], ["5m", "15m"]] * 3
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+"""
+AlertDispatcher: sahte WT endpoint'ine (FakeWTServer) karşı retry, parite
+başına sıra ve outbox kurtarma.
+"""
+import json
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wt_dispatch import AlertDispatcher, FakeWTServer
+
+@pytest.fixture
+def server():
+    srv = FakeWTServer().start()
+    yield srv
+    srv.stop()
+
+def dispatcher(url, outbox=None, **kw):
+    kw.setdefault("senders", 4)
+    kw.setdefault("max_retries", 50)
+    return AlertDispatcher(url, outbox_path=outbox, base_backoff=0.005, max_backoff=0.05, timeout=2, **kw)
+
+def codes(srv):
+    return [r["payload"]["code"] for r in srv.received]
+
+def outbox_ops(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+def test_retries_until_delivered(server):
+    random.seed(1)
+    server.fail_rate = 0.5
+    d = dispatcher(server.url).start()
+    for i in range(20):
+        d.submit(f"A{i}")
+    assert d.drain(20)
+    assert sorted(codes(server)) == sorted(f"A{i}" for i in range(20))
+    assert d.stats["sent"] == 20 and d.stats["retried"] > 0 and d.stats["dead"] == 0
+
+def test_per_pair_order_kept_across_retries(server):
+    random.seed(2)
+    server.fail_rate = 0.4
+    d = dispatcher(server.url, senders=8).start()
+    pairs = [f"P{i}@1m" for i in range(6)]
+    for n in range(8):
+        for p in pairs:
+            d.submit(f"{p}#{n}", meta={"pair": p})
+    assert d.drain(30)
+    got = codes(server)
+    assert len(got) == 48
+    for p in pairs:
+        assert [c for c in got if c.startswith(p)] == [f"{p}#{n}" for n in range(8)]
+
+def test_dead_alert_releases_next_in_pair(server):
+    server.fail_rate = 1.0
+    dead = []
+    d = dispatcher(server.url, max_retries=1)
+    d.on_dead = dead.append
+    d.start()
+    d.submit("ENTER", meta={"pair": "X@1m"})
+    d.submit("EXIT", meta={"pair": "X@1m"})
+    assert d.drain(10)
+    assert [a["payload"]["code"] for a in dead] == ["ENTER", "EXIT"]
+    assert d.stats["dead"] == 2 and d.pending() == 0
+
+def test_recover_resends_unacked_in_order(server, tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    d = dispatcher(server.url, path)                  # gönderici yok: hepsi bekler
+    for n in range(3):
+        d.submit(f"X#{n}", meta={"pair": "X@1m"})
+    d.submit("Y#0", meta={"pair": "Y@1m"})
+    assert codes(server) == []
+
+    d2 = dispatcher(server.url, path).start()         # restart
+    assert d2.stats["recovered"] == 4
+    assert d2.drain(10)
+    assert [c for c in codes(server) if c.startswith("X")] == ["X#0", "X#1", "X#2"]
+
+    d3 = dispatcher(server.url, path).start()         # hepsi ack'li: tekrar yok
+    assert d3.stats["recovered"] == 0
+
+def test_recover_expires_stale(server, tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    d = dispatcher(server.url, path)
+    d.submit("OLD", meta={"pair": "X@1m"})
+    d.submit("NEW", meta={"pair": "Y@1m"})
+    recs = outbox_ops(path)
+    recs[0]["ts"] -= 3600
+    with open(path, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(r) + "\n" for r in recs)
+
+    dead = []
+    d2 = dispatcher(server.url, path, max_age=300)
+    d2.on_dead = dead.append
+    d2.start()
+    assert d2.drain(10)
+    assert codes(server) == ["NEW"]
+    assert [a["payload"]["code"] for a in dead] == ["OLD"]
+    assert d2.stats["expired"] == 1
+
+def test_outbox_compacted_at_runtime(server, tmp_path):
+    path = str(tmp_path / "outbox.jsonl")
+    server.fail_rate = 0.0
+    d = dispatcher(server.url, path, compact_every=10, keep_dead=5).start()
+    for i in range(60):
+        d.submit(f"A{i}", meta={"pair": f"P{i % 3}@1m"})
+    assert d.drain(20)
+    assert d.stats["compacted"] >= 5
+    assert len(outbox_ops(path)) < 2 * 10 + 60 // 10
+
+    server.fail_rate = 1.0
+    d.max_retries = 0
+    for i in range(20):
+        d.submit(f"D{i}")
+    assert d.drain(20)
+    dead = [r for r in outbox_ops(path) if r["op"] == "dead"]
+    assert 0 < len(dead) <= 5 + 10
+
+    d2 = dispatcher(server.url, path).start()
+    assert d2.stats["recovered"] == 0
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WebSocket kline akışı (Binance combined streams) + offline replay sunucusu.
+
+Kullanım:
+    python ws_feed.py replay --file kayit.jsonl --port 8765 --speed 10
+    python ws_feed.py replay --synthetic SOLUSDT@15m,XRPUSDT@5m --port 8765
+    python ws_feed.py record --streams SOLUSDT@15m --out kayit.jsonl
+
+Bot tarafında: DATA_SOURCE=ws, WS_URL=ws://127.0.0.1:8765
+"""
+
+import os, json, asyncio, logging, math, random
+from collections import deque
+from threading import Thread, Lock
+from time import time
+
+from ohlcv import OHLCV
+from resample import NATIVE_MS
+
+logger = logging.getLogger("wunderbot")
+
+WS_URL = os.getenv("WS_URL", "wss://stream.binance.com:9443")
+STREAMS_PER_CONN = 200  # Binance limiti 1024; bağlantı başına makul bir parça
+
+INTERVAL_MS = NATIVE_MS   # Binance interval'leri (3m, 2h, 6h, 12h, 3d, 1w dahil)
+
+def stream_name(symbol, interval):
+    return f"{symbol.lower()}@kline_{interval}"
+
+def parse_kline(msg):
+    """Combined stream mesajından (symbol, interval, bar, closed) döner."""
+    data = msg.get("data", msg)
+    if data.get("e") != "kline":
+        return None
+    k = data["k"]
+    bar = (int(k["t"]), float(k["o"]), float(k["h"]), float(k["l"]), float(k["c"]), float(k["v"]))
+    return k["s"].upper(), k["i"], bar, bool(k["x"])
+
+# ============== CLIENT ==============
+class KlineStream:
+    """
+    Tüm (symbol, interval) çiftleri için kline stream'lerine abone olur,
+    barları bellekte tutar ve bar kapanışında on_close(symbol, interval) çağırır.
+    get_klines() bot.get_klines ile aynı OHLCV penceresini döner.
+    """
+
+    def __init__(self, keys, on_close=None, seed_fn=None, url=None, history=500):
+        self.keys = sorted(set(keys))           # [(symbol, interval), ...]
+        self.on_close = on_close
+        self.seed_fn = seed_fn                  # (symbol, interval) -> OHLCV
+        self.url = (url or WS_URL).rstrip("/")
+        self.history = history
+        self._bars = {k: deque(maxlen=history) for k in self.keys}
+        self._lock = Lock()
+        self._loop = None
+        self._thread = None
+        self.connected = False
+        self.last_msg = None
+
+    # ---- veri ----
+    def has(self, symbol, interval):
+        return (symbol, interval) in self._bars
+
+    def seed(self, symbol, interval, df):
+        if df is None or df.empty:
+            return
+        if not isinstance(df, OHLCV):
+            df = OHLCV.from_frame(df)
+        rows = zip(df.ts.tolist(), *(df[c].tolist() for c in ("open", "high", "low", "close", "volume")))
+        with self._lock:
+            dq = self._bars.setdefault((symbol, interval), deque(maxlen=self.history))
+            dq.clear()
+            dq.extend(rows)
+
+    def seed_all(self):
+        if not self.seed_fn:
+            return
+        for symbol, interval in self.keys:
+            try:
+                self.seed(symbol, interval, self.seed_fn(symbol, interval))
+            except Exception as e:
+                logger.error(f"[ws] {symbol}@{interval} seed hatası: {e}")
+
+    def update(self, symbol, interval, bar, closed=False):
+        with self._lock:
+            dq = self._bars.get((symbol, interval))
+            if dq is None:
+                return
+            if dq and dq[-1][0] == bar[0]:
+                dq[-1] = bar                    # oluşan mum yerinde güncellenir
+            elif not dq or dq[-1][0] < bar[0]:
+                dq.append(bar)
+            if closed and dq[-1][0] == bar[0]:
+                # REST ile aynı görünüm: son satır her zaman oluşan mumdur.
+                # Kapanışta sonraki barı geçici olarak ekle, ilk mesajla ezilir.
+                c = bar[4]
+                dq.append((bar[0] + INTERVAL_MS.get(interval, 60_000), c, c, c, c, 0.0))
+
+    def get_klines(self, symbol, interval, limit=200):
+        with self._lock:
+            rows = list(self._bars.get((symbol, interval), ()))[-limit:]
+        return OHLCV.from_klines(rows)
+
+    # ---- bağlantı ----
+    def _handle(self, raw):
+        self.last_msg = time()
+        try:
+            parsed = parse_kline(json.loads(raw))
+        except Exception as e:
+            logger.error(f"[ws] mesaj çözülemedi: {e}")
+            return
+        if not parsed:
+            return
+        symbol, interval, bar, closed = parsed
+        self.update(symbol, interval, bar, closed)
+        if closed and self.on_close:
+            try:
+                self.on_close(symbol, interval)
+            except Exception as e:
+                logger.error(f"[ws] on_close hatası ({symbol}@{interval}): {e}")
+
+    async def _run_conn(self, streams):
+        from websockets.asyncio.client import connect
+        url = f"{self.url}/stream?streams={'/'.join(streams)}"
+        backoff = 1
+        while True:
+            try:
+                async with connect(url, ping_interval=20, max_size=2**22) as ws:
+                    self.connected = True
+                    if backoff > 1:
+                        # Kopukken kaçan barları REST ile tamamla
+                        await asyncio.get_running_loop().run_in_executor(None, self.seed_all)
+                    backoff = 1
+                    logger.info(f"🔌 WS bağlandı ({len(streams)} stream)")
+                    async for raw in ws:
+                        self._handle(raw)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[ws] bağlantı hatası: {e} — {backoff}s sonra tekrar")
+            self.connected = False
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    async def _main(self):
+        names = [stream_name(s, i) for s, i in self.keys]
+        chunks = [names[i:i + STREAMS_PER_CONN] for i in range(0, len(names), STREAMS_PER_CONN)]
+        await asyncio.gather(*(self._run_conn(c) for c in chunks))
+
+    def start(self):
+        self.seed_all()
+
+        def runner():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._main())
+            except Exception as e:
+                logger.error(f"[ws] döngü durdu: {e}")
+
+        self._thread = Thread(target=runner, name="kline-stream", daemon=True)
+        self._thread.start()
+        logger.info(f"📡 Kline stream başlatıldı: {len(self.keys)} stream → {self.url}")
+        return self
+
+# ============== REPLAY SERVER ==============
+def kline_msg(symbol, interval, bar, closed):
+    t, o, h, l, c, v = bar
+    step = INTERVAL_MS.get(interval, 60_000)
+    return {
+        "stream": stream_name(symbol, interval),
+        "data": {"e": "kline", "E": t, "s": symbol.upper(), "k": {
+            "t": t, "T": t + step - 1, "s": symbol.upper(), "i": interval,
+            "o": str(o), "h": str(h), "l": str(l), "c": str(c), "v": str(v), "x": closed,
+        }},
+    }
+
+def synthetic_messages(keys, bars=300, ticks=3, start_ms=None, seed=1):
+    """Her key için rastgele yürüyüş barları; her bar `ticks` ara güncelleme + kapanış."""
+    rnd = random.Random(seed)
+    start_ms = start_ms or int(time() * 1000) // 3_600_000 * 3_600_000
+    price = {k: 100.0 + 10 * rnd.random() for k in keys}
+    events = []
+    for symbol, interval in keys:
+        step = INTERVAL_MS.get(interval, 60_000)
+        p = price[(symbol, interval)]
+        for i in range(bars):
+            t = start_ms + i * step
+            o = p; h = l = o
+            for j in range(ticks + 1):
+                p = max(0.01, p * (1 + rnd.gauss(0, 0.002)) + 0.05 * math.sin(i / 15.0))
+                h = max(h, p); l = min(l, p)
+                # olay zamanı: bar içinde eşit aralıklı, kapanış bar sonunda
+                at = t + (step * (j + 1)) // (ticks + 1)
+                events.append((at, kline_msg(symbol, interval, (t, o, h, l, p, 1.0 + rnd.random()), j == ticks)))
+    events.sort(key=lambda e: e[0])
+    return events
+
+def load_recording(path):
+    """record komutunun yazdığı JSONL: {"at": ms, "msg": {...}}"""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                obj = json.loads(line)
+                events.append((int(obj["at"]), obj["msg"]))
+    events.sort(key=lambda e: e[0])
+    return events
+
+async def serve_replay(events, host="127.0.0.1", port=8765, speed=1.0):
+    """
+    Binance combined stream arayüzünü taklit eder: /stream?streams=a/b/c
+    Her bağlantıya sadece abone olduğu stream'lerin olaylarını, orijinal
+    zaman aralıklarını `speed` kat hızlandırarak yollar (speed<=0: beklemeden).
+    """
+    from urllib.parse import urlparse, parse_qs
+    from websockets.asyncio.server import serve
+
+    async def handler(ws):
+        q = parse_qs(urlparse(ws.request.path).query)
+        wanted = set((q.get("streams", [""])[0]).split("/"))
+        mine = [(at, m) for at, m in events if m["stream"] in wanted]
+        logger.info(f"▶️  Replay: {len(wanted)} stream, {len(mine)} olay")
+        prev = mine[0][0] if mine else 0
+        for at, m in mine:
+            if speed > 0 and at > prev:
+                await asyncio.sleep((at - prev) / 1000.0 / speed)
+            prev = at
+            await ws.send(json.dumps(m))
+        await ws.wait_closed()
+
+    async with serve(handler, host, port) as server:
+        logger.info(f"🎞️  Replay sunucusu: ws://{host}:{port}")
+        await server.serve_forever()
+
+async def record(streams, out, url=None):
+    from websockets.asyncio.client import connect
+    url = f"{(url or WS_URL).rstrip('/')}/stream?streams={'/'.join(streams)}"
+    async with connect(url) as ws:
+        with open(out, "a", encoding="utf-8") as f:
+            async for raw in ws:
+                f.write(json.dumps({"at": int(time() * 1000), "msg": json.loads(raw)}) + "\n")
+                f.flush()
+
+def _parse_keys(spec):
+    keys = []
+    for item in (spec or "").split(","):
+        if "@" in item:
+            s, i = item.strip().split("@", 1)
+            keys.append((s.upper(), i))
+    return keys
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    ap = argparse.ArgumentParser(description="Kline WS replay / kayıt aracı")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    rp = sub.add_parser("replay")
+    rp.add_argument("--file")
+    rp.add_argument("--synthetic", help="SYMBOL@tf listesi, virgülle")
+    rp.add_argument("--bars", type=int, default=300)
+    rp.add_argument("--host", default="127.0.0.1")
+    rp.add_argument("--port", type=int, default=8765)
+    rp.add_argument("--speed", type=float, default=1.0)
+    rc = sub.add_parser("record")
+    rc.add_argument("--streams", required=True, help="SYMBOL@tf listesi, virgülle")
+    rc.add_argument("--out", required=True)
+    args = ap.parse_args()
+
+    if args.cmd == "replay":
+        evs = load_recording(args.file) if args.file else synthetic_messages(_parse_keys(args.synthetic), bars=args.bars)
+        asyncio.run(serve_replay(evs, args.host, args.port, args.speed))
+    else:
+        asyncio.run(record([stream_name(s, i) for s, i in _parse_keys(args.streams)], args.out))
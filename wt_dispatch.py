@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+WunderTrading webhook gönderimi: kuyruk + keep-alive session + retry + outbox.
+
+Analiz thread'leri alert'i kuyruğa bırakıp devam eder; gönderici thread'ler
+aynı session havuzunu kullanarak paralel yollar. Her alert önce outbox'a
+(append-only JSONL) yazılır, başarıyla gidince "ack" düşülür; süreç
+yeniden başlarsa ack'lenmemiş alert'ler tekrar kuyruğa alınır.
+
+Aynı pariteye (meta["pair"]) ait alert'ler sırayla gider: paritenin bir
+alert'i gönderimde ya da retry beklerken sonrakiler tutulur, o teslim
+edilince (ya da dead olunca) sıradaki kuyruğa girer. Böylece retry edilen
+ENTER, arkasından gelen EXIT'ten sonra WT'ye ulaşamaz.
+
+Offline test için sahte WT endpoint'i:
+    python wt_dispatch.py fake --port 8089 --fail-rate 0.2
+    WT_URL=http://127.0.0.1:8089/bot/custom python bot.py
+"""
+
+import os, json, logging, random, uuid
+from collections import deque
+from queue import PriorityQueue, Empty
+from threading import Thread, Lock
+from time import time, sleep, monotonic
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger("wunderbot")
+
+RETRY_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+class AlertDispatcher:
+    """
+    submit(code, meta) hemen döner. Başarısız gönderimler üstel bekleme
+    (base * 2^deneme, en fazla max_backoff, + jitter) ile max_retries kez
+    tekrar denenir; 4xx (429 hariç) ve tükenen denemeler "dead" olarak
+    outbox'ta kalır ve loglanır. Yeniden başlamada outbox'ta max_age
+    saniyeden eski bekleyen alert'ler gönderilmez, dead olur.
+    Outbox her compact_every ack / dead'de bekleyenler + son keep_dead dead
+    kaydıyla yeniden yazılır; uzun çalışan süreçte dosya sınırsız büyümez.
+    """
+
+    def __init__(self, url, outbox_path=None, senders=4, max_retries=6,
+                 base_backoff=0.5, max_backoff=60.0, timeout=10, max_age=None,
+                 compact_every=200, keep_dead=1000):
+        self.url = url
+        self.outbox_path = outbox_path
+        self.max_retries = max_retries
+        self.max_age = max_age                  # sn; None / 0: sınırsız
+        self.compact_every = compact_every
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.on_dead = None                     # fn(alert) — son deneme de başarısızsa
+        self.can_send = None                    # fn(alert) -> bool — her denemeden önce; False: dead
+        self.on_post = None                     # fn(saniye, status) — her POST denemesinden sonra
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(senders, 1))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._q = PriorityQueue()
+        self._seq = 0
+        self._lanes = {}                        # pair -> deque; varsa paritenin bir alert'i yolda
+        self._held = 0
+        self._lock = Lock()
+        self._file_lock = Lock()
+        self._live = {}                         # id -> enq kaydı (ack / dead bekleyen)
+        self._dead = deque(maxlen=keep_dead)    # son dead kayıtları (inceleme için)
+        self._since_compact = 0
+        self._threads = []
+        self.n_senders = senders
+        self.stats = {"queued": 0, "sent": 0, "retried": 0, "dead": 0, "recovered": 0, "expired": 0,
+                      "fenced": 0, "compacted": 0}
+
+    # ---- outbox ----
+    def _append(self, rec):
+        if not self.outbox_path:
+            return
+        line = json.dumps(rec, ensure_ascii=False) + "\n"
+        with self._file_lock:
+            with open(self.outbox_path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+            op = rec["op"]
+            if op == "enq":
+                self._live[rec["id"]] = rec
+                return
+            enq = self._live.pop(rec["id"], None)
+            if op == "dead":
+                self._dead.append({**(enq or rec), "error": rec.get("error")})
+            self._since_compact += 1
+            if self._since_compact >= self.compact_every:
+                self._compact()
+
+    def _write_outbox(self, dead, pending):
+        """Outbox'ı dead + bekleyen kayıtlarla atomik olarak yeniden yaz."""
+        tmp = self.outbox_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for rec in dead:
+                f.write(json.dumps({**rec, "op": "dead"}, ensure_ascii=False) + "\n")
+            for rec in pending:
+                f.write(json.dumps({**rec, "op": "enq"}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.outbox_path)
+
+    def _compact(self):
+        """_file_lock altında çağrılır."""
+        try:
+            self._write_outbox(list(self._dead), list(self._live.values()))
+        except Exception as e:
+            logger.error(f"❌ Outbox sıkıştırılamadı: {e}")
+            return
+        self._since_compact = 0
+        with self._lock:
+            self.stats["compacted"] += 1
+
+    def _recover(self):
+        """
+        Ack'lenmemiş alert'leri döndür ve outbox'ı sadece onlarla yeniden yaz.
+        max_age'den eskiler (uzun kesinti sonrası bayat ENTER/EXIT) dead yazılır.
+        """
+        if not self.outbox_path or not os.path.isfile(self.outbox_path):
+            return []
+        pending, dead = {}, {}
+        with open(self.outbox_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue            # yarım kalmış son satır
+                op, aid = rec.get("op"), rec.get("id")
+                if op == "enq":
+                    pending[aid] = rec
+                elif op == "ack":
+                    pending.pop(aid, None)
+                elif op == "dead":
+                    dead[aid] = pending.pop(aid, rec)
+        expired = []
+        if self.max_age:
+            now = time()
+            for aid in [a for a, rec in pending.items() if now - float(rec.get("ts") or 0) > self.max_age]:
+                rec = pending.pop(aid)
+                dead[aid] = {**rec, "error": "expired"}
+                expired.append(rec)
+        # Sıkıştır: bekleyenler + son dead kayıtları (inceleme için) kalır
+        with self._file_lock:
+            self._dead.extend(dead.values())
+            self._live.update(pending)
+            self._write_outbox(list(self._dead), list(pending.values()))
+        for rec in expired:
+            code = rec.get("payload", {}).get("code")
+            logger.error(f"❌ Outbox: {code} {now - float(rec.get('ts') or 0):.0f}s önce kuyruğa alınmış, "
+                         f"gönderilmedi (dead)")
+            self.stats["expired"] += 1
+            self.stats["dead"] += 1
+            if self.on_dead:
+                self.on_dead(rec)
+        return list(pending.values())
+
+    # ---- kuyruk ----
+    def _put(self, alert, due=0.0):
+        with self._lock:
+            self._seq += 1
+            seq = self._seq
+        self._q.put((due, seq, alert))
+
+    def _enqueue(self, alert):
+        """Paritenin yolda alert'i varsa arkasında beklet, yoksa kuyruğa al."""
+        lane = (alert.get("meta") or {}).get("pair")
+        if lane is not None:
+            with self._lock:
+                if lane in self._lanes:
+                    self._lanes[lane].append(alert)
+                    self._held += 1
+                    return
+                self._lanes[lane] = deque()
+        self._put(alert)
+
+    def _done(self, alert):
+        """Alert sonuçlandı (ack / dead): paritenin sıradaki alert'ini kuyruğa al."""
+        lane = (alert.get("meta") or {}).get("pair")
+        if lane is None:
+            return
+        with self._lock:
+            q = self._lanes.get(lane)
+            if q:
+                nxt = q.popleft()
+                self._held -= 1
+            else:
+                self._lanes.pop(lane, None)
+                return
+        self._put(nxt)
+
+    def submit(self, code, meta=None, extra=None):
+        code = (code or "").strip()
+        payload = {"code": code}
+        if extra and isinstance(extra, dict):
+            payload.update(extra)
+        alert = {"op": "enq", "id": uuid.uuid4().hex, "ts": time(),
+                 "payload": payload, "meta": meta or {}, "attempt": 0}
+        self._append(alert)
+        self._enqueue(alert)
+        with self._lock:
+            self.stats["queued"] += 1
+        return alert["id"]
+
+    def start(self):
+        for alert in self._recover():
+            alert["attempt"] = 0
+            self._enqueue(alert)
+            self.stats["recovered"] += 1
+        if self.stats["recovered"]:
+            logger.info(f"📮 Outbox: {self.stats['recovered']} gönderilmemiş alert tekrar kuyrukta")
+        for i in range(self.n_senders):
+            t = Thread(target=self._sender, name=f"wt-sender-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def pending(self):
+        return self._q.qsize() + self._held
+
+    def snapshot(self):
+        with self._lock:
+            return {**self.stats, "pending": self._q.qsize() + self._held}
+
+    def drain(self, timeout=10.0):
+        """Kuyruk boşalana kadar bekle (test / kapanış için)."""
+        end = monotonic() + timeout
+        while monotonic() < end:
+            if self._q.unfinished_tasks == 0:
+                return True
+            sleep(0.01)
+        return False
+
+    # ---- gönderim ----
+    def _post(self, payload):
+        r = self.session.post(self.url, json=payload, timeout=self.timeout)
+        return r.status_code, (r.text if hasattr(r, "text") else "<no text>")
+
+    def _sender(self):
+        while True:
+            due, seq, alert = self._q.get()
+            wait_s = due - monotonic()
+            if wait_s > 0:
+                # Henüz vakti gelmemiş retry: geri koy, biraz bekle
+                self._q.put((due, seq, alert))
+                self._q.task_done()
+                sleep(min(wait_s, 0.2))
+                continue
+            try:
+                self._deliver(alert)
+            except Exception as e:
+                logger.error(f"❌ WT dispatcher hatası: {e}")
+            finally:
+                self._q.task_done()
+
+    def _deliver(self, alert):
+        code = alert["payload"].get("code")
+        if self.can_send and not self.can_send(alert):
+            # Örn. paritenin lease'i retry beklerken başka instance'a geçti
+            with self._lock:
+                self.stats["fenced"] += 1
+            self._dead_letter(alert, "fenced")
+            return
+        err, retry = None, True
+        try:
+            logger.info(f"📤 WT'ye gönderiliyor: {code}")
+            t0 = monotonic()
+            try:
+                status, body = self._post(alert["payload"])
+            except Exception:
+                if self.on_post:
+                    self.on_post(monotonic() - t0, "error")
+                raise
+            if self.on_post:
+                self.on_post(monotonic() - t0, status)
+            logger.info(f"✅ WT yanıtı [HTTP {status}]: {body}")
+            if 200 <= status < 300:
+                self._append({"op": "ack", "id": alert["id"], "ts": time()})
+                with self._lock:
+                    self.stats["sent"] += 1
+                self._done(alert)
+                return
+            err, retry = f"HTTP {status}", status in RETRY_STATUS
+        except Exception as e:
+            err = str(e)
+
+        alert["attempt"] += 1
+        if retry and alert["attempt"] <= self.max_retries:
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (alert["attempt"] - 1))
+            backoff *= 0.5 + random.random()
+            logger.warning(f"🔁 WT send error ({err}) — {code}: {backoff:.1f}s sonra tekrar "
+                           f"({alert['attempt']}/{self.max_retries})")
+            with self._lock:
+                self.stats["retried"] += 1
+            self._put(alert, monotonic() + backoff)
+            return
+
+        logger.error(f"❌ WT send error: {err} — {code} gönderilemedi (outbox'ta dead)")
+        self._dead_letter(alert, err)
+
+    def _dead_letter(self, alert, err):
+        self._append({"op": "dead", "id": alert["id"], "ts": time(), "error": err})
+        with self._lock:
+            self.stats["dead"] += 1
+        self._done(alert)
+        if self.on_dead:
+            self.on_dead(alert)
+
+# ============== FAKE WT ENDPOINT ==============
+class FakeWTServer:
+    """
+    WT webhook taklidi. Gelen JSON'ları `received` listesine (ve istenirse
+    JSONL dosyasına) yazar; fail_rate oranında 503 döner, latency kadar bekler.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, fail_rate=0.0, latency=0.0, record_path=None):
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        srv = self
+        self.received = []
+        self.fail_rate = fail_rate
+        self.latency = latency
+        self.record_path = record_path
+        self._lock = Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"       # keep-alive
+
+            def do_POST(self):
+                n = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(n)
+                if srv.latency:
+                    sleep(srv.latency)
+                if random.random() < srv.fail_rate:
+                    code, body = 503, b"unavailable"
+                else:
+                    code, body = 200, b"ok"
+                    try:
+                        payload = json.loads(raw or b"{}")
+                    except Exception:
+                        payload = {"raw": raw.decode("utf-8", "replace")}
+                    srv._record(payload)
+                self.send_response(code)
+                self.send_header("Content-Type", "text/plain")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *a):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/bot/custom"
+
+    def _record(self, payload):
+        rec = {"at": time(), "payload": payload}
+        with self._lock:
+            self.received.append(rec)
+            if self.record_path:
+                with open(self.record_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def start(self):
+        Thread(target=self.httpd.serve_forever, name="fake-wt", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+
+    ap = argparse.ArgumentParser(description="Sahte WunderTrading webhook endpoint'i")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    fp = sub.add_parser("fake")
+    fp.add_argument("--host", default="127.0.0.1")
+    fp.add_argument("--port", type=int, default=8089)
+    fp.add_argument("--fail-rate", type=float, default=0.0)
+    fp.add_argument("--latency", type=float, default=0.0)
+    fp.add_argument("--record", help="gelen alert'lerin yazılacağı JSONL")
+    args = ap.parse_args()
+
+    srv = FakeWTServer(args.host, args.port, args.fail_rate, args.latency, args.record)
+    logger.info(f"🧪 Sahte WT endpoint: {srv.url}")
+    srv.httpd.serve_forever()